@@ -1,18 +1,7 @@
 import tkinter as tk
 from tkinter import simpledialog, messagebox
-import yfinance as yf
-
-def get_latest_eps(ticker):
-    """Fetches the most recent EPS for the given stock ticker."""
-    stock = yf.Ticker(ticker)
-    try:
-        # Attempt to get EPS from the `info` dictionary
-        eps = stock.info.get('trailingEps', None)
-        if eps is not None:
-            return eps
-        raise ValueError("EPS data not available for this ticker.")
-    except Exception as e:
-        raise ValueError("Failed to fetch EPS data. Please check the ticker symbol.")
+from finance_tools.eps import get_latest_eps
+from finance_tools.workers import BackgroundRunner
 
 def main():
     root = tk.Tk()
@@ -24,16 +13,24 @@ def main():
         messagebox.showerror("Input Error", "No ticker symbol entered.")
         return
 
-    try:
-        # Fetch the most recent EPS
-        eps = get_latest_eps(ticker)
+    def show_eps(eps):
         messagebox.showinfo("Most Recent EPS",
                             f"Ticker: {ticker.upper()}\n"
                             f"Most Recent Earnings Per Share (EPS): ${eps:.2f}")
-    except ValueError as e:
-        messagebox.showerror("Data Error", str(e))
-    except Exception as e:
-        messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
+        root.destroy()
+
+    def show_error(e):
+        if isinstance(e, ValueError):
+            messagebox.showerror("Data Error", str(e))
+        else:
+            messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
+        root.destroy()
+
+    # Fetch the most recent EPS in the background and keep the event loop running meanwhile
+    runner = BackgroundRunner(root)
+    runner.submit(get_latest_eps, ticker, on_success=show_eps, on_error=show_error)
+    root.mainloop()
+    runner.shutdown()
 
 if __name__ == "__main__":
     main()
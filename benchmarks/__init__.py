@@ -0,0 +1,3 @@
+"""
+Benchmark suite for the Finance-Tools calculators. Run with: python -m benchmarks.run
+"""
@@ -0,0 +1,267 @@
+"""
+Benchmarks for the hot path of every calculator.
+
+Each benchmark runs on synthetic, seeded data at 1x, 100x and 10,000x a
+realistic base size, entirely offline: market data comes from a synthetic
+provider and the caches live in a temporary directory. Results are written as
+JSON so runs from different versions can be compared.
+
+Command line usage (from the repository root):
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --scales 1,100 --only wpvf
+    python -m benchmarks.run --compare old.json new.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+import pandas as pd
+
+from finance_tools.providers import SyntheticProvider
+
+DEFAULT_SCALES = (1, 100, 10_000)
+DEFAULT_SEED = 12345
+MIN_TIME = 0.2  # seconds of repeated runs per measurement, at least one run
+MAX_REPEATS = 50
+
+
+def load_script(filename, name):
+    """Import one of the top-level GUI scripts (their names contain spaces)."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _Entry:
+    """Stand-in for tk.Entry and tk.Label so InvestmentCalculator.compute runs without a display."""
+
+    def __init__(self, text=''):
+        self.text = text
+
+    def get(self):
+        return self.text
+
+    def delete(self, first, last=None):
+        self.text = ''
+
+    def insert(self, index, text):
+        self.text = text
+
+    def config(self, text=''):
+        self.text = text
+
+
+# Each setup function takes (size, rng) and returns the zero-argument callable to time
+
+def setup_calculate_statistics(size, rng):
+    from finance_tools.scenarios import calculate_statistics
+
+    probabilities = list(rng.dirichlet(np.ones(size)))
+    returns = list(rng.normal(0.05, 0.2, size))
+    expected_return = sum(p * r for p, r in zip(probabilities, returns))
+    return lambda: calculate_statistics(probabilities, returns, expected_return)
+
+
+def setup_solve_missing_values(size, rng):
+    from finance_tools.scenarios import solve_missing_values
+
+    probabilities = list(rng.dirichlet(np.ones(size)))
+    returns = list(rng.normal(0.05, 0.2, size))
+    return lambda: solve_missing_values(None, None, None, None, probabilities, returns)
+
+
+def setup_investment_calculator(size, rng):
+    from finance_tools.portfolio import Portfolio
+
+    module = load_script('holding period return-yield for a portfolio calculator.py', 'holding_period_calculator')
+    calculator = module.InvestmentCalculator.__new__(module.InvestmentCalculator)
+    calculator.portfolio = Portfolio(rng.integers(1, 1000, size), rng.uniform(5, 500, size).round(2),
+                                     rng.uniform(5, 500, size).round(2))
+    calculator.results = None
+    calculator.page = 0
+    calculator.num_investments = module.PAGE_SIZE
+    calculator.entries = [[_Entry() for _ in range(9)] for _ in range(module.PAGE_SIZE)]
+    calculator.page_label = calculator.totals_label = _Entry()
+    calculator.show_page()
+    return calculator.compute
+
+
+def setup_compute_wpvf(size, rng):
+    from finance_tools.wpvf import compute_wpvf
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size)))
+    volume = rng.integers(100_000, 10_000_000, size).astype(float)
+    index = pd.date_range('1700-01-01', periods=size, freq='h')
+    frame = pd.DataFrame({'Close': close, 'Volume': volume}, index=index)
+    return lambda: compute_wpvf(frame.copy())
+
+
+def setup_monthly_closing_prices(size, rng):
+    from finance_tools.prices import fetch_closing_prices
+
+    # Daily bars from 1678 keep even the 10,000x range inside pandas' timestamp limits and
+    # in the past, so the warm cache never has to fetch again
+    start_date = '1678-01-01'
+    end_date = (date(1678, 1, 1) + timedelta(days=size)).isoformat()
+    ticker = f'BENCH{size}'
+    fetch_closing_prices(ticker, start_date, end_date, monthly=True)  # warm the price cache
+    return lambda: fetch_closing_prices(ticker, start_date, end_date, monthly=True)
+
+
+def setup_calculate_total_dividends(size, rng):
+    from finance_tools.dividends import calculate_total_dividends
+
+    tickers = [f'DIV{i}' for i in range(10)]
+    starts = pd.Timestamp('2000-01-01') + pd.to_timedelta(rng.integers(0, 7000, size), unit='D')
+    ends = starts + pd.to_timedelta(rng.integers(30, 3000, size), unit='D')
+    queries = [(tickers[i % len(tickers)], start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), 100)
+               for i, (start, end) in enumerate(zip(starts, ends))]
+    for ticker in tickers:
+        calculate_total_dividends(ticker, '2000-01-01', '2000-01-02', 1)  # warm the dividend store
+
+    def run():
+        for query in queries:
+            calculate_total_dividends(*query)
+    return run
+
+
+# name -> (base size, unit, setup)
+BENCHMARKS = {
+    'calculate_statistics': (10, 'scenarios', setup_calculate_statistics),
+    'solve_missing_values': (10, 'scenarios', setup_solve_missing_values),
+    'InvestmentCalculator.compute': (10, 'positions', setup_investment_calculator),
+    'compute_wpvf': (252, 'bars', setup_compute_wpvf),
+    'fetch_closing_prices_monthly': (12, 'daily bars', setup_monthly_closing_prices),
+    'calculate_total_dividends': (10, 'range queries', setup_calculate_total_dividends),
+}
+
+
+def time_callable(func):
+    """
+    Run func repeatedly for about MIN_TIME seconds.
+
+    :return: List of per-run wall times in seconds
+    """
+    times = []
+    while not times or (sum(times) < MIN_TIME and len(times) < MAX_REPEATS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(names=None, scales=DEFAULT_SCALES, seed=DEFAULT_SEED):
+    """
+    Run the benchmarks offline against synthetic data.
+
+    :param names: Benchmark names to run, all if None
+    :param scales: Multiples of each benchmark's base size
+    :param seed: Seed for the synthetic data
+    :return: Results document (metadata plus one entry per benchmark and scale)
+    """
+    from finance_tools import dividends, price_cache
+    from finance_tools.providers import get_provider, set_provider
+
+    results = []
+    previous_provider = get_provider()
+    previous_home = os.environ.get('FINANCE_TOOLS_HOME')
+    with tempfile.TemporaryDirectory() as home:
+        # Keep every cache and download inside the temporary directory
+        os.environ['FINANCE_TOOLS_HOME'] = home
+        price_cache._default_store = None
+        dividends._default_store = None
+        set_provider(SyntheticProvider(seed))
+        try:
+            for name in names or BENCHMARKS:
+                base, unit, setup = BENCHMARKS[name]
+                for scale in scales:
+                    size = base * scale
+                    func = setup(size, np.random.default_rng([seed, scale]))
+                    times = time_callable(func)
+                    best = min(times)
+                    results.append({
+                        'benchmark': name, 'scale': scale, 'size': size, 'unit': unit,
+                        'repeats': len(times), 'min_s': best, 'median_s': statistics.median(times),
+                        'per_second': size / best if best else None,
+                    })
+                    print(f"{name:<30} {scale:>6}x {size:>10} {unit:<14} "
+                          f"min {best * 1000:10.3f} ms  median {statistics.median(times) * 1000:10.3f} ms")
+        finally:
+            set_provider(previous_provider)
+            price_cache._default_store = None
+            dividends._default_store = None
+            if previous_home is None:
+                os.environ.pop('FINANCE_TOOLS_HOME', None)
+            else:
+                os.environ['FINANCE_TOOLS_HOME'] = previous_home
+
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.platform(),
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(old_path, new_path):
+    """Print the change in best time for every benchmark present in both files."""
+    with open(old_path) as f:
+        old = {(r['benchmark'], r['scale']): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = {(r['benchmark'], r['scale']): r for r in json.load(f)['results']}
+
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key]['min_s'] / old[key]['min_s']
+        print(f"{key[0]:<30} {key[1]:>6}x  {old[key]['min_s'] * 1000:10.3f} ms -> "
+              f"{new[key]['min_s'] * 1000:10.3f} ms  ({ratio:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the calculators on synthetic data.")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file for the results")
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)),
+                        help="Comma separated multiples of the base sizes")
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help="Run only this benchmark")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Seed for the synthetic data")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="Compare two result files and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    document = run_benchmarks(args.only, [int(scale) for scale in args.scales.split(',')], args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"Results saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,42 +1,7 @@
-import yfinance as yf
-import pandas as pd
 import tkinter as tk
 from tkinter import simpledialog, messagebox
-
-def fetch_closing_prices(ticker, start_date, end_date, interval='1d', monthly=False):
-    """
-    Fetch closing prices for a given ticker, start date, end date, and interval.
-    
-    :param ticker: Stock or index ticker symbol
-    :param start_date: Start date in 'YYYY-MM-DD' format
-    :param end_date: End date in 'YYYY-MM-DD' format
-    :param interval: Data interval ('1d' for daily, '1mo' for monthly)
-    :param monthly: If True, return the last trading day of each month
-    :return: DataFrame containing the closing prices
-    """
-    stock = yf.Ticker(ticker)
-    data = stock.history(start=start_date, end=end_date, interval=interval)
-    
-    # Remove timezone information from datetime index
-    if data.index.tz is not None:
-        data.index = data.index.tz_localize(None)
-    
-    # If monthly, get the last trading day of each month
-    if monthly:
-        data = data.resample('M').last()  # Resample to monthly and get the last entry (last trading day)
-    
-    return data['Close']
-
-def save_to_excel(ticker, data, interval):
-    """
-    Save the closing prices to an Excel file.
-    
-    :param ticker: Stock or index ticker symbol
-    :param data: DataFrame containing closing prices
-    :param interval: Data interval ('daily' or 'monthly')
-    """
-    with pd.ExcelWriter(f'{ticker}_{interval}_closing_prices.xlsx', engine='openpyxl') as writer:
-        data.to_excel(writer, sheet_name=f'{interval.capitalize()} Closing Prices')
+from finance_tools.prices import SAVE_FORMATS, fetch_closing_prices, save_prices
+from finance_tools.workers import BackgroundRunner
 
 def fetch_and_save_data():
     """
@@ -60,30 +25,53 @@ def fetch_and_save_data():
         messagebox.showerror("Input Error", "Invalid interval selected.")
         return
 
-    try:
-        if interval == 'daily':
-            closing_prices = fetch_closing_prices(ticker, start_date, end_date, interval='1d')
-        elif interval == 'monthly':
-            closing_prices = fetch_closing_prices(ticker, start_date, end_date, interval='1d', monthly=True)
-        
-        save_to_excel(ticker, closing_prices, interval)
-        messagebox.showinfo("Success", f"Data saved to {ticker}_{interval}_closing_prices.xlsx")
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+    # Download and save in the background so further requests can be queued meanwhile
+    runner.submit(fetch_and_save, ticker, start_date, end_date, interval, var_format.get(),
+                  on_success=lambda filename: messagebox.showinfo("Success", f"Data saved to {filename}"),
+                  on_error=lambda e: messagebox.showerror("Error", str(e)))
+
+def fetch_and_save(ticker, start_date, end_date, interval, file_format='xlsx'):
+    """
+    Fetch closing prices and write them to a file. Runs on a worker thread.
+
+    :return: Name of the file written
+    """
+    if interval == 'daily':
+        closing_prices = fetch_closing_prices(ticker, start_date, end_date, interval='1d')
+    elif interval == 'monthly':
+        closing_prices = fetch_closing_prices(ticker, start_date, end_date, interval='1d', monthly=True)
+
+    return save_prices(ticker, closing_prices, interval, file_format)
+
+def close_window():
+    """
+    Cancel queued downloads and close the window.
+    """
+    runner.shutdown()
+    root.destroy()
 
 def create_gui():
     """
     Create and display the GUI for user input.
     """
-    global var_interval
+    global root, runner, var_interval, var_format
     root = tk.Tk()
     root.title("Stock Data Fetcher")
+    root.protocol("WM_DELETE_WINDOW", close_window)
+    
+    # Downloads run here instead of on the Tk event loop
+    runner = BackgroundRunner(root)
     
     tk.Label(root, text="Select the interval for closing prices:").pack(pady=10)
     
     var_interval = tk.StringVar(value='daily')
     tk.OptionMenu(root, var_interval, 'daily', 'monthly').pack(pady=5)
     
+    tk.Label(root, text="Save as:").pack(pady=10)
+    
+    var_format = tk.StringVar(value='xlsx')
+    tk.OptionMenu(root, var_format, *SAVE_FORMATS).pack(pady=5)
+    
     tk.Button(root, text="Submit", command=fetch_and_save_data).pack(pady=20)
     
     root.mainloop()
@@ -1,11 +1,18 @@
 import tkinter as tk
-from tkinter import messagebox
-import yfinance as yf
+from tkinter import messagebox, filedialog
 from tkcalendar import DateEntry
 from datetime import date
 from tkinter import ttk
-from collections import defaultdict
 from ttkthemes import ThemedStyle
+from finance_tools.dividends import get_stock_info, calculate_total_dividends
+from finance_tools.ledger import DividendLedger
+from finance_tools.workers import BackgroundRunner
+
+# Rows rendered in the table at once; the ledger holds the rest
+VISIBLE_ROWS = 10
+
+ledger = DividendLedger()
+first_visible_row = 0
 
 
 def validate_year(date_entry):
@@ -15,58 +22,78 @@ def validate_year(date_entry):
         date_entry.set_date(None)
 
 
-def get_stock_info(symbol):
+def calculate_button_click():
+    symbol = symbol_entry.get()
+    start_date = start_calendar.get_date().strftime("%Y-%m-%d")
+    end_date = end_calendar.get_date().strftime("%Y-%m-%d")
+    shares = float(shares_entry.get())
+
+    # Look the symbol up in the background; the row is added when it finishes
+    runner.submit(fetch_dividend_row, symbol, start_date, end_date, shares,
+                  on_success=add_dividend_row, on_error=show_fetch_error)
+
+
+def fetch_dividend_row(symbol, start_date, end_date, shares):
+    # Runs on a worker thread, so it must not touch any widgets
     try:
-        stock = yf.Ticker(symbol)
-        info = stock.info
-        stock_name = info.get('longName', '')
-        currency = info.get('currency', '')
-        return stock_name, currency
+        stock_name, currency = get_stock_info(symbol)
     except Exception as e:
         print(f"Error: {str(e)}")
-        messagebox.showwarning("Error", f"Failed to fetch stock information. Please check the console.")
-        return '', ''
-
+        raise ValueError("Failed to fetch stock information. Please check the console.")
+    if not stock_name:
+        return None
 
-def calculate_total_dividends(symbol, start_date, end_date, shares):
     try:
-        stock = yf.Ticker(symbol)
-        dividends = stock.dividends
-
-        # Filter dividends based on date range
-        filtered_dividends = dividends.loc[start_date:end_date]
-
-        total_dividends = filtered_dividends.sum() * shares
-        return total_dividends
+        total_dividends = calculate_total_dividends(symbol, start_date, end_date, shares)
     except Exception as e:
         print(f"Error: {str(e)}")
-        messagebox.showwarning("Error", f"Failed to calculate total dividends. Please check the console.")
+        raise ValueError("Failed to calculate total dividends. Please check the console.")
 
+    ticker = symbol.upper()  # Capitalize the stock ticker
+    return ticker, stock_name, start_date, end_date, total_dividends, currency, shares
 
-def calculate_button_click():
-    symbol = symbol_entry.get()
-    start_date = start_calendar.get_date().strftime("%Y-%m-%d")
-    end_date = end_calendar.get_date().strftime("%Y-%m-%d")
-    shares = float(shares_entry.get())
 
-    stock_name, currency = get_stock_info(symbol)
-    if not stock_name:
+def add_dividend_row(row):
+    if row is None:
         return
 
-    total_dividends = calculate_total_dividends(symbol, start_date, end_date, shares)
+    dividends_text = f"Total Dividends:"
+    total_sum_label.configure(text=dividends_text)
 
-    if total_dividends is not None:
-        dividends_text = f"Total Dividends:"
-        total_sum_label.configure(text=dividends_text)
+    # Add data to the ledger and scroll the table to the new row
+    ledger.add(*row)
+    scroll_table("moveto", 1)
+
+    # Update the total dividends sum
+    update_total_dividends_sum()
 
-        # Add data to the table
-        ticker = symbol.upper()  # Capitalize the stock ticker
-        dividend_total = f"${total_dividends:.3f}"  # Rounded to 3 decimal places with dollar sign
-        table.insert("", "end", values=(ticker, stock_name, f"{start_date} - {end_date}", dividend_total, currency,
-                                        shares))
 
-        # Update the total dividends sum
-        update_total_dividends_sum()
+def show_fetch_error(error):
+    messagebox.showwarning("Error", str(error))
+
+
+def import_button_click():
+    path = filedialog.askopenfilename(title="Import Holdings",
+                                      filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+    if not path:
+        return
+
+    runner.submit(ledger.import_csv, path, on_success=finish_import, on_error=import_failed)
+
+
+def import_failed(error):
+    print(f"Error: {str(error)}")
+    messagebox.showwarning("Error", f"Failed to import holdings. Please check the console.")
+
+
+def finish_import(errors):
+    if errors:
+        for line, message in sorted(errors.items()):
+            print(f"Line {line}: {message}")
+        messagebox.showwarning("Import", f"{len(errors)} rows could not be imported. Please check the console.")
+
+    scroll_table("moveto", 1)
+    update_total_dividends_sum()
 
 
 def reset_button_click():
@@ -76,86 +103,136 @@ def reset_button_click():
     end_calendar.set_date(date.today())
     shares_entry.delete(0, tk.END)
     total_sum_label.configure(text="")
-    table.delete(*table.get_children())
+    ledger.clear()
+    scroll_table("moveto", 0)
 
     # Update the total dividends sum
     update_total_dividends_sum()
 
 
 def update_total_dividends_sum():
-    total_sum = defaultdict(float)
-    for item in table.get_children():
-        dividend_total = float(table.item(item)["values"][3].replace("$", ""))
-        currency = table.item(item)["values"][4]
-        total_sum[currency] += dividend_total
-
+    # The ledger keeps running totals, so nothing is re-read from the table
     total_dividends_text = "Total Dividends:"
-    for currency, total in total_sum.items():
+    for currency, total in ledger.currency_totals.items():
         total_dividends_text += f" {total:.2f} {currency}"
     total_sum_label.configure(text=total_dividends_text)
 
 
+def refresh_table():
+    # Only the rows scrolled into view are inserted into the Treeview
+    table.delete(*table.get_children())
+    for ticker, stock_name, start_date, end_date, total, currency, shares in ledger.rows(
+            first_visible_row, first_visible_row + VISIBLE_ROWS):
+        dividend_total = f"${total:.3f}"  # Rounded to 3 decimal places with dollar sign
+        table.insert("", "end", values=(ticker, stock_name, f"{start_date} - {end_date}", dividend_total, currency,
+                                        shares))
+
+    if len(ledger):
+        table_scrollbar.set(first_visible_row / len(ledger), (first_visible_row + VISIBLE_ROWS) / len(ledger))
+    else:
+        table_scrollbar.set(0, 1)
+
+
+def scroll_table(action, amount, unit="units"):
+    # Scrollbar command: ("moveto", fraction) or ("scroll", count, "units" / "pages")
+    global first_visible_row
+    if action == "moveto":
+        first_visible_row = int(float(amount) * len(ledger))
+    elif action == "scroll":
+        first_visible_row += int(amount) * (VISIBLE_ROWS if unit == "pages" else 1)
+    first_visible_row = max(0, min(first_visible_row, len(ledger) - VISIBLE_ROWS))
+    refresh_table()
+
+
+def close_window():
+    # Drop queued lookups so the window closes straight away
+    runner.shutdown()
+    window.destroy()
+
+
 def show_message_box():
     messagebox.showinfo("Message", "Hello, this is a themed message box!")
 
 
-window = tk.Tk()
-window.title("Dividend Calculator")
-window.geometry("1000x750")
+def create_gui():
+    global window, runner, symbol_entry, start_calendar, end_calendar, shares_entry, total_sum_label, table, \
+        table_scrollbar
+
+    window = tk.Tk()
+    window.title("Dividend Calculator")
+    window.geometry("1000x750")
+    window.protocol("WM_DELETE_WINDOW", close_window)
+
+    # Network lookups run here instead of on the Tk event loop
+    runner = BackgroundRunner(window)
+
+    # Create a themed style for the window
+    style = ThemedStyle(window)
+    style.set_theme("equilux")  # Set the theme to "equilux"
+
+    symbol_label = tk.Label(window, text="Stock Symbol:")
+    symbol_label.pack()
+    symbol_entry = tk.Entry(window)
+    symbol_entry.pack()
+    symbol_entry.focus()
+
+    start_label = tk.Label(window, text="Start Date (dd/mm/yyyy):")
+    start_label.pack()
+    start_calendar = DateEntry(window, width=12, background='green',
+                               foreground='white', borderwidth=2, date_pattern='dd/mm/yyyy')
+    start_calendar.pack()
+    start_calendar.set_date(date.today())
+    start_calendar.bind("<<DateEntrySelected>>", lambda event: validate_year(start_calendar))
+
+    end_label = tk.Label(window, text="End Date (dd/mm/yyyy):")
+    end_label.pack()
+    end_calendar = DateEntry(window, width=12, background='green',
+                             foreground='white', borderwidth=2, date_pattern='dd/mm/yyyy')
+    end_calendar.pack()
+    end_calendar.set_date(date.today())
+    end_calendar.bind("<<DateEntrySelected>>", lambda event: validate_year(end_calendar))
 
-# Create a themed style for the window
-style = ThemedStyle(window)
-style.set_theme("equilux")  # Set the theme to "equilux"
+    shares_label = tk.Label(window, text="Number of Shares:")
+    shares_label.pack()
+    shares_entry = tk.Entry(window)
+    shares_entry.pack()
 
-symbol_label = tk.Label(window, text="Stock Symbol:")
-symbol_label.pack()
-symbol_entry = tk.Entry(window)
-symbol_entry.pack()
-symbol_entry.focus()
+    calculate_button = tk.Button(window, text="Calculate", command=calculate_button_click)
+    calculate_button.pack()
 
-start_label = tk.Label(window, text="Start Date (dd/mm/yyyy):")
-start_label.pack()
-start_calendar = DateEntry(window, width=12, background='green',
-                           foreground='white', borderwidth=2, date_pattern='dd/mm/yyyy')
-start_calendar.pack()
-start_calendar.set_date(date.today())
-start_calendar.bind("<<DateEntrySelected>>", lambda event: validate_year(start_calendar))
+    reset_button = tk.Button(window, text="Reset", command=reset_button_click)
+    reset_button.pack()
 
-end_label = tk.Label(window, text="End Date (dd/mm/yyyy):")
-end_label.pack()
-end_calendar = DateEntry(window, width=12, background='green',
-                         foreground='white', borderwidth=2, date_pattern='dd/mm/yyyy')
-end_calendar.pack()
-end_calendar.set_date(date.today())
-end_calendar.bind("<<DateEntrySelected>>", lambda event: validate_year(end_calendar))
+    import_button = tk.Button(window, text="Import CSV", command=import_button_click)
+    import_button.pack()
 
-shares_label = tk.Label(window, text="Number of Shares:")
-shares_label.pack()
-shares_entry = tk.Entry(window)
-shares_entry.pack()
+    total_sum_label = tk.Label(window, text="")
+    total_sum_label.pack()
 
-calculate_button = tk.Button(window, text="Calculate", command=calculate_button_click)
-calculate_button.pack()
+    # Create a table to display dividend data
+    table_frame = ttk.Frame(window)
+    table_frame.pack(pady=20)
 
-reset_button = tk.Button(window, text="Reset", command=reset_button_click)
-reset_button.pack()
+    table_columns = ("Stock Ticker", "Stock Name", "Date Range", "Dividend Total", "Currency", "Number of Shares")
+    table = ttk.Treeview(table_frame, columns=table_columns, show="headings", height=VISIBLE_ROWS)
+    table.pack(side=tk.LEFT)
 
-total_sum_label = tk.Label(window, text="")
-total_sum_label.pack()
+    # The scrollbar moves a window over the ledger instead of scrolling Treeview items
+    table_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=scroll_table)
+    table_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    table.bind("<MouseWheel>", lambda event: scroll_table("scroll", -1 if event.delta > 0 else 1) or "break")
+    table.bind("<Button-4>", lambda event: scroll_table("scroll", -1) or "break")
+    table.bind("<Button-5>", lambda event: scroll_table("scroll", 1) or "break")
 
-# Create a table to display dividend data
-table_frame = ttk.Frame(window)
-table_frame.pack(pady=20)
+    for column in table_columns:
+        table.heading(column, text=column)
+        table.column(column, width=150)
 
-table_columns = ("Stock Ticker", "Stock Name", "Date Range", "Dividend Total", "Currency", "Number of Shares")
-table = ttk.Treeview(table_frame, columns=table_columns, show="headings")
-table.pack()
+    message_box_button = tk.Button(window, text="Show Message Box", command=show_message_box)
+    message_box_button.pack()
 
-for column in table_columns:
-    table.heading(column, text=column)
-    table.column(column, width=150)
+    window.mainloop()
 
-message_box_button = tk.Button(window, text="Show Message Box", command=show_message_box)
-message_box_button.pack()
 
-window.mainloop()
+if __name__ == "__main__":
+    create_gui()
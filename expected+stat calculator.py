@@ -1,53 +1,6 @@
 import tkinter as tk
-from tkinter import messagebox
-import math
-
-def calculate_statistics(probabilities, returns, expected_return):
-    # Calculate variance
-    variance = sum(p * ((r - expected_return) ** 2) for p, r in zip(probabilities, returns))
-    
-    # Calculate standard deviation
-    standard_deviation = math.sqrt(variance)
-    
-    # Calculate coefficient of variation (CV)
-    if expected_return == 0:
-        cv = float('inf')  # Avoid division by zero
-    else:
-        cv = standard_deviation / expected_return
-    
-    return variance, standard_deviation, cv
-
-def solve_missing_values(expected_return, variance, standard_deviation, cv, probabilities, returns):
-    # Check if expected return is missing
-    if expected_return is None:
-        if all(p is not None and r is not None for p, r in zip(probabilities, returns)):
-            expected_return = sum(p * r for p, r in zip(probabilities, returns))
-        else:
-            messagebox.showinfo("Missing Data", "Please provide all required data to calculate the expected return.")
-            return None, None, None, None
-    
-    # Calculate variance if missing
-    if variance is None:
-        if expected_return is not None and all(p is not None and r is not None for p, r in zip(probabilities, returns)):
-            variance, standard_deviation, cv = calculate_statistics(probabilities, returns, expected_return)
-        else:
-            variance, standard_deviation, cv = None, None, None
-    
-    # Calculate standard deviation if missing
-    if standard_deviation is None:
-        if variance is not None:
-            standard_deviation = math.sqrt(variance)
-        else:
-            standard_deviation = None
-    
-    # Calculate CV if missing
-    if cv is None:
-        if expected_return is not None and standard_deviation is not None:
-            cv = standard_deviation / expected_return
-        else:
-            cv = None
-    
-    return expected_return, variance, standard_deviation, cv
+from tkinter import messagebox, filedialog
+from finance_tools.scenarios import calculate_statistics, solve_missing_values, load_scenarios, scenario_statistics
 
 def calculate_expected_return():
     try:
@@ -92,6 +45,7 @@ def calculate_expected_return():
         )
         
         if expected_return is None:
+            messagebox.showinfo("Missing Data", "Please provide all required data to calculate the expected return.")
             return
         
         if missing_prob_index is not None:
@@ -133,6 +87,29 @@ def calculate_expected_return():
     except ValueError as e:
         messagebox.showerror("Input Error", str(e))
 
+def load_scenario_file():
+    path = filedialog.askopenfilename(title="Load Scenarios",
+                                      filetypes=[("Scenario files", "*.csv *.npy *.npz"), ("All files", "*.*")])
+    if not path:
+        return
+
+    try:
+        probabilities, returns = load_scenarios(path)
+        if returns.ndim != 1:
+            raise ValueError("The file holds several scenario sets. Use: python -m finance_tools.scenarios <file>")
+        stats = scenario_statistics(probabilities, returns)
+    except (OSError, KeyError, ValueError) as e:
+        messagebox.showerror("Input Error", str(e))
+        return
+
+    # Display the results; the file is too large for the entry fields, so they are left alone
+    result_label.config(text=f"Expected Return: {stats.expected_return:.4f} ({len(returns)} scenarios from file)")
+    result_formula_label.config(text="Expected Return Formula: Σ [P * R]")
+    variance_label.config(text=f"Variance = Σ [P * (R - ER)²]: {stats.variance:.4f}")
+    std_dev_label.config(text=f"Standard Deviation = √Variance: {stats.standard_deviation:.4f}")
+    cv_label.config(text=f"Coefficient of Variation (CV) = Std Dev / ER: {stats.cv:.4f}")
+    shape_label.config(text=f"Skew: {stats.skew:.4f}   Excess Kurtosis: {stats.kurtosis:.4f}")
+
 def create_entries(n):
     for widget in entry_frame.winfo_children():
         widget.destroy()
@@ -158,44 +135,58 @@ def create_entries(n):
     variance_label.config(text="Variance = Σ [P * (R - ER)²]: ")
     std_dev_label.config(text="Standard Deviation = √Variance: ")
     cv_label.config(text="Coefficient of Variation (CV) = Std Dev / ER: ")
+    shape_label.config(text="")
+
+def create_gui():
+    global entries_num, entries_expected_return, entry_frame, result_label, result_formula_label, \
+        variance_label, std_dev_label, cv_label, shape_label
+
+    root = tk.Tk()
+    root.title("Expected Return Calculator")
+
+    # Number of scenarios
+    tk.Label(root, text="Number of Scenarios:").pack(pady=5)
+    entries_num = tk.Entry(root)
+    entries_num.pack(pady=5)
+
+    # Expected Return
+    tk.Label(root, text="Expected Return (Leave empty to calculate):").pack(pady=5)
+    entries_expected_return = tk.Entry(root)
+    entries_expected_return.pack(pady=5)
 
-root = tk.Tk()
-root.title("Expected Return Calculator")
+    # Button to create input fields
+    tk.Button(root, text="Create Fields", command=lambda: create_entries(int(entries_num.get()))).pack(pady=5)
 
-# Number of scenarios
-tk.Label(root, text="Number of Scenarios:").pack(pady=5)
-entries_num = tk.Entry(root)
-entries_num.pack(pady=5)
+    # Frame to hold return and probability entries
+    entry_frame = tk.Frame(root)
+    entry_frame.pack(pady=10)
 
-# Expected Return
-tk.Label(root, text="Expected Return (Leave empty to calculate):").pack(pady=5)
-entries_expected_return = tk.Entry(root)
-entries_expected_return.pack(pady=5)
+    # Button to calculate expected return and statistics
+    tk.Button(root, text="Calculate", command=calculate_expected_return).pack(pady=5)
 
-# Button to create input fields
-tk.Button(root, text="Create Fields", command=lambda: create_entries(int(entries_num.get()))).pack(pady=5)
+    # Button to calculate statistics for a scenario file (.csv, .npy or .npz)
+    tk.Button(root, text="Load Scenario File", command=load_scenario_file).pack(pady=5)
 
-# Frame to hold return and probability entries
-entry_frame = tk.Frame(root)
-entry_frame.pack(pady=10)
+    # Labels to display results
+    result_label = tk.Label(root, text="Expected Return: ")
+    result_label.pack(pady=5)
 
-# Button to calculate expected return and statistics
-tk.Button(root, text="Calculate", command=calculate_expected_return).pack(pady=5)
+    result_formula_label = tk.Label(root, text="Expected Return Formula: Σ [P * R]")
+    result_formula_label.pack(pady=5)
 
-# Labels to display results
-result_label = tk.Label(root, text="Expected Return: ")
-result_label.pack(pady=5)
+    variance_label = tk.Label(root, text="Variance = Σ [P * (R - ER)²]: ")
+    variance_label.pack(pady=5)
 
-result_formula_label = tk.Label(root, text="Expected Return Formula: Σ [P * R]")
-result_formula_label.pack(pady=5)
+    std_dev_label = tk.Label(root, text="Standard Deviation = √Variance: ")
+    std_dev_label.pack(pady=5)
 
-variance_label = tk.Label(root, text="Variance = Σ [P * (R - ER)²]: ")
-variance_label.pack(pady=5)
+    cv_label = tk.Label(root, text="Coefficient of Variation (CV) = Std Dev / ER: ")
+    cv_label.pack(pady=5)
 
-std_dev_label = tk.Label(root, text="Standard Deviation = √Variance: ")
-std_dev_label.pack(pady=5)
+    shape_label = tk.Label(root, text="")
+    shape_label.pack(pady=5)
 
-cv_label = tk.Label(root, text="Coefficient of Variation (CV) = Std Dev / ER: ")
-cv_label.pack(pady=5)
+    root.mainloop()
 
-root.mainloop()
+if __name__ == "__main__":
+    create_gui()
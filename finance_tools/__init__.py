@@ -0,0 +1,107 @@
+"""
+Computation and data-access helpers shared by the Finance-Tools scripts.
+
+Nothing in this package creates a Tk window, and heavy dependencies (pandas,
+yfinance, matplotlib) are only imported inside the functions that use them, so
+importing the package from a batch job is cheap. The public names below are
+loaded from their submodules on first access.
+"""
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    'MarketDataProvider': 'providers',
+    'YahooProvider': 'providers',
+    'RecordingProvider': 'providers',
+    'ReplayProvider': 'providers',
+    'SyntheticProvider': 'providers',
+    'get_provider': 'providers',
+    'set_provider': 'providers',
+    'PriceStore': 'price_cache',
+    'get_price_store': 'price_cache',
+    'aggregate_bars': 'price_cache',
+    'AGGREGATE_FREQUENCIES': 'price_cache',
+    'fetch_closing_prices': 'prices',
+    'save_to_excel': 'prices',
+    'save_prices': 'prices',
+    'export': 'exporters',
+    'register_exporter': 'exporters',
+    'Exporter': 'exporters',
+    'download_intraday': 'intraday',
+    'fetch_closing_prices_batch': 'batch',
+    'fetch_history_batch': 'batch',
+    'read_tickers': 'batch',
+    'calculate_statistics': 'scenarios',
+    'solve_missing_values': 'scenarios',
+    'ScenarioStatistics': 'scenarios',
+    'scenario_statistics': 'scenarios',
+    'load_scenarios': 'scenarios',
+    'simulate_scenarios': 'simulation',
+    'SimulationResult': 'simulation',
+    'DividendStore': 'dividends',
+    'get_dividend_store': 'dividends',
+    'get_stock_info': 'dividends',
+    'calculate_total_dividends': 'dividends',
+    'DividendLedger': 'ledger',
+    'get_latest_eps': 'eps',
+    'fetch_eps_bulk': 'eps',
+    'EPSCache': 'eps',
+    'DividendCache': 'dividends',
+    'refresh_watchlist': 'refresh',
+    'RateLimiter': 'ratelimit',
+    'RequestScheduler': 'scheduler',
+    'get_scheduler': 'scheduler',
+    'stage': 'instrumentation',
+    'start_profile': 'instrumentation',
+    'stop_profile': 'instrumentation',
+    'WPVF_WINDOW': 'wpvf',
+    'compute_wpvf': 'wpvf',
+    'warmup_start_date': 'wpvf',
+    'wpvf_panel': 'wpvf',
+    'rank_by_wpvf': 'wpvf',
+    'screen_wpvf': 'wpvf',
+    'WPVFUpdater': 'wpvf',
+    'WatchlistWPVF': 'wpvf',
+    'downsample': 'charts',
+    'lttb': 'charts',
+    'minmax_decimate': 'charts',
+    'wpvf_figure': 'charts',
+    'render_wpvf_chart': 'charts',
+    'render_chart_pack': 'charts',
+    'TRADE_TYPES': 'options',
+    'break_even_price': 'options',
+    'break_even_prices': 'options',
+    'payoff_grid': 'options',
+    'strategy_break_evens': 'options',
+    'black_scholes': 'blackscholes',
+    'greeks': 'blackscholes',
+    'implied_volatility': 'blackscholes',
+    'SurfaceCache': 'blackscholes',
+    'get_surface_cache': 'blackscholes',
+    'trailing_eps': 'valuation',
+    'valuation_panels': 'valuation',
+    'screen_valuation': 'valuation',
+    'ValuationPanels': 'valuation',
+    'holding_period': 'portfolio',
+    'position_weight': 'portfolio',
+    'Portfolio': 'portfolio',
+    'PortfolioResult': 'portfolio',
+    'portfolio_returns': 'performance',
+    'link_returns': 'performance',
+    'rolling_returns': 'performance',
+    'portfolio_performance': 'performance',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f'{__name__}.{_EXPORTS[name]}'), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,163 @@
+"""
+Headless batch mode for pulling closing prices for many tickers at once.
+
+Tickers are fetched concurrently through the shared price cache with a bounded
+thread pool, and the closes are aligned into one wide DataFrame (dates x
+tickers). A ticker that fails is reported and left out; it never stops the run.
+
+Command line usage:
+    python -m finance_tools.batch tickers.txt 2015-01-01 2024-01-01 --monthly --output closes.xlsx
+    python -m finance_tools.batch tickers.txt 2000-01-01 2024-01-01 --output closes.parquet --compression zstd
+"""
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from finance_tools.instrumentation import add_arguments, configure
+from finance_tools.price_cache import get_price_store
+
+DEFAULT_WORKERS = 8
+
+
+def read_tickers(path):
+    """
+    Read ticker symbols from a text file.
+
+    Symbols may be separated by newlines, commas or whitespace. Blank lines and
+    lines starting with '#' are ignored, and duplicates are dropped.
+
+    :param path: Path to the ticker file
+    :return: List of upper-case ticker symbols in file order
+    """
+    tickers = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            for ticker in line.replace(',', ' ').split():
+                ticker = ticker.upper()
+                if ticker not in tickers:
+                    tickers.append(ticker)
+    return tickers
+
+
+def fetch_history_batch(tickers, start_date, end_date, interval='1d', fields=('Close',),
+                        max_workers=DEFAULT_WORKERS, store=None):
+    """
+    Fetch price history for many tickers concurrently.
+
+    :param tickers: Iterable of ticker symbols
+    :param start_date: Start date in 'YYYY-MM-DD' format
+    :param end_date: End date in 'YYYY-MM-DD' format
+    :param interval: Data interval ('1d' for daily)
+    :param fields: History columns to return, e.g. ('Close', 'Volume')
+    :param max_workers: Maximum number of tickers fetched at the same time
+    :param store: PriceStore to read through, defaults to the shared store
+    :return: (panels, errors) where panels maps each field to a DataFrame with
+             one column per ticker that succeeded, and errors maps each failed
+             ticker to a message
+    """
+    import pandas as pd
+
+    store = store or get_price_store()
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+
+    def fetch(ticker):
+        data = store.history(ticker, start_date, end_date, interval=interval)
+        if data.empty:
+            raise ValueError("No data available for the given ticker or date range.")
+        return data
+
+    histories = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                histories[ticker] = future.result()
+            except Exception as e:
+                errors[ticker] = str(e)
+
+    # Align everything on one date index, keeping the caller's ticker order
+    ordered = [ticker for ticker in tickers if ticker in histories]
+    panels = {}
+    for field in fields:
+        if ordered:
+            panels[field] = pd.concat([histories[ticker][field] for ticker in ordered],
+                                      axis=1, keys=ordered).sort_index()
+        else:
+            panels[field] = pd.DataFrame()
+    return panels, errors
+
+
+def fetch_closing_prices_batch(tickers, start_date, end_date, interval='1d', monthly=False,
+                               max_workers=DEFAULT_WORKERS, store=None):
+    """
+    Fetch closing prices for many tickers concurrently.
+
+    :param tickers: Iterable of ticker symbols
+    :param start_date: Start date in 'YYYY-MM-DD' format
+    :param end_date: End date in 'YYYY-MM-DD' format
+    :param interval: Data interval ('1d' for daily)
+    :param monthly: If True, return the last trading day of each month
+    :param max_workers: Maximum number of tickers fetched at the same time
+    :param store: PriceStore to read through, defaults to the shared store
+    :return: (closes, errors) where closes is a DataFrame with one column per
+             ticker that succeeded, and errors maps each failed ticker to a message
+    """
+    # Monthly closes of daily data come from the price cache's aggregation pyramid
+    if monthly and interval == '1d':
+        interval, monthly = 'monthly', False
+
+    panels, errors = fetch_history_batch(tickers, start_date, end_date, interval=interval,
+                                         max_workers=max_workers, store=store)
+    wide = panels['Close']
+
+    # If monthly, get the last trading day of each month
+    if monthly and not wide.empty:
+        wide = wide.resample('M').last()
+
+    return wide, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch closing prices for a list of tickers.")
+    parser.add_argument('tickers', help="File with ticker symbols (one per line or comma separated)")
+    parser.add_argument('start_date', help="Start date (YYYY-MM-DD)")
+    parser.add_argument('end_date', help="End date (YYYY-MM-DD)")
+    parser.add_argument('--monthly', action='store_true', help="Keep the last trading day of each month")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Concurrent downloads")
+    parser.add_argument('--output', help="Write the closes to this .csv, .parquet, .feather or .xlsx file")
+    parser.add_argument('--compression', help="Compression for --output (e.g. zstd for .parquet, gzip for .csv)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    configure(args)
+
+    # Reject an unknown output format or codec before downloading anything
+    if args.output:
+        from finance_tools.exporters import get_exporter
+
+        try:
+            get_exporter(args.output, compression=args.compression)
+        except ValueError as e:
+            parser.error(str(e))
+
+    tickers = read_tickers(args.tickers)
+    closes, errors = fetch_closing_prices_batch(tickers, args.start_date, args.end_date,
+                                                monthly=args.monthly, max_workers=args.workers)
+
+    for ticker, message in sorted(errors.items()):
+        print(f"{ticker}: {message}", file=sys.stderr)
+    print(f"Fetched {closes.shape[1]} of {len(tickers)} tickers, {len(closes)} rows.")
+
+    if args.output:
+        from finance_tools.exporters import export
+
+        export(closes, args.output, compression=args.compression, sheet_name='Closing Prices')
+        print(f"Data saved to {args.output}")
+
+    return 1 if errors and closes.empty else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
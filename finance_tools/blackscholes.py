@@ -0,0 +1,329 @@
+"""
+Black-Scholes prices, Greeks and implied volatility for whole option chains.
+
+Every function takes NumPy arrays (or scalars) that broadcast against each
+other, so a chain of 100k+ contracts is priced in one call. implied_volatility
+solves all contracts together with a safeguarded Newton iteration: a Newton
+step on vega is taken when it stays inside the contract's volatility bracket,
+and a bisection step otherwise, so every contract with an attainable price
+converges. SurfaceCache keeps solved chains per (underlying, expiry) so a
+repeat query is free and a refresh only solves the contracts that changed.
+
+Time is in years, rates and dividend yields are continuously compounded and
+volatility is annualised. scipy is used for the normal distribution when it is
+installed; otherwise math.erfc is applied element by element, which is slower.
+"""
+import math
+import threading
+from collections import namedtuple
+
+MIN_VOLATILITY = 1e-6
+MAX_VOLATILITY = 10.0  # 1000% a year; prices needing more are reported as out of bounds
+DEFAULT_TOLERANCE = 1e-8  # volatility error accepted
+DEFAULT_MAX_ITERATIONS = 100
+
+Greeks = namedtuple('Greeks', ['price', 'delta', 'gamma', 'vega', 'theta', 'rho'])
+
+ConvergenceReport = namedtuple('ConvergenceReport', ['contracts', 'converged', 'out_of_bounds', 'not_converged',
+                                                     'cached', 'iterations', 'newton_steps', 'bisection_steps',
+                                                     'max_price_error'])
+
+
+def _norm_cdf(x):
+    import numpy as np
+
+    try:
+        from scipy.special import ndtr
+    except ImportError:
+        erfc = np.frompyfunc(math.erfc, 1, 1)
+        return 0.5 * erfc(-np.asarray(x, dtype=float) / math.sqrt(2)).astype(float)
+    return ndtr(x)
+
+
+def _norm_pdf(x):
+    import numpy as np
+
+    return np.exp(-0.5 * x * x) / math.sqrt(2 * math.pi)
+
+
+def _d1_d2(spot, strike, time, rate, volatility, dividend_yield):
+    import numpy as np
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root_time = np.sqrt(time)
+        d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * volatility ** 2) * time) / (volatility * root_time)
+    return d1, d1 - volatility * root_time, root_time
+
+
+def black_scholes(spot, strike, time, rate, volatility, is_call=True, dividend_yield=0.0):
+    """
+    Black-Scholes price of European options.
+
+    :param spot: Underlying price
+    :param strike: Strike price
+    :param time: Time to expiry in years
+    :param rate: Risk-free rate
+    :param volatility: Volatility of the underlying
+    :param is_call: True for calls, False for puts
+    :param dividend_yield: Continuous dividend yield of the underlying
+    :return: Array of option prices (NaN where time or volatility is not positive)
+    """
+    import numpy as np
+
+    spot, strike, time, rate, volatility, is_call, dividend_yield = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (spot, strike, time, rate, volatility)),
+        np.asarray(is_call, dtype=bool), np.asarray(dividend_yield, dtype=float))
+    d1, d2, _ = _d1_d2(spot, strike, time, rate, volatility, dividend_yield)
+    forward_spot = spot * np.exp(-dividend_yield * time)
+    discounted_strike = strike * np.exp(-rate * time)
+    # A put is a call on the mirrored distribution: flip the signs of d1 and d2
+    sign = np.where(is_call, 1.0, -1.0)
+    return sign * (forward_spot * _norm_cdf(sign * d1) - discounted_strike * _norm_cdf(sign * d2))
+
+
+def greeks(spot, strike, time, rate, volatility, is_call=True, dividend_yield=0.0):
+    """
+    Black-Scholes price and Greeks of European options.
+
+    Arguments as for black_scholes. Vega and rho are per 1.0 (100 percentage
+    points) of volatility and rate, and theta is per year.
+
+    :return: Greeks namedtuple of arrays (price, delta, gamma, vega, theta, rho)
+    """
+    import numpy as np
+
+    spot, strike, time, rate, volatility, is_call, dividend_yield = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (spot, strike, time, rate, volatility)),
+        np.asarray(is_call, dtype=bool), np.asarray(dividend_yield, dtype=float))
+    d1, d2, root_time = _d1_d2(spot, strike, time, rate, volatility, dividend_yield)
+    sign = np.where(is_call, 1.0, -1.0)
+    spot_discount = np.exp(-dividend_yield * time)
+    strike_discount = np.exp(-rate * time)
+    cdf_d1 = _norm_cdf(sign * d1)
+    cdf_d2 = _norm_cdf(sign * d2)
+    density = _norm_pdf(d1)
+
+    price = sign * (spot * spot_discount * cdf_d1 - strike * strike_discount * cdf_d2)
+    delta = sign * spot_discount * cdf_d1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gamma = spot_discount * density / (spot * volatility * root_time)
+        theta = (-spot * spot_discount * density * volatility / (2 * root_time)
+                 - sign * rate * strike * strike_discount * cdf_d2
+                 + sign * dividend_yield * spot * spot_discount * cdf_d1)
+    vega = spot * spot_discount * density * root_time
+    rho = sign * strike * time * strike_discount * cdf_d2
+    return Greeks(price, delta, gamma, vega, theta, rho)
+
+
+def implied_volatility(price, spot, strike, time, rate, is_call=True, dividend_yield=0.0, initial=None,
+                       tolerance=DEFAULT_TOLERANCE, max_iterations=DEFAULT_MAX_ITERATIONS):
+    """
+    Implied volatility of European options, solved for every contract at once.
+
+    Each contract is solved with Newton's method on vega, falling back to a
+    bisection step of its volatility bracket whenever the Newton step would
+    leave the bracket or does not at least halve the previous step.
+
+    Deep in-the-money contracts whose time value is lost in floating-point
+    rounding get whichever volatility reproduces their price, which may be far
+    from the one used to create it.
+
+    :param price: Observed option price
+    :param spot: Underlying price
+    :param strike: Strike price
+    :param time: Time to expiry in years
+    :param rate: Risk-free rate
+    :param is_call: True for calls, False for puts
+    :param dividend_yield: Continuous dividend yield of the underlying
+    :param initial: Starting volatilities, e.g. from a previous solve; a
+                    guess from moneyness is used where None or NaN
+    :param tolerance: Volatility error accepted: a contract is done once its
+                      Newton step (price error over vega) is this small
+    :param max_iterations: Iteration limit shared by all contracts
+    :return: (volatility, report) where volatility is an array (NaN where the
+             price is outside the no-arbitrage bounds or did not converge) and
+             report is a ConvergenceReport
+    """
+    volatility, report, _ = _solve_implied_volatility(price, spot, strike, time, rate, is_call, dividend_yield,
+                                                      initial, tolerance, max_iterations)
+    return volatility, report
+
+
+def _solve_implied_volatility(price, spot, strike, time, rate, is_call=True, dividend_yield=0.0, initial=None,
+                              tolerance=DEFAULT_TOLERANCE, max_iterations=DEFAULT_MAX_ITERATIONS):
+    """implied_volatility, also returning which contracts have a price inside the no-arbitrage bounds."""
+    import numpy as np
+
+    price, spot, strike, time, rate, is_call, dividend_yield = (np.array(array) for array in np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in (price, spot, strike, time, rate)),
+        np.asarray(is_call, dtype=bool), np.asarray(dividend_yield, dtype=float)))
+    shape = price.shape
+    price, spot, strike, time, rate, is_call, dividend_yield = (array.ravel() for array in (
+        price, spot, strike, time, rate, is_call, dividend_yield))
+    count = price.size
+
+    # Prices outside (intrinsic value, upper bound) have no volatility that matches them
+    forward_spot = spot * np.exp(-dividend_yield * time)
+    discounted_strike = strike * np.exp(-rate * time)
+    lower = np.where(is_call, np.maximum(forward_spot - discounted_strike, 0.0),
+                     np.maximum(discounted_strike - forward_spot, 0.0))
+    upper = np.where(is_call, forward_spot, discounted_strike)
+    solvable = (price > lower) & (price < upper) & (time > 0) & np.isfinite(price)
+
+    volatility = np.full(count, np.nan)
+    low = np.full(count, MIN_VOLATILITY)
+    high = np.full(count, MAX_VOLATILITY)
+    solvable &= black_scholes(spot, strike, time, rate, MAX_VOLATILITY, is_call, dividend_yield) > price
+
+    # Start from the given guesses, else from the Manaster-Koehler point where vega is largest
+    with np.errstate(divide='ignore', invalid='ignore'):
+        guess = np.sqrt(2 * np.abs(np.log(spot / strike) + (rate - dividend_yield) * time) / time)
+    if initial is not None:
+        given = np.broadcast_to(np.asarray(initial, dtype=float), shape).ravel()
+        guess = np.where(np.isfinite(given), given, guess)
+    guess = np.clip(np.nan_to_num(guess, nan=0.2), 0.01, 5.0)
+
+    active = np.nonzero(solvable)[0]
+    sigma = guess[active]
+    last_step = high[active] - low[active]
+    iterations = newton_steps = bisection_steps = 0
+    max_error = 0.0
+    converged = np.zeros(count, dtype=bool)
+    while active.size and iterations < max_iterations:
+        iterations += 1
+        values = greeks(spot[active], strike[active], time[active], rate[active], sigma, is_call[active],
+                        dividend_yield[active])
+        error = values.price - price[active]
+        done = np.abs(error) <= tolerance * values.vega
+        converged[active[done]] = True
+        volatility[active[done]] = sigma[done]
+        if done.any():
+            max_error = max(max_error, float(np.abs(error[done]).max()))
+
+        # Price rises with volatility, so the sign of the error tightens the bracket
+        keep = ~done
+        active, sigma, error, vega, last_step = (active[keep], sigma[keep], error[keep], values.vega[keep],
+                                                 last_step[keep])
+        above = error > 0
+        high[active[above]] = sigma[above]
+        low[active[~above]] = sigma[~above]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = sigma - error / vega
+        # Newton only while it lands inside the bracket and at least halves the previous step
+        newton = (np.isfinite(step) & (step > low[active]) & (step < high[active])
+                  & (np.abs(step - sigma) < 0.5 * last_step))
+        next_sigma = np.where(newton, step, 0.5 * (low[active] + high[active]))
+        last_step = np.abs(next_sigma - sigma)
+        sigma = next_sigma
+        newton_steps += int(newton.sum())
+        bisection_steps += int((~newton).sum())
+
+        # A bracket narrower than rounding cannot improve any further
+        stalled = high[active] - low[active] <= 1e-15 * high[active]
+        if stalled.any():
+            stuck = active[stalled]
+            converged[stuck] = True
+            volatility[stuck] = sigma[stalled]
+            error = black_scholes(spot[stuck], strike[stuck], time[stuck], rate[stuck], sigma[stalled],
+                                  is_call[stuck], dividend_yield[stuck]) - price[stuck]
+            max_error = max(max_error, float(np.abs(error).max()))
+        active, sigma, last_step = active[~stalled], sigma[~stalled], last_step[~stalled]
+
+    report = ConvergenceReport(contracts=count, converged=int(converged.sum()), out_of_bounds=int((~solvable).sum()),
+                               not_converged=int(active.size), cached=0, iterations=iterations,
+                               newton_steps=newton_steps, bisection_steps=bisection_steps,
+                               max_price_error=max_error)
+    return volatility.reshape(shape), report, solvable.reshape(shape)
+
+
+class SurfaceCache:
+    """
+    Solved implied volatilities kept per (underlying, expiry) surface.
+
+    A query with exactly the inputs of the previous one for that surface is
+    answered from the cache. When a refreshed chain has the same contracts
+    (strikes and call/put flags in the same order), only contracts whose
+    price, spot, time, rate or dividend yield changed are solved again,
+    starting from their previous volatility.
+    """
+
+    def __init__(self):
+        self._surfaces = {}
+        self._lock = threading.Lock()
+
+    def implied_volatility(self, underlying, expiry, price, spot, strike, time, rate, is_call=True,
+                           dividend_yield=0.0, **solver_options):
+        """
+        Implied volatility of one surface's chain, reusing earlier solves.
+
+        :param underlying: Underlying ticker symbol
+        :param expiry: Expiry date of the chain
+        :param solver_options: tolerance and max_iterations for implied_volatility
+        :return: (volatility, report) as from implied_volatility; report.cached
+                 counts the contracts answered from the cache, which are also
+                 counted as converged, out of bounds or not converged by how
+                 their solve ended
+        """
+        import numpy as np
+
+        key = (underlying.upper(), str(expiry))
+        inputs = np.column_stack([array.ravel().astype(float) for array in np.broadcast_arrays(
+            *(np.asarray(value, dtype=float) for value in (price, spot, strike, time, rate, dividend_yield)),
+            np.asarray(is_call, dtype=bool))])
+        shape = np.broadcast_shapes(*(np.shape(value) for value in (price, spot, strike, time, rate,
+                                                                     dividend_yield, is_call)))
+        with self._lock:
+            previous = self._surfaces.get(key)
+
+        volatility = np.full(len(inputs), np.nan)
+        solvable = np.zeros(len(inputs), dtype=bool)
+        changed = np.ones(len(inputs), dtype=bool)
+        if previous is not None and previous[0].shape == inputs.shape and \
+                np.array_equal(previous[0][:, [2, 6]], inputs[:, [2, 6]]):
+            # Same contracts: keep every row whose inputs are unchanged (NaN prices compare equal)
+            same = (previous[0] == inputs) | (np.isnan(previous[0]) & np.isnan(inputs))
+            changed = ~same.all(axis=1)
+            volatility[~changed] = previous[1][~changed]
+            solvable[~changed] = previous[2][~changed]
+
+        initial = previous[1] if previous is not None and not changed.all() else None
+        rows = inputs[changed]
+        solved, report, solved_bounds = _solve_implied_volatility(
+            rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4], rows[:, 6].astype(bool), rows[:, 5],
+            initial=initial[changed] if initial is not None else None, **solver_options)
+        volatility[changed] = solved
+        solvable[changed] = solved_bounds
+        with self._lock:
+            self._surfaces[key] = (inputs, volatility, solvable)
+
+        # Cached contracts keep the outcome of their solve: a volatility if it converged, else NaN
+        cached = ~changed
+        cached_converged = int(np.isfinite(volatility[cached]).sum())
+        cached_out_of_bounds = int((~solvable[cached]).sum())
+        report = report._replace(contracts=len(inputs), cached=int(cached.sum()),
+                                 converged=report.converged + cached_converged,
+                                 out_of_bounds=report.out_of_bounds + cached_out_of_bounds,
+                                 not_converged=report.not_converged + int(cached.sum()) - cached_converged
+                                 - cached_out_of_bounds)
+        return volatility.reshape(shape), report
+
+    def invalidate(self, underlying=None, expiry=None):
+        """Forget cached surfaces, all of them if no underlying is given."""
+        with self._lock:
+            for key in list(self._surfaces):
+                if (underlying is None or key[0] == underlying.upper()) and (expiry is None or key[1] == str(expiry)):
+                    del self._surfaces[key]
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_surface_cache():
+    """Return the surface cache shared by every tool in this process."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SurfaceCache()
+        return _default_cache
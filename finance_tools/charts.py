@@ -0,0 +1,336 @@
+"""
+Price and WPVF charts for the MF rule program and the morning chart pack.
+
+Long histories are downsampled before they reach matplotlib. min/max
+decimation keeps the lowest and highest point of every bucket, so the drawn
+envelope matches the full series at screen resolution. LTTB (largest triangle
+three buckets) keeps the points that best preserve the line's shape. In the
+interactive window the visible range is downsampled again whenever the view is
+zoomed or panned, so detail appears as you zoom in.
+
+render_chart_pack draws the charts of many tickers to PNG or PDF files on
+matplotlib's Agg backend (no window, no pyplot) across a process pool.
+
+Command line usage:
+    python -m finance_tools.charts tickers.txt 2015-01-01 2025-01-01 --output-dir charts --format pdf
+"""
+import argparse
+import os
+import re
+import sys
+
+from finance_tools.instrumentation import add_arguments, configure, stage
+from finance_tools.wpvf import WPVF_WINDOW, compute_wpvf, warmup_start_date
+
+DEFAULT_MAX_POINTS = 4000  # About two points per pixel of a full-screen chart
+DOWNSAMPLE_METHODS = ('minmax', 'lttb')
+CHART_FORMATS = ('png', 'pdf')
+MIN_POINTS = {'minmax': 4, 'lttb': 3}  # The first and last point plus one bucket
+
+
+def _check_max_points(max_points, method):
+    if max_points < MIN_POINTS[method]:
+        raise ValueError(f"{method} downsampling needs max_points of at least {MIN_POINTS[method]}.")
+
+
+def minmax_decimate(y, max_points):
+    """
+    Indices of the minimum and maximum of each of max_points // 2 equal buckets.
+
+    :param y: 1-D array of values
+    :param max_points: Maximum number of indices to return (at least 4)
+    :return: Sorted array of indices into y, always including the first and last point
+    :raises ValueError: If max_points is below 4
+    """
+    import numpy as np
+
+    _check_max_points(max_points, 'minmax')
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    # Pad to whole buckets; padding can never be a minimum or maximum
+    buckets = (max_points - 2) // 2
+    size = -(-n // buckets)
+    low = np.full(buckets * size, np.inf)
+    high = np.full(buckets * size, -np.inf)
+    finite = np.isfinite(y)
+    low[:n] = np.where(finite, y, np.inf)
+    high[:n] = np.where(finite, y, -np.inf)
+
+    starts = np.arange(buckets) * size
+    indices = np.concatenate(([0, n - 1], starts + low.reshape(buckets, size).argmin(axis=1),
+                              starts + high.reshape(buckets, size).argmax(axis=1)))
+    return np.unique(indices[indices < n])
+
+
+def lttb(x, y, max_points):
+    """
+    Largest-triangle-three-buckets downsampling.
+
+    :param x: 1-D array of increasing x values (e.g. date numbers)
+    :param y: 1-D array of values
+    :param max_points: Number of points to keep (at least 3)
+    :return: Sorted array of indices into x and y, including the first and last point
+    :raises ValueError: If max_points is below 3
+    """
+    import numpy as np
+
+    _check_max_points(max_points, 'lttb')
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    # Bucket i (1..max_points-2) covers points bounds[i-1]..bounds[i]; the first and last point are kept
+    bounds = np.arange(max_points - 1, dtype=np.int64) * (n - 2) // (max_points - 2) + 1
+    counts = np.diff(bounds)
+    avg_x = np.add.reduceat(x[:n - 1], bounds[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], bounds[:-1]) / counts
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    # Each bucket keeps the point forming the largest triangle with the previous pick and the next bucket's mean
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, stop = bounds[i], bounds[i + 1]
+        area = np.abs((x[a] - avg_x[i]) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y[i] - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def downsample(x, y, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """
+    Indices of the points to draw for a line chart.
+
+    Missing values are left out before downsampling, so they never hide a
+    bucket's real minimum, maximum or shape.
+
+    :param x: 1-D array of increasing x values
+    :param y: 1-D array of values
+    :param max_points: Maximum number of points to keep, at least MIN_POINTS[method]
+    :param method: 'minmax' or 'lttb'
+    :return: Sorted array of indices into x and y
+    """
+    import numpy as np
+
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Use one of: " + ", ".join(DOWNSAMPLE_METHODS))
+
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(np.isfinite(y))
+    if method == 'lttb':
+        return valid[lttb(np.asarray(x, dtype=float)[valid], y[valid], max_points)]
+    return valid[minmax_decimate(y[valid], max_points)]
+
+
+def _plot_downsampled(ax, x, y, max_points, method, dynamic, **kwargs):
+    """Plot a downsampled line; if dynamic, downsample the visible range again on every zoom or pan."""
+    import numpy as np
+
+    shown = downsample(x, y, max_points, method)
+    line, = ax.plot(x[shown], y[shown], **kwargs)
+
+    if dynamic:
+        def update(axes):
+            low, high = axes.get_xlim()
+            start = max(int(np.searchsorted(x, low)) - 1, 0)
+            stop = min(int(np.searchsorted(x, high)) + 1, len(x))
+            visible = start + downsample(x[start:stop], y[start:stop], max_points, method)
+            line.set_data(x[visible], y[visible])
+
+        ax.callbacks.connect('xlim_changed', update)
+    return line
+
+
+def wpvf_figure(ticker, stock_data, figure=None, max_points=DEFAULT_MAX_POINTS, method='minmax', dynamic=False):
+    """
+    Draw the closing price and WPVF charts of one ticker.
+
+    :param ticker: Ticker symbol for the titles
+    :param stock_data: DataFrame with a DatetimeIndex and 'Close' and 'WPVF' columns
+    :param figure: matplotlib Figure to draw on; a new off-screen Figure if None
+    :param max_points: Maximum number of points drawn per line
+    :param method: Downsampling method, 'minmax' or 'lttb'
+    :param dynamic: Re-downsample the visible range when the view changes (interactive windows)
+    :return: The Figure
+    """
+    import matplotlib.dates as mdates
+
+    if figure is None:
+        from matplotlib.figure import Figure
+
+        figure = Figure(figsize=(10, 8))
+
+    # Create two subplots: one for closing price and one for WPVF
+    ax1, ax2 = figure.subplots(2, 1, sharex=True)
+    x = mdates.date2num(stock_data.index)
+
+    # Plot Closing Prices in the first subplot
+    ax1.set_title(f"{ticker.upper()} Closing Prices")
+    ax1.set_ylabel('Closing Price')
+    _plot_downsampled(ax1, x, stock_data['Close'].to_numpy(dtype=float), max_points, method, dynamic,
+                      color='tab:blue', label='Close Price')
+    ax1.grid(True)
+
+    # Plot WPVF in the second subplot
+    ax2.set_title(f"{ticker.upper()} WPVF (Weighted Price Volume Flow)")
+    ax2.set_ylabel('WPVF')
+    _plot_downsampled(ax2, x, stock_data['WPVF'].to_numpy(dtype=float), max_points, method, dynamic,
+                      color='tab:red', label='WPVF')
+    ax2.grid(True)
+
+    # Set x-axis label for the bottom graph
+    ax2.xaxis_date()
+    ax2.set_xlabel('Date')
+
+    figure.tight_layout()
+    return figure
+
+
+def render_wpvf_chart(ticker, stock_data, path, dpi=100, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """
+    Render one ticker's price and WPVF chart to a file without opening a window.
+
+    :param ticker: Ticker symbol for the titles
+    :param stock_data: DataFrame with a DatetimeIndex and 'Close' and 'WPVF' columns
+    :param path: Output file; .png or .pdf
+    :param dpi: Resolution of PNG output
+    :param max_points: Maximum number of points drawn per line
+    :param method: Downsampling method, 'minmax' or 'lttb'
+    :return: path
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    with stage('chart.draw', ticker=ticker, rows=len(stock_data)):
+        figure = wpvf_figure(ticker, stock_data, max_points=max_points, method=method)
+    FigureCanvasAgg(figure)
+    with stage('chart.save', ticker=ticker, path=path) as s:
+        figure.savefig(path, dpi=dpi)
+        s.update(bytes=os.path.getsize(path))
+    return path
+
+
+def _render_job(ticker, close, volume, start_date, path, window, dpi, max_points, method):
+    """Compute WPVF for one ticker and render its chart. Runs in a worker process."""
+    import pandas as pd
+
+    # Each ticker keeps only its own trading days from the aligned panel
+    stock_data = pd.DataFrame({'Close': close, 'Volume': volume}).dropna()
+    stock_data = compute_wpvf(stock_data, window=window).loc[start_date:]
+    if stock_data.empty:
+        raise ValueError("No data available for the given ticker or date range.")
+    return render_wpvf_chart(ticker, stock_data, path, dpi=dpi, max_points=max_points, method=method)
+
+
+def chart_filename(ticker, file_format='png'):
+    """File name of a ticker's chart in a chart pack, e.g. '^GSPC_wpvf.png'."""
+    return f"{re.sub(r'[^A-Za-z0-9^._-]', '_', ticker)}_wpvf.{file_format}"
+
+
+def render_chart_pack(tickers, start_date, end_date, output_dir, file_format='png', window=WPVF_WINDOW,
+                      max_workers=None, fetch_workers=None, store=None, dpi=100,
+                      max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """
+    Render price and WPVF charts for many tickers into a directory.
+
+    Prices are fetched concurrently through the price cache, then the charts
+    are drawn in parallel worker processes.
+
+    :param tickers: Iterable of ticker symbols
+    :param start_date: Start date in 'YYYY-MM-DD' format
+    :param end_date: End date in 'YYYY-MM-DD' format
+    :param output_dir: Directory for the chart files (created if missing)
+    :param file_format: 'png' or 'pdf'
+    :param window: Number of bars in the WPVF rolling volume sum
+    :param max_workers: Rendering processes, defaults to the number of CPUs; 1 renders in this process
+    :param fetch_workers: Concurrent downloads, defaults to the batch module default
+    :param store: PriceStore to read through, defaults to the shared store
+    :param dpi: Resolution of PNG output
+    :param max_points: Maximum number of points drawn per line
+    :param method: Downsampling method, 'minmax' or 'lttb'
+    :return: (paths, errors) where paths maps each rendered ticker to its file,
+             in ticker order, and errors maps each failed ticker to a message.
+             A ticker whose file name is already taken by an earlier ticker
+             (e.g. 'C/D' after 'C_D') is not rendered and is reported as an error.
+    """
+    from finance_tools.batch import DEFAULT_WORKERS, fetch_history_batch
+
+    if file_format not in CHART_FORMATS:
+        raise ValueError(f"Unknown chart format '{file_format}'. Use one of: " + ", ".join(CHART_FORMATS))
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Use one of: " + ", ".join(DOWNSAMPLE_METHODS))
+    _check_max_points(max_points, method)
+
+    panels, errors = fetch_history_batch(tickers, warmup_start_date(start_date, window), end_date,
+                                         fields=('Close', 'Volume'),
+                                         max_workers=fetch_workers or DEFAULT_WORKERS, store=store)
+    os.makedirs(output_dir, exist_ok=True)
+    jobs, owners = {}, {}
+    for ticker in panels['Close'].columns:
+        filename = chart_filename(ticker, file_format)
+        # Compared without case, as the file systems of Windows and macOS do
+        owner = owners.setdefault(filename.lower(), ticker)
+        if owner != ticker:
+            errors[ticker] = f"Chart file {filename} is already used by {owner}."
+            continue
+        jobs[ticker] = (ticker, panels['Close'][ticker], panels['Volume'][ticker], start_date,
+                        os.path.join(output_dir, filename), window, dpi, max_points, method)
+
+    paths = {}
+    if max_workers == 1 or len(jobs) <= 1:
+        for ticker, job in jobs.items():
+            try:
+                paths[ticker] = _render_job(*job)
+            except Exception as e:
+                errors[ticker] = str(e)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {ticker: pool.submit(_render_job, *job) for ticker, job in jobs.items()}
+            for ticker, future in futures.items():
+                try:
+                    paths[ticker] = future.result()
+                except Exception as e:
+                    errors[ticker] = str(e)
+    return paths, errors
+
+
+def main(argv=None):
+    from finance_tools.batch import DEFAULT_WORKERS, read_tickers
+
+    parser = argparse.ArgumentParser(description="Render price and WPVF charts for a list of tickers.")
+    parser.add_argument('tickers', help="File with ticker symbols (one per line or comma separated)")
+    parser.add_argument('start_date', help="Start date (YYYY-MM-DD)")
+    parser.add_argument('end_date', help="End date (YYYY-MM-DD)")
+    parser.add_argument('--output-dir', default='charts', help="Directory for the chart files")
+    parser.add_argument('--format', dest='file_format', choices=CHART_FORMATS, default='png', help="Chart file format")
+    parser.add_argument('--workers', type=int, help="Rendering processes (default: number of CPUs)")
+    parser.add_argument('--fetch-workers', type=int, default=DEFAULT_WORKERS, help="Concurrent downloads")
+    parser.add_argument('--dpi', type=int, default=100, help="Resolution of PNG charts")
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS, help="Points drawn per line")
+    parser.add_argument('--method', choices=DOWNSAMPLE_METHODS, default='minmax', help="Downsampling method")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    configure(args)
+
+    tickers = read_tickers(args.tickers)
+    paths, errors = render_chart_pack(tickers, args.start_date, args.end_date, args.output_dir,
+                                      file_format=args.file_format, max_workers=args.workers,
+                                      fetch_workers=args.fetch_workers, dpi=args.dpi,
+                                      max_points=args.max_points, method=args.method)
+
+    for ticker, message in sorted(errors.items()):
+        print(f"{ticker}: {message}", file=sys.stderr)
+    print(f"Rendered {len(paths)} of {len(tickers)} charts to {args.output_dir}")
+    return 1 if errors and not paths else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""
+Stock information and dividend totals used by the dividend calculator.
+
+Lookups go through a DividendStore, which keeps each symbol's info and dividend
+history in memory for a limited time and precomputes cumulative sums of the
+dividends. A date-range total is then two binary searches and a subtraction,
+with no network call.
+
+The shared store reads through a DividendCache on disk, which the watchlist
+refresh (finance_tools.refresh) keeps warm, so the calculator does not wait for
+the network for symbols fetched recently by any process.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from finance_tools.instrumentation import stage
+from finance_tools.price_cache import data_dir
+
+DEFAULT_TTL = 6 * 60 * 60  # seconds before a symbol is fetched again
+DEFAULT_DISK_TTL = 24 * 60 * 60  # seconds a symbol is served from the disk cache
+
+_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS info (ticker TEXT PRIMARY KEY, info TEXT NOT NULL, fetched_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS dividends (ticker TEXT NOT NULL, date TEXT NOT NULL, amount REAL NOT NULL,
+                                      PRIMARY KEY (ticker, date));
+CREATE TABLE IF NOT EXISTS dividend_fetches (ticker TEXT PRIMARY KEY, fetched_at REAL NOT NULL);
+"""
+
+
+class DividendCache:
+    """
+    SQLite cache of stock info and dividend histories with a TTL.
+
+    :param path: Database file, defaults to dividends.sqlite in data_dir()
+    :param ttl: Seconds an entry is served before it expires
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_DISK_TTL, clock=time.time):
+        self.path = path or os.path.join(data_dir(), 'dividends.sqlite')
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock:
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                with conn:
+                    conn.executescript(_CACHE_SCHEMA)
+            finally:
+                conn.close()
+
+    def _fresh(self, fetched_at):
+        return fetched_at is not None and self.clock() - fetched_at <= self.ttl
+
+    def get_info(self, ticker):
+        """
+        :return: (info, fetched_at) for a fresh entry, or None if missing or expired
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            row = conn.execute('SELECT info, fetched_at FROM info WHERE ticker = ?', (ticker.upper(),)).fetchone()
+        finally:
+            conn.close()
+        if row is None or not self._fresh(row[1]):
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put_info(self, ticker, info, fetched_at=None):
+        fetched_at = self.clock() if fetched_at is None else fetched_at
+        with self._lock:
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                with conn:
+                    conn.execute('INSERT OR REPLACE INTO info (ticker, info, fetched_at) VALUES (?, ?, ?)',
+                                 (ticker.upper(), json.dumps(info, default=str), fetched_at))
+            finally:
+                conn.close()
+        return fetched_at
+
+    def get_dividends(self, ticker):
+        """
+        :return: (dividends, fetched_at) for a fresh entry, with dividends a Series indexed
+                 by timezone-naive payment date, or None if missing or expired
+        """
+        import pandas as pd
+
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            fetched = conn.execute('SELECT fetched_at FROM dividend_fetches WHERE ticker = ?',
+                                   (ticker.upper(),)).fetchone()
+            if fetched is None or not self._fresh(fetched[0]):
+                return None
+            rows = conn.execute('SELECT date, amount FROM dividends WHERE ticker = ? ORDER BY date',
+                                (ticker.upper(),)).fetchall()
+        finally:
+            conn.close()
+        index = pd.DatetimeIndex(pd.to_datetime([row[0] for row in rows], format='%Y-%m-%d'), name='Date')
+        return pd.Series([row[1] for row in rows], index=index, name='Dividends', dtype=float), fetched[0]
+
+    def put_dividends(self, ticker, dividends, fetched_at=None):
+        """
+        Replace the stored dividend history of a ticker.
+
+        :param dividends: Series of amounts indexed by payment date
+        :return: Number of payments added or changed since the stored history
+        """
+        ticker = ticker.upper()
+        fetched_at = self.clock() if fetched_at is None else fetched_at
+        index = dividends.index
+        if getattr(index, 'tz', None) is not None:
+            index = index.tz_localize(None)
+        new = dict(zip(index.strftime('%Y-%m-%d'), dividends.to_numpy(dtype=float).tolist()))
+
+        with self._lock:
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                with conn:
+                    old = dict(conn.execute('SELECT date, amount FROM dividends WHERE ticker = ?', (ticker,)))
+                    changed = [(ticker, day, amount) for day, amount in new.items() if old.get(day) != amount]
+                    removed = [(ticker, day) for day in old if day not in new]
+                    conn.executemany('INSERT OR REPLACE INTO dividends (ticker, date, amount) VALUES (?, ?, ?)',
+                                     changed)
+                    conn.executemany('DELETE FROM dividends WHERE ticker = ? AND date = ?', removed)
+                    conn.execute('INSERT OR REPLACE INTO dividend_fetches (ticker, fetched_at) VALUES (?, ?)',
+                                 (ticker, fetched_at))
+            finally:
+                conn.close()
+        return len(changed)
+
+
+class _DividendEntry:
+    """Cached data for one symbol."""
+
+    def __init__(self, fetched_at):
+        self.fetched_at = fetched_at
+        self.lock = threading.Lock()  # held while this symbol is being fetched
+        self.info = None
+        self.dividends = None
+        self.dates = None       # datetime64[D] payment dates, sorted
+        self.cumulative = None  # cumulative[i] = sum of the first i dividends
+
+
+class DividendStore:
+    """
+    Memoizes stock info and dividend history per symbol with a TTL.
+
+    :param ttl: Seconds an entry is served before it is fetched again
+    :param clock: Function returning the current time in seconds
+    :param provider: MarketDataProvider to fetch from, defaults to the active provider
+    :param cache: Optional DividendCache read before the provider and updated after it
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, clock=time.monotonic, provider=None, cache=None):
+        self.provider = provider
+        self.cache = cache
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _provider(self):
+        from finance_tools.providers import get_provider
+
+        return self.provider or get_provider()
+
+    def _entry(self, symbol):
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None or self.clock() - entry.fetched_at > self.ttl:
+                entry = _DividendEntry(self.clock())
+                self._entries[symbol] = entry
+            return entry
+
+    def info(self, symbol):
+        """Return the info dict for a symbol."""
+        entry = self._entry(symbol)
+        with entry.lock:
+            if entry.info is None:
+                cached = self.cache.get_info(symbol) if self.cache is not None else None
+                if cached is not None:
+                    entry.info = cached[0]
+                else:
+                    with stage('fetch.info', ticker=symbol.upper()):
+                        entry.info = self._provider().info(symbol.upper())
+                    if self.cache is not None:
+                        self.cache.put_info(symbol, entry.info)
+            return entry.info
+
+    def dividends(self, symbol):
+        """Return the dividend history of a symbol as a Series indexed by date."""
+        return self._indexed(symbol).dividends
+
+    def _indexed(self, symbol):
+        import numpy as np
+
+        entry = self._entry(symbol)
+        with entry.lock:
+            if entry.dividends is None:
+                cached = self.cache.get_dividends(symbol) if self.cache is not None else None
+                if cached is not None:
+                    dividends = cached[0]
+                else:
+                    with stage('fetch.dividends', ticker=symbol.upper()) as s:
+                        dividends = self._provider().dividends(symbol.upper()).sort_index()
+                        s.update(dividends)
+                    if self.cache is not None:
+                        self.cache.put_dividends(symbol, dividends)
+                index = dividends.index
+                if getattr(index, 'tz', None) is not None:
+                    index = index.tz_localize(None)
+                entry.dates = np.asarray(index.values, dtype='datetime64[D]')
+                entry.cumulative = np.concatenate(([0.0], np.cumsum(dividends.to_numpy(dtype=float))))
+                entry.dividends = dividends
+            return entry
+
+    def total(self, symbol, start_date, end_date, shares=1):
+        """
+        Dividends paid on a holding between two dates, both inclusive.
+
+        :param symbol: Stock ticker symbol
+        :param start_date: Start date in 'YYYY-MM-DD' format
+        :param end_date: End date in 'YYYY-MM-DD' format
+        :param shares: Number of shares held
+        :return: Dividends per share in the range multiplied by shares
+        """
+        return float(self.totals(symbol, [start_date], [end_date], shares)[0])
+
+    def totals(self, symbol, start_dates, end_dates, shares=1):
+        """
+        Vectorized version of total for many date ranges of one symbol.
+
+        :param start_dates: Sequence of start dates ('YYYY-MM-DD' or datetime64)
+        :param end_dates: Sequence of end dates, same length as start_dates
+        :param shares: Number of shares held, a scalar or one value per range
+        :return: Array of totals, one per range
+        """
+        import numpy as np
+
+        entry = self._indexed(symbol)
+        starts = np.asarray(start_dates, dtype='datetime64[D]')
+        ends = np.asarray(end_dates, dtype='datetime64[D]')
+        left = np.searchsorted(entry.dates, starts, side='left')
+        right = np.searchsorted(entry.dates, ends, side='right')
+        per_share = entry.cumulative[right] - entry.cumulative[np.minimum(left, right)]
+        return per_share * np.asarray(shares, dtype=float)
+
+    def invalidate(self, symbol=None):
+        """Forget one symbol, or everything if symbol is None."""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol.upper(), None)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_dividend_store():
+    """Return the shared DividendStore used by the GUI tools, backed by the disk cache."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = DividendStore(cache=DividendCache())
+        return _default_store
+
+
+def get_stock_info(symbol):
+    """
+    Look up the long name and trading currency of a security.
+
+    :param symbol: Stock ticker symbol
+    :return: (stock_name, currency), empty strings where the provider has no value
+    """
+    info = get_dividend_store().info(symbol)
+    stock_name = info.get('longName', '')
+    currency = info.get('currency', '')
+    return stock_name, currency
+
+
+def calculate_total_dividends(symbol, start_date, end_date, shares):
+    """
+    Total dividends paid on a holding over a date range.
+
+    :param symbol: Stock ticker symbol
+    :param start_date: Start date in 'YYYY-MM-DD' format (inclusive)
+    :param end_date: End date in 'YYYY-MM-DD' format (inclusive)
+    :param shares: Number of shares held
+    :return: Dividends per share in the range multiplied by shares
+    """
+    return get_dividend_store().total(symbol, start_date, end_date, shares)
@@ -0,0 +1,183 @@
+"""
+Earnings per share lookups used by the EPS scrapper.
+
+get_latest_eps looks up one ticker. fetch_eps_bulk screens a whole universe:
+tickers are fetched concurrently within a request-rate budget, failed requests
+are retried with backoff, and results are cached on disk for a limited time.
+
+Command line usage:
+    python -m finance_tools.eps tickers.txt --rate 5 --output eps.csv
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from finance_tools.instrumentation import add_arguments, configure, stage
+from finance_tools.price_cache import data_dir
+from finance_tools.ratelimit import RateLimiter, call_with_retries
+
+DEFAULT_TTL = 12 * 60 * 60  # seconds a cached EPS is served before it is fetched again
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 5  # requests per second
+
+
+def get_latest_eps(ticker):
+    """Fetches the most recent EPS for the given stock ticker, from the EPS cache while it is fresh."""
+    try:
+        cache = EPSCache()
+        cached = cache.get(ticker)
+        if cached is not None:
+            eps = cached[0]
+        else:
+            # Attempt to get EPS from the provider's `info` dictionary
+            eps = fetch_trailing_eps(ticker)
+            cache.put(ticker, eps)
+        if eps is not None:
+            return eps
+        raise ValueError("EPS data not available for this ticker.")
+    except Exception as e:
+        raise ValueError("Failed to fetch EPS data. Please check the ticker symbol.")
+
+
+def fetch_trailing_eps(ticker):
+    """
+    Trailing EPS from the active market data provider, without any error translation.
+
+    :return: EPS, or None if the provider has no value for the ticker
+    """
+    from finance_tools.providers import get_provider
+
+    with stage('fetch.eps', ticker=ticker):
+        return get_provider().trailing_eps(ticker)
+
+
+class EPSCache:
+    """
+    SQLite cache of trailing EPS values with a TTL.
+
+    Tickers without an EPS are cached too, so they are not asked for again on
+    every run. Failed lookups are never cached.
+
+    :param path: Database file, defaults to eps.sqlite in data_dir()
+    :param ttl: Seconds an entry is served before it expires
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, clock=time.time):
+        self.path = path or os.path.join(data_dir(), 'eps.sqlite')
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock:
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                with conn:
+                    conn.execute('CREATE TABLE IF NOT EXISTS eps '
+                                 '(ticker TEXT PRIMARY KEY, eps REAL, fetched_at REAL NOT NULL)')
+            finally:
+                conn.close()
+
+    def get(self, ticker, ignore_ttl=False):
+        """
+        :param ignore_ttl: Also return an expired entry
+        :return: (eps, fetched_at) for a fresh entry, or None if missing or expired
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            row = conn.execute('SELECT eps, fetched_at FROM eps WHERE ticker = ?', (ticker.upper(),)).fetchone()
+        finally:
+            conn.close()
+        if row is None or (not ignore_ttl and self.clock() - row[1] > self.ttl):
+            return None
+        return row
+
+    def put(self, ticker, eps, fetched_at=None):
+        fetched_at = self.clock() if fetched_at is None else fetched_at
+        with self._lock:
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                with conn:
+                    conn.execute('INSERT OR REPLACE INTO eps (ticker, eps, fetched_at) VALUES (?, ?, ?)',
+                                 (ticker.upper(), eps, fetched_at))
+            finally:
+                conn.close()
+        return fetched_at
+
+
+def fetch_eps_bulk(tickers, max_workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, retries=3, backoff=1.0,
+                   cache=None, fetcher=fetch_trailing_eps):
+    """
+    Fetch trailing EPS for a universe of tickers.
+
+    :param tickers: Iterable of ticker symbols
+    :param max_workers: Maximum number of requests in flight
+    :param rate: Request budget in requests per second, shared by all workers
+    :param retries: Retries per ticker after a failed request
+    :param backoff: Delay before the first retry in seconds, doubled on each retry
+    :param cache: EPSCache to use, a default one is created if None; pass False to disable
+    :param fetcher: Callable ticker -> EPS or None, defaults to fetch_trailing_eps
+    :return: DataFrame with ticker, eps, fetched_at and status columns, in input
+             order. status is 'ok', 'cached' (fresh value from the cache),
+             'missing' (no EPS available) or 'error: <message>'
+    """
+    import pandas as pd
+
+    if cache is None:
+        cache = EPSCache()
+    limiter = RateLimiter(rate)
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+
+    def lookup(ticker):
+        if cache:
+            cached = cache.get(ticker)
+            if cached is not None:
+                return ticker, cached[0], cached[1], 'cached' if cached[0] is not None else 'missing'
+        try:
+            eps = call_with_retries(fetcher, ticker, retries=retries, backoff=backoff, limiter=limiter)
+        except Exception as e:
+            return ticker, None, time.time(), f'error: {e}'
+        fetched_at = cache.put(ticker, eps) if cache else time.time()
+        return ticker, eps, fetched_at, 'ok' if eps is not None else 'missing'
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(lookup, tickers))
+
+    frame = pd.DataFrame(results, columns=['ticker', 'eps', 'fetched_at', 'status'])
+    frame['eps'] = frame['eps'].astype(float)
+    frame['fetched_at'] = pd.to_datetime(frame['fetched_at'], unit='s')
+    return frame
+
+
+def main(argv=None):
+    from finance_tools.batch import read_tickers
+
+    parser = argparse.ArgumentParser(description="Fetch trailing EPS for a list of tickers.")
+    parser.add_argument('tickers', help="File with ticker symbols (one per line or comma separated)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Concurrent requests")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="Requests per second")
+    parser.add_argument('--retries', type=int, default=3, help="Retries per ticker")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore cached values")
+    parser.add_argument('--output', help="Write the results to this .csv file")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    configure(args)
+
+    results = fetch_eps_bulk(read_tickers(args.tickers), max_workers=args.workers, rate=args.rate,
+                             retries=args.retries, cache=False if args.no_cache else None)
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"Data saved to {args.output}")
+    else:
+        print(results.to_string(index=False))
+
+    failed = results['status'].str.startswith('error')
+    print(f"Fetched {len(results) - failed.sum()} of {len(results)} tickers.", file=sys.stderr)
+    return 1 if failed.all() and len(results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+"""
+Pluggable file exporters for price tables and wide panels.
+
+Every exporter streams its input in chunks of rows, so a panel of decades of
+daily data for many tickers is written without building a second copy of it in
+memory, and the input may itself be an iterable of DataFrames (for example one
+per ticker or per download window) that is never held in memory as a whole.
+
+Built-in formats, chosen from the file extension or by name:
+    csv       .csv (.csv.gz, .csv.bz2, .csv.xz are compressed)   gzip, bz2, xz
+    parquet   .parquet, .pq (needs pyarrow)                      snappy, gzip, brotli, lz4, zstd
+    feather   .feather, .arrow (Arrow IPC, needs pyarrow)        lz4, zstd
+    xlsx      .xlsx
+
+The xlsx exporter writes through openpyxl's write-only workbook, which spools
+rows to disk instead of keeping cells in memory, and continues on a new sheet
+whenever one reaches Excel's row limit.
+
+Further formats can be added with register_exporter().
+"""
+import bz2
+import datetime
+import functools
+import gzip
+import io
+import lzma
+import math
+import numbers
+import os
+
+from finance_tools.instrumentation import stage
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+EXCEL_MAX_ROWS = 1_048_576  # Rows per worksheet, including the header row
+EXCEL_MAX_SHEET_NAME = 31
+
+
+class Exporter:
+    """Interface implemented by every export format."""
+
+    extensions = ()
+    compressions = (None,)
+
+    def open(self, path, compression=None, sheet_name=None):
+        """
+        Open a writer that appends DataFrame chunks to a file.
+
+        :param path: File to write
+        :param compression: One of self.compressions
+        :param sheet_name: Sheet or table title, for formats that have one
+        :return: ExportWriter
+        """
+        raise NotImplementedError
+
+
+class ExportWriter:
+    """Writes DataFrame chunks with the same columns to one file. Use as a context manager."""
+
+    def __init__(self):
+        self.rows = 0
+
+    def write(self, frame):
+        """Append the rows of a DataFrame, index included."""
+        self._write(frame)
+        self.rows += len(frame)
+
+    def _write(self, frame):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CsvExporter(Exporter):
+    """Comma separated text, optionally gzip, bz2 or xz compressed."""
+
+    extensions = ('.csv',)
+    compressions = (None, 'gzip', 'bz2', 'xz')
+
+    # gzip at the level of the gzip command line tool; the module default of 9 is several times slower
+    _OPENERS = {None: io.open, 'gzip': functools.partial(gzip.open, compresslevel=6), 'bz2': bz2.open, 'xz': lzma.open}
+
+    def open(self, path, compression=None, sheet_name=None):
+        return _CsvWriter(self._OPENERS[compression](path, 'wt', newline=''))
+
+
+class _CsvWriter(ExportWriter):
+    def __init__(self, handle):
+        super().__init__()
+        self.handle = handle
+        self.header = True
+
+    def _write(self, frame):
+        frame.to_csv(self.handle, header=self.header)
+        self.header = False
+
+    def close(self):
+        self.handle.close()
+
+
+class ParquetExporter(Exporter):
+    """Apache Parquet, one row group per chunk."""
+
+    extensions = ('.parquet', '.pq')
+    compressions = (None, 'snappy', 'gzip', 'brotli', 'lz4', 'zstd')
+
+    def open(self, path, compression=None, sheet_name=None):
+        pa = _require_pyarrow('Parquet')
+        import pyarrow.parquet as pq
+
+        return _ArrowWriter(pa, lambda schema: pq.ParquetWriter(path, schema, compression=compression or 'none'))
+
+
+class FeatherExporter(Exporter):
+    """Feather version 2, i.e. the Arrow IPC file format, one record batch per chunk."""
+
+    extensions = ('.feather', '.arrow')
+    compressions = (None, 'lz4', 'zstd')
+
+    def open(self, path, compression=None, sheet_name=None):
+        pa = _require_pyarrow('Feather')
+
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        return _ArrowWriter(pa, lambda schema: pa.ipc.new_file(path, schema, options=options))
+
+
+class _ArrowWriter(ExportWriter):
+    def __init__(self, pa, open_writer):
+        super().__init__()
+        self.pa = pa
+        self.open_writer = open_writer
+        self.schema = None
+        self.writer = None
+
+    def _write(self, frame):
+        # Arrow needs string column names; the first chunk fixes the schema and later chunks are converted to it
+        if not all(isinstance(name, str) for name in frame.columns):
+            frame = frame.rename(columns=str)
+        table = self.pa.Table.from_pandas(frame, schema=self.schema, preserve_index=True)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = self.open_writer(self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class XlsxExporter(Exporter):
+    """Excel workbook written with openpyxl's write-only mode, which streams rows to disk."""
+
+    extensions = ('.xlsx',)
+
+    def open(self, path, compression=None, sheet_name=None):
+        return _XlsxWriter(path, sheet_name or 'Sheet1')
+
+
+class _XlsxWriter(ExportWriter):
+    def __init__(self, path, sheet_name):
+        super().__init__()
+        from openpyxl import Workbook
+
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet_name = sheet_name
+        self.sheets = 0
+        self.sheet = None
+        self.sheet_rows = 0
+        self.header = None
+
+    def _new_sheet(self):
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+
+        # Sheets after the first are numbered: "Daily Closing Prices (2)"
+        self.sheets += 1
+        suffix = f' ({self.sheets})' if self.sheets > 1 else ''
+        self.sheet = self.workbook.create_sheet(title=self.sheet_name[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix)
+
+        header = []
+        for name in self.header:
+            cell = WriteOnlyCell(self.sheet, value=name)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        self.sheet.append(header)
+        self.sheet_rows = 1
+
+    def _write(self, frame):
+        if self.header is None:
+            self.header = [str(name) for name in [frame.index.name or ''] + list(frame.columns)]
+            self._new_sheet()
+
+        # Each column is converted at once; rows are then appended as plain tuples
+        columns = [_column_values(frame.index)] + [_column_values(frame[name]) for name in frame.columns]
+        for row in zip(*columns):
+            if self.sheet_rows == EXCEL_MAX_ROWS:
+                self._new_sheet()
+            self.sheet.append(row)
+            self.sheet_rows += 1
+
+    def close(self):
+        if self.sheet is None:
+            self.header = ['']
+            self._new_sheet()
+        self.workbook.save(self.path)
+
+
+def _column_values(column):
+    """
+    Convert a column (Series or Index) to values openpyxl can write.
+
+    Numbers and booleans keep their type, datetimes lose their time zone (Excel
+    has none), missing or infinite values become empty cells and anything else
+    is written as text.
+
+    :return: List of cell values
+    """
+    import numpy as np
+    import pandas as pd
+
+    kind = column.dtype.kind
+    if kind == 'M':
+        if getattr(column.dtype, 'tz', None) is not None:
+            column = column.tz_localize(None) if isinstance(column, pd.Index) else column.dt.tz_localize(None)
+        return [None if missing else value for value, missing in
+                zip(column.to_numpy(dtype=object), pd.isna(column))]
+    if kind in 'iub' and not column.hasnans:
+        return column.tolist()
+    if kind in 'fiu':
+        values = column.to_numpy(dtype='float64', na_value=np.nan)
+        return [value if finite else None for value, finite in zip(values.tolist(), np.isfinite(values).tolist())]
+    return [_cell_value(value) for value in column.tolist()]
+
+
+def _cell_value(value):
+    """A single Python value as an openpyxl cell value."""
+    if value is None or value != value:  # NaN and NaT are not equal to themselves
+        return None
+    if isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, numbers.Real):
+        return value if math.isfinite(value) else None
+    if isinstance(value, datetime.datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value
+    return str(value)
+
+
+# Format name -> Exporter
+EXPORTERS = {
+    'csv': CsvExporter(),
+    'parquet': ParquetExporter(),
+    'feather': FeatherExporter(),
+    'xlsx': XlsxExporter(),
+}
+
+# Suffix after the data extension -> CSV compression it implies
+_COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+
+
+def register_exporter(name, exporter):
+    """
+    Add or replace an export format.
+
+    :param name: Format name used by export(file_format=...)
+    :param exporter: Exporter instance; its extensions are matched by export()
+    """
+    EXPORTERS[name] = exporter
+
+
+def get_exporter(path, file_format=None, compression=None):
+    """
+    Find the exporter for a file.
+
+    :param path: File to write; its extension selects the format unless file_format is given
+    :param file_format: Format name from EXPORTERS
+    :param compression: Requested compression, or None to use the one implied by the path (.csv.gz)
+    :return: (Exporter, compression)
+    """
+    lower = str(path).lower()
+    for suffix, implied in _COMPRESSION_SUFFIXES.items():
+        if lower.endswith(suffix):
+            lower = lower[:-len(suffix)]
+            compression = compression or implied
+            break
+
+    if file_format is None:
+        file_format = next((name for name, exporter in EXPORTERS.items()
+                            if any(lower.endswith(extension) for extension in exporter.extensions)), None)
+        if file_format is None:
+            raise ValueError(f"Cannot tell the export format of {path}. Use one of: "
+                             + ", ".join(sorted(EXPORTERS)))
+    if file_format not in EXPORTERS:
+        raise ValueError(f"Unknown export format '{file_format}'. Use one of: " + ", ".join(sorted(EXPORTERS)))
+
+    exporter = EXPORTERS[file_format]
+    if compression == 'none':
+        compression = None
+    if compression not in exporter.compressions:
+        supported = ", ".join(name for name in exporter.compressions if name) or "none"
+        raise ValueError(f"{file_format} export does not support '{compression}' compression "
+                         f"(supported: {supported}).")
+    return exporter, compression
+
+
+def export(data, path, file_format=None, compression=None, chunk_rows=DEFAULT_CHUNK_ROWS, sheet_name=None):
+    """
+    Write a table to a file in chunks.
+
+    :param data: DataFrame, Series, or an iterable of DataFrames with the same columns
+    :param path: File to write; the extension selects the format unless file_format is given
+    :param file_format: Format name from EXPORTERS ('csv', 'parquet', 'feather', 'xlsx')
+    :param compression: Codec supported by the format, e.g. 'zstd' for Parquet or 'gzip' for CSV
+    :param chunk_rows: Rows converted and written at a time
+    :param sheet_name: Worksheet name for xlsx files
+    :return: Number of rows written
+    :raises ValueError: If the format or codec is unknown, or the input is an empty iterable
+    """
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be at least 1.")
+
+    exporter, compression = get_exporter(path, file_format, compression)
+    chunks = _chunks(data, chunk_rows)
+    first = next(chunks, None)
+    if first is None:
+        # Without a single frame there are no columns to write, not even a header
+        raise ValueError(f"Nothing to export to {path}: the input has no tables.")
+
+    with stage('export', path=str(path), compression=compression) as s:
+        with exporter.open(path, compression=compression, sheet_name=sheet_name) as writer:
+            writer.write(first)
+            for chunk in chunks:
+                writer.write(chunk)
+        s.update(rows=writer.rows, bytes=os.path.getsize(path))
+    return writer.rows
+
+
+def _chunks(data, chunk_rows):
+    """Yield DataFrames of at most chunk_rows rows; an all-empty input still yields once for its header."""
+    import pandas as pd
+
+    frames = [data] if isinstance(data, (pd.DataFrame, pd.Series)) else data
+    written = False
+    first_empty = None
+    for frame in frames:
+        if isinstance(frame, pd.Series):
+            frame = frame.to_frame()
+        if frame.empty:
+            first_empty = frame if first_empty is None else first_empty
+            continue
+        written = True
+        for start in range(0, len(frame), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows]
+    if not written and first_empty is not None:
+        yield first_empty
+
+
+def _require_pyarrow(format_name):
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise ImportError(f"{format_name} export needs pyarrow (pip install pyarrow).") from None
+    return pa
+
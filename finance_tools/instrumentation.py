@@ -0,0 +1,389 @@
+"""
+Stage timing and profiling for the tools and batch jobs.
+
+Instrumentation is off by default, and stage() then costs one function call.
+Switch it on with environment variables, which works for every tool including
+the Tk windows, or with the --trace and --profile flags of the command line
+tools:
+
+    FINANCE_TOOLS_TRACE=<file>                append one JSON line per stage to <file> ('-' for stderr)
+    FINANCE_TOOLS_PROFILE=cprofile:<file>     profile the run with cProfile; pstats dump written on exit
+    FINANCE_TOOLS_PROFILE=tracemalloc:<file>  trace allocations; tracemalloc snapshot written on exit
+
+A stage record holds the stage name and its fields (ticker, interval, path,
+...), wall time, rows and bytes handled, the process's peak resident memory,
+the highest traced memory while the stage ran when tracemalloc is running, and
+the error if the stage raised:
+
+    {"stage": "fetch.history", "ticker": "AAPL", "interval": "1d", "rows": 252, "bytes": 14112,
+     "seconds": 0.412, "max_rss": 183500800, "pid": 4242, "thread": "MainThread", "time": "2025-01-02T09:30:00"}
+
+Summarize a trace file per stage with:
+    python -m finance_tools.instrumentation trace.jsonl
+"""
+import argparse
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+TRACE_ENV = 'FINANCE_TOOLS_TRACE'
+PROFILE_ENV = 'FINANCE_TOOLS_PROFILE'
+PROFILERS = ('cprofile', 'tracemalloc')
+
+_sink = None
+_sink_lock = threading.Lock()
+_local = threading.local()
+_open_stages = set()
+_stages_lock = threading.Lock()
+_profile = None  # (kind, path, cProfile.Profile or None)
+_thread_profiles = []
+
+
+class Stage:
+    """A timed stage; use as a context manager and report what it handled with update()."""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.peak = 0
+
+    def update(self, data=None, **fields):
+        """
+        Add fields to the stage record.
+
+        :param data: DataFrame, Series or array the stage produced; sets rows and bytes
+        :param fields: Other JSON-serializable fields, e.g. rows=10 or bytes=2048
+        """
+        if data is not None:
+            self.fields['rows'] = len(data)
+            self.fields['bytes'] = data_bytes(data)
+        self.fields.update(fields)
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        if _tracing_memory():
+            _reset_peak(self)
+        self.started = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _stack().pop()
+
+        record = {'stage': self.name, **self.fields, 'seconds': round(seconds, 6)}
+        if self.parent is not None:
+            record['parent'] = self.parent
+        if _tracing_memory():
+            tracemalloc = sys.modules['tracemalloc']
+            with _stages_lock:
+                _open_stages.discard(self)
+                record['peak_memory'] = max(self.peak, tracemalloc.get_traced_memory()[1])
+        record['max_rss'] = max_rss()
+        record['pid'] = os.getpid()
+        record['thread'] = threading.current_thread().name
+        record['time'] = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started))
+        if exc_type is not None:
+            record['error'] = f"{exc_type.__name__}: {exc}"
+        _emit(record)
+        return False
+
+
+class _NullStage:
+    """Stand-in returned by stage() while tracing is off."""
+
+    def update(self, data=None, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name, **fields):
+    """
+    Time a stage of work and write its record when it ends.
+
+        with stage('fetch.history', ticker=ticker) as s:
+            data = provider.history(...)
+            s.update(data)
+
+    :param name: Stage name, e.g. 'fetch.history' or 'export'
+    :param fields: Fields included in the record
+    :return: Context manager; a shared no-op while tracing is off
+    """
+    if _sink is None:
+        return _NULL_STAGE
+    return Stage(name, fields)
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _tracing_memory():
+    # tracemalloc can only be running if something imported it, so it is not imported here
+    tracemalloc = sys.modules.get('tracemalloc')
+    return tracemalloc is not None and tracemalloc.is_tracing()
+
+
+def _reset_peak(new_stage):
+    # tracemalloc has one peak for the process: fold it into every open stage before restarting it
+    tracemalloc = sys.modules['tracemalloc']
+    with _stages_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        for open_stage in _open_stages:
+            open_stage.peak = max(open_stage.peak, peak)
+        tracemalloc.reset_peak()
+        _open_stages.add(new_stage)
+
+
+def _emit(record):
+    line = json.dumps(record, default=str) + '\n'
+    with _sink_lock:
+        if _sink is not None:
+            _sink.write(line)
+            _sink.flush()
+
+
+def data_bytes(data):
+    """Size in bytes of a DataFrame, Series or array (object contents not included)."""
+    if hasattr(data, 'memory_usage'):
+        usage = data.memory_usage(index=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    return int(getattr(data, 'nbytes', 0))
+
+
+def max_rss():
+    """Peak resident memory of this process in bytes, or None where the platform does not report it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def enable(path='-'):
+    """
+    Start writing stage records.
+
+    :param path: File the JSON lines are appended to, or '-' for stderr
+    """
+    global _sink
+    with _sink_lock:
+        if _sink is not None and _sink is not sys.stderr:
+            _sink.close()
+        _sink = sys.stderr if path == '-' else open(path, 'a', encoding='utf-8')
+
+
+def disable():
+    """Stop writing stage records."""
+    global _sink
+    with _sink_lock:
+        if _sink is not None and _sink is not sys.stderr:
+            _sink.close()
+        _sink = None
+
+
+def enabled():
+    """True while stage records are being written."""
+    return _sink is not None
+
+
+def parse_profile_spec(spec):
+    """
+    Split a profile spec into its parts.
+
+    :param spec: 'cprofile:<file>' or 'tracemalloc:<file>'
+    :return: (kind, path)
+    :raises ValueError: If the spec is malformed
+    """
+    kind, _, path = spec.partition(':')
+    if kind not in PROFILERS or not path:
+        raise ValueError(f"Invalid profile '{spec}'. Use cprofile:<file> or tracemalloc:<file>.")
+    return kind, path
+
+
+def start_profile(spec):
+    """
+    Profile the rest of the run; the dump is written by stop_profile() or at exit.
+
+    cProfile covers the calling thread and any work passed through profiled()
+    (the Tk tools' background jobs). tracemalloc covers every thread.
+
+    :param spec: 'cprofile:<file>' or 'tracemalloc:<file>'
+    """
+    global _profile
+    kind, path = parse_profile_spec(spec)
+    if _profile is not None:
+        raise RuntimeError("A profile is already running.")
+
+    if kind == 'cprofile':
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        import tracemalloc
+
+        tracemalloc.start(10)
+        profiler = None
+    _profile = (kind, path, profiler)
+    atexit.register(stop_profile)
+
+
+def stop_profile():
+    """
+    Stop the running profile and write its dump file.
+
+    :return: Path of the dump, or None if no profile was running
+    """
+    global _profile
+    if _profile is None:
+        return None
+    kind, path, profiler = _profile
+    _profile = None
+
+    if kind == 'cprofile':
+        import pstats
+
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+        for thread_profile in _thread_profiles:
+            stats.add(thread_profile)
+        _thread_profiles.clear()
+        stats.dump_stats(path)
+    else:
+        import tracemalloc
+
+        tracemalloc.take_snapshot().dump(path)
+        tracemalloc.stop()
+    return path
+
+
+def profiled(func, *args, **kwargs):
+    """
+    Call func(*args, **kwargs), under its own cProfile profiler if a cProfile run is active.
+
+    Used for work handed to other threads, which the main profiler does not see.
+    """
+    if _profile is None or _profile[0] != 'cprofile':
+        return func(*args, **kwargs)
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # Python 3.12+ allows one active profiler, which then sees every thread
+        return func(*args, **kwargs)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        _thread_profiles.append(profiler)
+
+
+def _profile_argument(spec):
+    try:
+        parse_profile_spec(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return spec
+
+
+def add_arguments(parser):
+    """Add the --trace and --profile options to a command line parser."""
+    parser.add_argument('--trace', metavar='FILE',
+                        help="Append per-stage timings as JSON lines to FILE ('-' for stderr)")
+    parser.add_argument('--profile', metavar='KIND:FILE', type=_profile_argument,
+                        help="Profile the run with cprofile or tracemalloc and write the dump to FILE")
+
+
+def configure(args):
+    """Apply the --trace and --profile options parsed by a parser set up with add_arguments()."""
+    if args.trace:
+        enable(args.trace)
+    if args.profile and _profile is None:
+        start_profile(args.profile)
+
+
+def summarize(path):
+    """
+    Aggregate a trace file per stage.
+
+    :param path: JSON lines file written by the stage records
+    :return: Dict of stage name -> dict with count, errors, seconds, mean_seconds,
+             max_seconds, rows, bytes and peak_memory (largest of the stage)
+    """
+    summary = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            totals = summary.setdefault(record['stage'], {'count': 0, 'errors': 0, 'seconds': 0.0,
+                                                          'max_seconds': 0.0, 'rows': 0, 'bytes': 0,
+                                                          'peak_memory': None})
+            totals['count'] += 1
+            totals['errors'] += 'error' in record
+            totals['seconds'] += record['seconds']
+            totals['max_seconds'] = max(totals['max_seconds'], record['seconds'])
+            totals['rows'] += record.get('rows') or 0
+            totals['bytes'] += record.get('bytes') or 0
+            if record.get('peak_memory') is not None:
+                totals['peak_memory'] = max(totals['peak_memory'] or 0, record['peak_memory'])
+    for totals in summary.values():
+        totals['mean_seconds'] = totals['seconds'] / totals['count']
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a stage trace file per stage.")
+    parser.add_argument('trace', help="JSON lines file written with FINANCE_TOOLS_TRACE or --trace")
+    args = parser.parse_args(argv)
+
+    summary = summarize(args.trace)
+    print(f"{'Stage':<24}{'Count':>8}{'Errors':>8}{'Total s':>11}{'Mean s':>10}{'Max s':>10}"
+          f"{'Rows':>12}{'MB':>10}{'Peak MB':>10}")
+    for name, totals in sorted(summary.items(), key=lambda item: -item[1]['seconds']):
+        peak = f"{totals['peak_memory'] / 1e6:.1f}" if totals['peak_memory'] is not None else '-'
+        print(f"{name:<24}{totals['count']:>8}{totals['errors']:>8}{totals['seconds']:>11.3f}"
+              f"{totals['mean_seconds']:>10.4f}{totals['max_seconds']:>10.4f}{totals['rows']:>12}"
+              f"{totals['bytes'] / 1e6:>10.1f}{peak:>10}")
+    return 0
+
+
+def _configure_from_environment():
+    if os.environ.get(TRACE_ENV):
+        enable(os.environ[TRACE_ENV])
+    if os.environ.get(PROFILE_ENV) and _profile is None:
+        import multiprocessing
+
+        # Worker processes inherit the environment; only the process that started the run is profiled
+        if multiprocessing.parent_process() is None:
+            start_profile(os.environ[PROFILE_ENV])
+
+
+_configure_from_environment()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
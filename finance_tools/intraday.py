@@ -0,0 +1,186 @@
+"""
+Chunked, parallel download of long intraday price histories.
+
+Providers cap how much intraday history one request may cover (Yahoo serves
+1m bars a week at a time, and 2m-90m bars 60 days at a time). download_intraday
+splits a long range into windows the provider accepts, fetches them
+concurrently, stitches them back together in order with the bars on window
+boundaries de-duplicated, and streams each window straight to a file through
+finance_tools.exporters. Only a few windows are held in memory at any time, so
+memory stays flat however long the range is.
+
+Command line usage:
+    python -m finance_tools.intraday AAPL 2025-01-01 2025-03-01 --interval 5m --output aapl_5m.parquet
+"""
+import argparse
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from finance_tools.exporters import export, get_exporter
+from finance_tools.instrumentation import add_arguments, configure
+from finance_tools.price_cache import COLUMNS, provider_history
+from finance_tools.ratelimit import call_with_retries
+
+DEFAULT_WORKERS = 4
+DEFAULT_WINDOW_DAYS = 30  # window size for providers without limits, bounds memory per window
+
+
+def plan_windows(start_date, end_date, interval, windows=None, window_days=None, today=None):
+    """
+    Split a date range into windows that one history request may cover.
+
+    :param start_date: Start date in 'YYYY-MM-DD' format (inclusive)
+    :param end_date: End date in 'YYYY-MM-DD' format (exclusive)
+    :param interval: Bar interval, e.g. '1m' or '5m'
+    :param windows: Provider limits, interval -> (window days, lookback days); see
+                    MarketDataProvider.intraday_windows
+    :param window_days: Window size to use instead of the provider's, capped at its limit
+    :param today: Date the lookback is counted back from, defaults to today
+    :return: List of ('YYYY-MM-DD', 'YYYY-MM-DD') windows covering the range in order
+    :raises ValueError: If the range is empty or starts before the provider serves the interval
+    """
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    if start >= end:
+        raise ValueError("Start date must be before end date.")
+
+    limit, lookback = (windows or {}).get(interval, (None, None))
+    if lookback is not None:
+        oldest = (today or date.today()) - timedelta(days=lookback - 1)
+        if start < oldest:
+            raise ValueError(f"The provider only serves {interval} bars for the last {lookback} days "
+                             f"(from {oldest.isoformat()}).")
+    size = window_days or limit or DEFAULT_WINDOW_DAYS
+    if limit is not None:
+        size = min(size, limit)
+    if size < 1:
+        raise ValueError("Windows must be at least one day long.")
+
+    planned = []
+    while start < end:
+        window_end = min(end, start + timedelta(days=size))
+        planned.append((start.isoformat(), window_end.isoformat()))
+        start = window_end
+    return planned
+
+
+def _fetched_in_order(fetch, windows, max_workers):
+    """Fetch windows on a thread pool and yield them in order, with at most max_workers + 1 held at once."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        try:
+            for window in windows:
+                pending.append(pool.submit(fetch, *window))
+                if len(pending) > max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def stitch(frames):
+    """
+    Join consecutive history windows into one stream of chunks.
+
+    Rows are sorted, and bars repeated within a window or at or before the end of
+    the previous window (providers often return the boundary bar twice) are dropped.
+    Columns are normalized to COLUMNS as floats so every chunk has the same schema.
+
+    :param frames: Iterable of DataFrames in window order
+    :return: Generator of DataFrames
+    """
+    last = None
+    for frame in frames:
+        if frame is None or frame.empty:
+            continue
+        frame = frame.reindex(columns=COLUMNS).astype(float).sort_index()
+        frame = frame[~frame.index.duplicated(keep='last')]
+        if last is not None:
+            frame = frame[frame.index > last]
+        if frame.empty:
+            continue
+        frame.index.name = 'Datetime'
+        last = frame.index[-1]
+        yield frame
+
+
+def download_intraday(ticker, start_date, end_date, path, interval='1m', max_workers=DEFAULT_WORKERS,
+                      window_days=None, retries=2, file_format=None, compression=None):
+    """
+    Download intraday history for a long range into a file, window by window.
+
+    The file is written under a temporary name and only renamed to path once
+    every window has been written, so a failed download never leaves a file
+    with gaps behind.
+
+    :param ticker: Stock or index ticker symbol
+    :param start_date: Start date in 'YYYY-MM-DD' format (inclusive)
+    :param end_date: End date in 'YYYY-MM-DD' format (exclusive)
+    :param path: Output file; Parquet or Feather keep it columnar (see finance_tools.exporters)
+    :param interval: Bar interval, e.g. '1m', '5m' or '1h'
+    :param max_workers: Maximum number of windows fetched at the same time
+    :param window_days: Window size, defaults to the largest the provider allows
+    :param retries: Retries of a failed window before the download fails
+    :param file_format: Export format, defaults to the one implied by the path
+    :param compression: Codec supported by the format, e.g. 'zstd' for Parquet
+    :return: (rows, windows) written to the file
+    :raises ValueError: If the range cannot be split into windows, or no window has any bars
+    """
+    from finance_tools.providers import _slice_history, get_provider
+
+    ticker = ticker.upper()
+    get_exporter(path, file_format, compression)  # fail on a bad path or codec before downloading
+    windows = plan_windows(start_date, end_date, interval, get_provider().intraday_windows, window_days)
+
+    def fetch(window_start, window_end):
+        data = call_with_retries(provider_history, ticker, window_start, window_end, interval, retries=retries)
+        # Providers may return bars from outside the window, e.g. the previous session's last bar
+        return _slice_history(data, window_start, window_end) if not data.empty else data
+
+    directory, name = os.path.split(os.path.abspath(path))
+    partial = os.path.join(directory, f'.partial-{name}')
+    try:
+        chunks = stitch(_fetched_in_order(fetch, windows, max_workers))
+        first = next(chunks, None)
+        if first is None:
+            raise ValueError("No data available for the given ticker or date range.")
+        rows = export(itertools.chain([first], chunks), partial, file_format=file_format, compression=compression)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return rows, len(windows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download a long intraday price history in provider-sized windows.")
+    parser.add_argument('ticker', help="Ticker symbol")
+    parser.add_argument('start_date', help="Start date (YYYY-MM-DD)")
+    parser.add_argument('end_date', help="End date (YYYY-MM-DD, exclusive)")
+    parser.add_argument('--interval', default='1m', help="Bar interval, e.g. 1m, 5m, 15m, 1h (default 1m)")
+    parser.add_argument('--output', required=True, help="Output file (.parquet, .feather, .csv, ...)")
+    parser.add_argument('--compression', help="Compression codec, e.g. zstd for Parquet")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Windows fetched at the same time")
+    parser.add_argument('--window-days', type=int, help="Days per request (default: the provider's limit)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    configure(args)
+
+    try:
+        rows, windows = download_intraday(args.ticker, args.start_date, args.end_date, args.output,
+                                          interval=args.interval, max_workers=args.workers,
+                                          window_days=args.window_days, compression=args.compression)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Wrote {rows} {args.interval} bars from {windows} windows to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
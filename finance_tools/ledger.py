@@ -0,0 +1,137 @@
+"""
+In-memory dividend ledger behind the dividend calculator's table.
+
+Rows are held column by column and the per-currency totals are updated as rows
+are added, so adding a holding never re-reads the rows already in the ledger.
+The GUI only renders the rows that are scrolled into view.
+"""
+import csv
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from finance_tools.dividends import get_dividend_store
+
+COLUMNS = ('symbol', 'name', 'start_date', 'end_date', 'total', 'currency', 'shares')
+
+DEFAULT_WORKERS = 8
+
+
+class DividendLedger:
+    """Columnar store of dividend rows with running per-currency totals."""
+
+    def __init__(self):
+        self.columns = {column: [] for column in COLUMNS}
+        self.currency_totals = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.columns['symbol'])
+
+    def add(self, symbol, name, start_date, end_date, total, currency, shares):
+        """
+        Append one row and update the running totals.
+
+        :return: Index of the new row
+        """
+        return self.extend([(symbol, name, start_date, end_date, total, currency, shares)])
+
+    def extend(self, rows):
+        """
+        Append many rows in one go.
+
+        :param rows: Iterable of tuples in COLUMNS order
+        :return: Index of the last row added
+        """
+        with self._lock:
+            for row in rows:
+                for column, value in zip(COLUMNS, row):
+                    self.columns[column].append(value)
+                self.currency_totals[row[5]] += row[4]
+            return len(self) - 1
+
+    def rows(self, start=0, stop=None):
+        """Return rows start..stop as tuples in COLUMNS order."""
+        with self._lock:
+            return list(zip(*(self.columns[column][start:stop] for column in COLUMNS)))
+
+    def clear(self):
+        with self._lock:
+            for values in self.columns.values():
+                values.clear()
+            self.currency_totals.clear()
+
+    def to_frame(self):
+        """Return the ledger as a pandas DataFrame."""
+        import pandas as pd
+
+        with self._lock:
+            return pd.DataFrame({column: list(values) for column, values in self.columns.items()})
+
+    def import_csv(self, path, store=None, max_workers=DEFAULT_WORKERS):
+        """
+        Bulk-load holdings from a CSV file.
+
+        The file needs a header with symbol, shares, start_date and end_date
+        columns (dates as 'YYYY-MM-DD'). Holdings are grouped by symbol, each
+        symbol is looked up once, concurrently, and all of its date ranges are
+        totalled in a single vectorized call. Rows are added in file order.
+
+        :param path: Path to the CSV file
+        :param store: DividendStore to read through, defaults to the shared store
+        :param max_workers: Maximum number of symbols looked up at the same time
+        :return: Dict mapping the file line number of each rejected row to a message
+        """
+        errors = {}
+        holdings = defaultdict(list)
+        with open(path, newline='') as f:
+            for line, record in enumerate(csv.DictReader(f), start=2):
+                record = {key.strip().lower(): value for key, value in record.items() if key}
+                try:
+                    symbol = record['symbol'].strip().upper()
+                    shares = float(record['shares'])
+                    start_date = record['start_date'].strip()
+                    end_date = record['end_date'].strip()
+                except (KeyError, AttributeError, ValueError):
+                    errors[line] = "Expected symbol, shares, start_date and end_date values."
+                    continue
+                if not symbol:
+                    errors[line] = "Ticker symbol cannot be empty."
+                    continue
+                try:
+                    # Stored as parsed, so the totals only ever see 'YYYY-MM-DD' dates (not '20050101')
+                    start_date = datetime.strptime(start_date, '%Y-%m-%d').date().isoformat()
+                    end_date = datetime.strptime(end_date, '%Y-%m-%d').date().isoformat()
+                except ValueError:
+                    errors[line] = "Dates must be in 'YYYY-MM-DD' format."
+                    continue
+                holdings[symbol].append((line, shares, start_date, end_date))
+
+        store = store or get_dividend_store()
+
+        def total_symbol(symbol, lots):
+            info = store.info(symbol)
+            if not info.get('longName', ''):
+                raise ValueError("Failed to fetch stock information.")
+            totals = store.totals(symbol, [lot[2] for lot in lots], [lot[3] for lot in lots],
+                                  [lot[1] for lot in lots])
+            return info, totals
+
+        rows = []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {symbol: pool.submit(total_symbol, symbol, lots) for symbol, lots in holdings.items()}
+            for symbol, lots in holdings.items():
+                try:
+                    info, totals = futures[symbol].result()
+                except Exception as e:
+                    for lot in lots:
+                        errors[lot[0]] = str(e)
+                    continue
+                for (line, shares, start_date, end_date), total in zip(lots, totals):
+                    rows.append((line, (symbol, info.get('longName', ''), start_date, end_date, float(total),
+                                        info.get('currency', ''), shares)))
+
+        rows.sort(key=lambda item: item[0])
+        self.extend(row for _, row in rows)
+        return errors
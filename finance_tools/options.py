@@ -0,0 +1,170 @@
+"""
+Option break-even prices used by the option breakeven tool.
+
+break_even_price handles one leg. break_even_prices does a whole chain in one
+call, and payoff_grid and strategy_break_evens cover multi-leg strategies
+(spreads, straddles, condors) for one or many strategies at once.
+"""
+
+# Sign applied to the premium for each trade type
+TRADE_TYPES = {
+    'Long Call': 1,   # Treat premium as cost for long call
+    'Short Call': 1,  # Treat premium as income for short call
+    'Long Put': -1,   # Treat premium as cost for long put
+    'Short Put': -1,  # Treat premium as income for short put
+}
+
+
+def break_even_price(strike_price, premium, trade_type):
+    """
+    Break-even underlying price at expiry for a single option leg.
+
+    :param strike_price: Strike price of the option
+    :param premium: Option premium (sign is ignored)
+    :param trade_type: One of TRADE_TYPES, e.g. 'Long Call'
+    :return: Break-even price
+    """
+    if trade_type not in TRADE_TYPES:
+        raise ValueError(f"Unknown trade type: {trade_type}")
+    return strike_price + TRADE_TYPES[trade_type] * abs(premium)
+
+
+# Direction of the position and whether the option is a call, for the payoff of each trade type
+_DIRECTION = {'Long Call': 1, 'Short Call': -1, 'Long Put': 1, 'Short Put': -1}
+_IS_CALL = {'Long Call': True, 'Short Call': True, 'Long Put': False, 'Short Put': False}
+
+
+def _lookup(table, trade_types):
+    """Map an array of trade type names through table in one pass over the distinct names."""
+    import numpy as np
+
+    names, inverse = np.unique(np.asarray(trade_types, dtype=str), return_inverse=True)
+    unknown = [name for name in names if name not in table]
+    if unknown:
+        raise ValueError(f"Unknown trade type: {', '.join(unknown)}")
+    return np.array([table[name] for name in names])[inverse].reshape(np.shape(trade_types))
+
+
+def break_even_prices(strike_prices, premiums, trade_types):
+    """
+    Break-even prices for a whole option chain at once.
+
+    Arguments broadcast against each other, so a single trade type can be
+    given for a chain of strikes and premiums.
+
+    :param strike_prices: Array of strike prices
+    :param premiums: Array of option premiums (sign is ignored)
+    :param trade_types: Array of TRADE_TYPES names, or one name for every leg
+    :return: Array of break-even prices
+    """
+    import numpy as np
+
+    signs = _lookup(TRADE_TYPES, trade_types)
+    return np.asarray(strike_prices, dtype=float) + signs * np.abs(np.asarray(premiums, dtype=float))
+
+
+def _legs(strike_prices, premiums, trade_types, quantities):
+    import numpy as np
+
+    strikes = np.asarray(strike_prices, dtype=float)
+    arrays = np.broadcast_arrays(strikes, np.abs(np.asarray(premiums, dtype=float)),
+                                 _lookup(_DIRECTION, trade_types) * np.asarray(quantities, dtype=float),
+                                 _lookup(_IS_CALL, trade_types))
+    return [np.atleast_1d(array) for array in arrays]
+
+
+def _strategy_pnl(strikes, premiums, positions, is_call, prices):
+    """P&L at expiry, legs on the last axis of the leg arrays and prices on the last axis of prices."""
+    import numpy as np
+
+    shape = np.broadcast_shapes(strikes.shape[:-1] + (1,), prices.shape)
+    # Premiums do not depend on the price, so they start off the P&L
+    pnl = np.empty(shape)
+    pnl[...] = -(positions * premiums).sum(axis=-1)[..., None]
+    signs = np.where(is_call, 1.0, -1.0)
+    moneyness = np.empty(shape)
+    # Strategies have a handful of legs; looping over them with one scratch array keeps memory at
+    # strategies x prices
+    for leg in range(strikes.shape[-1]):
+        np.subtract(prices, strikes[..., leg, None], out=moneyness)
+        moneyness *= signs[..., leg, None]
+        np.maximum(moneyness, 0.0, out=moneyness)
+        moneyness *= positions[..., leg, None]
+        pnl += moneyness
+    return pnl
+
+
+def payoff_grid(strike_prices, premiums, trade_types, prices, quantities=1):
+    """
+    Profit or loss at expiry of multi-leg strategies over a grid of underlying prices.
+
+    Legs are on the last axis, so strikes of shape (legs,) describe one
+    strategy and (strategies, legs) many at once; e.g. an iron condor is
+    trade types ['Long Put', 'Short Put', 'Short Call', 'Long Call'] with
+    strikes [90, 95, 105, 110].
+
+    :param strike_prices: Strike price of every leg
+    :param premiums: Premium of every leg (sign is ignored)
+    :param trade_types: TRADE_TYPES name of every leg
+    :param prices: 1-D grid of underlying prices at expiry
+    :param quantities: Contracts per leg, broadcast like the strikes
+    :return: P&L array of shape (prices,) or (strategies, prices)
+    """
+    import numpy as np
+
+    strikes, premiums, positions, is_call = _legs(strike_prices, premiums, trade_types, quantities)
+    return _strategy_pnl(strikes, premiums, positions, is_call, np.asarray(prices, dtype=float))
+
+
+def strategy_break_evens(strike_prices, premiums, trade_types, quantities=1):
+    """
+    Every break-even price of multi-leg strategies, found exactly.
+
+    The P&L at expiry is linear between strikes, so each segment between
+    consecutive strikes (and the tail above the highest) has at most one root;
+    no price grid is needed. Only prices where the P&L changes sign are break-
+    evens: a P&L that touches zero and turns back, or is zero at every price,
+    has none. Where the P&L is zero over a whole range of prices between a loss
+    and a profit, the ends of that range are returned.
+
+    :param strike_prices: Strike price of every leg, (legs,) or (strategies, legs)
+    :param premiums: Premium of every leg (sign is ignored)
+    :param trade_types: TRADE_TYPES name of every leg
+    :param quantities: Contracts per leg, broadcast like the strikes
+    :return: Sorted array of break-even prices, or a list of such arrays for
+             several strategies
+    """
+    import numpy as np
+
+    legs = (strike_prices, premiums, trade_types, quantities)
+    single = np.broadcast(*(np.asarray(value) for value in legs)).ndim <= 1
+    strikes, premiums, positions, is_call = _legs(strike_prices, premiums, trade_types, quantities)
+    strikes, premiums, positions, is_call = (np.atleast_2d(array) for array in (strikes, premiums, positions,
+                                                                                is_call))
+
+    # P&L at a price of zero and at every strike, in increasing order
+    knots = np.concatenate([np.zeros((len(strikes), 1)), np.sort(strikes, axis=-1)], axis=-1)
+    values = _strategy_pnl(strikes, premiums, positions, is_call, knots)
+    slope = (positions * is_call).sum(axis=-1)  # above the highest strike only calls move
+
+    low, high = knots[:, :-1], knots[:, 1:]
+    value_low, value_high = values[:, :-1], values[:, 1:]
+    crossing = value_low * value_high < 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        segment_roots = low - value_low * (high - low) / (value_high - value_low)
+        tail_roots = knots[:, -1] - values[:, -1] / slope
+    tail = (slope != 0) & (tail_roots > knots[:, -1])
+
+    signs = np.sign(values)
+    results = []
+    for row in range(len(strikes)):
+        roots = [segment_roots[row][crossing[row]], tail_roots[row:row + 1][tail[row:row + 1]]]
+        # A run of strikes where the P&L is zero is a break-even only between a loss and a profit
+        zeros = np.flatnonzero(values[row] == 0)
+        for run in np.split(zeros, np.flatnonzero(np.diff(zeros) > 1) + 1) if zeros.size else ():
+            before = signs[row, run[0] - 1] if run[0] > 0 else 0.0
+            after = signs[row, run[-1] + 1] if run[-1] + 1 < knots.shape[1] else np.sign(slope[row])
+            if before * after < 0:
+                roots.append(knots[row, [run[0], run[-1]]])
+        results.append(np.unique(np.concatenate(roots)))
+    return results[0] if single else results
@@ -0,0 +1,248 @@
+"""
+Multi-period portfolio performance from position weights and closing prices.
+
+portfolio_returns turns a (dates x tickers) price matrix and a weight schedule
+into one holding period return per price period, vectorized over positions
+and dates. link_returns links those geometrically into calendar periods
+(e.g. months) and rolling_returns into trailing windows. HPR is ending over
+beginning value and HPY is HPR - 1, as in the holding period calculator.
+
+Command line usage:
+    python -m finance_tools.performance weights.csv 2005-01-01 2025-01-01 --frequency monthly --window 12
+"""
+import argparse
+import sys
+
+from finance_tools.batch import DEFAULT_WORKERS, fetch_closing_prices_batch
+from finance_tools.instrumentation import add_arguments, configure
+
+REBALANCE_MODES = ('weights', 'always')
+FREQUENCIES = {'daily': None, 'weekly': 'W', 'monthly': 'ME', 'quarterly': 'QE', 'yearly': 'YE'}
+
+
+def _weight_schedule(weights, dates):
+    """Weights as a DataFrame indexed by rebalance date, from a dict, Series or DataFrame."""
+    import pandas as pd
+
+    if isinstance(weights, dict):
+        weights = pd.Series(weights, dtype=float)
+    if isinstance(weights, pd.Series):
+        weights = weights.to_frame().T
+        weights.index = dates[:1]
+    weights = weights.copy()
+    index = pd.DatetimeIndex(weights.index)
+    weights.index = index.tz_localize(None) if index.tz is not None else index
+    return weights.sort_index()
+
+
+def _to_hpr_frame(hpr, index):
+    import pandas as pd
+
+    return pd.DataFrame({'hpr': hpr, 'hpy': hpr - 1}, index=index)
+
+
+def portfolio_returns(prices, weights, rebalance='weights'):
+    """
+    Holding period return of a portfolio for every period of a price matrix.
+
+    Each row of the weight schedule sets the portfolio to those weights at the
+    close of the last price date on or before its date. With rebalance='weights'
+    the positions then drift with their prices until the next row; with
+    rebalance='always' they are reset to the latest weights every period.
+    Weights need not sum to 1: the remainder is held as cash earning nothing,
+    and negative weights are short positions. A missing price is carried
+    forward from the previous date; a position without any price yet earns
+    nothing.
+
+    :param prices: DataFrame of closing prices, dates x tickers
+    :param weights: Weight schedule as a DataFrame (dates x tickers), or a dict
+                    or Series of weights set on the first price date
+    :param rebalance: 'weights' or 'always'
+    :return: DataFrame with hpr and hpy columns, one row per period ending on
+             each price date after the first rebalance
+    """
+    import numpy as np
+
+    if rebalance not in REBALANCE_MODES:
+        raise ValueError(f"Rebalance must be one of {', '.join(REBALANCE_MODES)}.")
+    prices = prices.sort_index().ffill()
+    dates = prices.index
+    if len(dates) < 2:
+        raise ValueError("At least two price dates are needed to compute returns.")
+
+    schedule = _weight_schedule(weights, dates)
+    missing = schedule.columns.difference(prices.columns)
+    if len(missing):
+        raise ValueError(f"No prices for: {', '.join(map(str, missing))}.")
+    schedule = schedule.reindex(columns=prices.columns).fillna(0.0)
+
+    # Each schedule row takes effect on the last price date on or before it (the first if earlier)
+    naive_dates = dates.tz_localize(None) if dates.tz is not None else dates
+    positions = np.clip(np.searchsorted(naive_dates, schedule.index, side='right') - 1, 0, None)
+    count = len(dates)
+    weight_rows = np.zeros((count, prices.shape[1]))
+    is_rebalance = np.zeros(count, dtype=bool)
+    weight_rows[positions] = schedule.to_numpy(dtype=float)  # a later row for the same date wins
+    is_rebalance[positions] = True
+    if rebalance == 'always':
+        # Carry the latest weights forward so every date after the first is a rebalance
+        first = positions.min()
+        source = np.maximum.accumulate(np.where(is_rebalance, np.arange(count), -1))
+        weight_rows[first:] = weight_rows[source[first:]]
+        is_rebalance[first:] = True
+
+    # For the period ending at t, base[t] is the last rebalance at or before t - 1
+    base = np.maximum.accumulate(np.where(is_rebalance, np.arange(count), -1))[:-1]
+    periods = np.nonzero(base >= 0)[0] + 1
+    base = base[periods - 1]
+
+    values = prices.to_numpy(dtype=float)
+    held = weight_rows[base]
+    cash = 1.0 - held.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth_now = values[periods] / values[base]
+        growth_before = values[periods - 1] / values[base]
+    growth_now[~np.isfinite(growth_now)] = 1.0
+    growth_before[~np.isfinite(growth_before)] = 1.0
+
+    # Value of one unit invested at the rebalance, now and one period earlier
+    value_now = np.einsum('ij,ij->i', held, growth_now) + cash
+    value_before = np.einsum('ij,ij->i', held, growth_before) + cash
+    return _to_hpr_frame(value_now / value_before, dates[periods])
+
+
+def link_returns(returns, frequency='monthly'):
+    """
+    Geometrically link period returns into calendar periods.
+
+    :param returns: DataFrame from portfolio_returns (or a Series of HPRs)
+    :param frequency: 'daily', 'weekly', 'monthly', 'quarterly' or 'yearly'
+    :return: DataFrame with hpr and hpy per calendar period, indexed by period end
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Frequency must be one of {', '.join(FREQUENCIES)}.")
+    hpr = returns['hpr'] if hasattr(returns, 'columns') else returns
+    if FREQUENCIES[frequency] is None:
+        return _to_hpr_frame(hpr.to_numpy(), hpr.index)
+
+    # Wealth at the end of each calendar period, starting from 1 before the first return
+    wealth = hpr.cumprod().resample(FREQUENCIES[frequency]).last().ffill()
+    linked = wealth / wealth.shift(1, fill_value=1.0)
+    return _to_hpr_frame(linked.to_numpy(), linked.index)
+
+
+def rolling_returns(returns, window):
+    """
+    Geometrically linked return over a trailing window of periods.
+
+    :param returns: DataFrame from portfolio_returns or link_returns (or a Series of HPRs)
+    :param window: Number of periods in the window
+    :return: DataFrame with hpr and hpy, NaN until a full window is available
+    """
+    import numpy as np
+
+    if window < 1:
+        raise ValueError("Window must be at least one period.")
+    hpr = returns['hpr'] if hasattr(returns, 'columns') else returns
+    # Sums of logs instead of ratios of a running product, so a window never depends on the whole history
+    logs = np.log(hpr.to_numpy(dtype=float))
+    totals = np.concatenate([[0.0], np.cumsum(logs)])
+    linked = np.full(len(logs), np.nan)
+    linked[window - 1:] = np.exp(totals[window:] - totals[:-window])
+    return _to_hpr_frame(linked, hpr.index)
+
+
+def portfolio_performance(weights, start_date, end_date, frequency='monthly', window=None, rebalance='weights',
+                          max_workers=DEFAULT_WORKERS, store=None):
+    """
+    Performance of a weighted book over a date range, from cached daily closes.
+
+    :param weights: Weight schedule, as for portfolio_returns
+    :param start_date: Start date in 'YYYY-MM-DD' format
+    :param end_date: End date in 'YYYY-MM-DD' format
+    :param frequency: Calendar period the daily returns are linked into
+    :param window: If given, also add rolling_hpr and rolling_hpy over this many periods
+    :param rebalance: 'weights' or 'always', as for portfolio_returns
+    :param max_workers: Maximum number of tickers fetched at the same time
+    :param store: PriceStore to read through, defaults to the shared store
+    :return: (performance, errors) where errors maps each ticker whose prices
+             could not be fetched to a message. Those tickers are left out, so
+             their weight is held as cash.
+    """
+    import pandas as pd
+
+    if isinstance(weights, dict):
+        weights = pd.Series(weights, dtype=float)
+    tickers = list(weights.index if isinstance(weights, pd.Series) else weights.columns)
+    closes, errors = fetch_closing_prices_batch(tickers, start_date, end_date, max_workers=max_workers,
+                                                store=store)
+    if closes.empty:
+        raise ValueError("No prices available for any ticker in the date range.")
+    closes.index = closes.index.tz_localize(None) if closes.index.tz is not None else closes.index
+    closes.index = closes.index.normalize()
+
+    if isinstance(weights, pd.Series):
+        weights = weights.rename(index=str.upper).drop(list(errors), errors='ignore')
+    else:
+        weights = weights.rename(columns=str.upper).drop(columns=list(errors), errors='ignore')
+    performance = link_returns(portfolio_returns(closes, weights, rebalance=rebalance), frequency)
+    if window:
+        rolling = rolling_returns(performance, window)
+        performance['rolling_hpr'] = rolling['hpr']
+        performance['rolling_hpy'] = rolling['hpy']
+    return performance, errors
+
+
+def load_weights(path):
+    """
+    Read a weight schedule from a .csv file.
+
+    Either two columns, ticker and weight, for fixed weights; or a date column
+    followed by one column of weights per ticker, one row per rebalance.
+
+    :return: Series of weights, or DataFrame indexed by rebalance date
+    """
+    import pandas as pd
+
+    frame = pd.read_csv(path)
+    columns = [str(column).strip().lower() for column in frame.columns]
+    if columns == ['ticker', 'weight']:
+        return pd.Series(frame.iloc[:, 1].to_numpy(dtype=float), index=frame.iloc[:, 0].str.upper())
+    frame = frame.set_index(frame.columns[0])
+    frame.index = pd.to_datetime(frame.index)
+    return frame.astype(float)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-period holding period returns of a weighted book.")
+    parser.add_argument('weights', help="Weights file (.csv): ticker,weight rows or a dated weight schedule")
+    parser.add_argument('start_date', help="Start date (YYYY-MM-DD)")
+    parser.add_argument('end_date', help="End date (YYYY-MM-DD)")
+    parser.add_argument('--frequency', choices=sorted(FREQUENCIES), default='monthly')
+    parser.add_argument('--window', type=int, help="Also report rolling returns over this many periods")
+    parser.add_argument('--rebalance', choices=REBALANCE_MODES, default='weights',
+                        help="Reset to the weights only on their dates, or every day")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Concurrent downloads")
+    parser.add_argument('--output', help="Write the series to this .csv file")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    configure(args)
+
+    performance, errors = portfolio_performance(load_weights(args.weights), args.start_date, args.end_date,
+                                                frequency=args.frequency, window=args.window,
+                                                rebalance=args.rebalance, max_workers=args.workers)
+    for ticker, message in sorted(errors.items()):
+        print(f"{ticker}: {message}", file=sys.stderr)
+
+    if args.output:
+        performance.to_csv(args.output)
+        print(f"Data saved to {args.output}")
+    else:
+        print(performance.to_string())
+    total = performance['hpr'].prod()
+    print(f"Total HPR: {total:.4f}  HPY: {total - 1:.2%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
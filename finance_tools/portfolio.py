@@ -0,0 +1,138 @@
+"""
+Holding period return and yield calculations used by the portfolio calculator.
+
+holding_period and position_weight work on one position. Portfolio keeps a
+whole book in NumPy arrays and computes every position in one vectorized pass.
+"""
+from collections import namedtuple
+
+
+def holding_period(shares, start_price, end_price):
+    """
+    Market values, holding period return and yield of one position.
+
+    :param shares: Number of shares held
+    :param start_price: Price at the start of the period
+    :param end_price: Price at the end of the period
+    :return: (begin_market_value, end_market_value, hpr, hpy)
+    """
+    begin_market_value = shares * start_price
+    end_market_value = shares * end_price
+    hpr = end_market_value / begin_market_value if begin_market_value != 0 else 0
+    hpy = hpr - 1
+    return begin_market_value, end_market_value, hpr, hpy
+
+
+def position_weight(begin_market_value, total_market_value_beginning):
+    """Weight of a position in the portfolio by beginning market value."""
+    return (begin_market_value / total_market_value_beginning) if total_market_value_beginning != 0 else 0
+
+
+PortfolioResult = namedtuple('PortfolioResult', ['begin_market_value', 'end_market_value', 'hpr', 'hpy',
+                                                 'weight', 'weighted_hpy', 'total_begin', 'total_end'])
+
+# Accepted spellings of the position file columns
+_COLUMN_ALIASES = {
+    'symbol': 'symbol', 'ticker': 'symbol',
+    'shares': 'shares',
+    'start_price': 'start_price', 'starting_price': 'start_price',
+    'end_price': 'end_price', 'ending_price': 'end_price',
+}
+
+
+class Portfolio:
+    """
+    Positions held as NumPy arrays, so the whole book is computed in one pass.
+
+    A NaN in shares, start_price or end_price marks a blank or invalid row;
+    such rows get NaN results and are left out of the totals and weights.
+
+    :param shares: Shares held per position
+    :param start_price: Price per position at the start of the period
+    :param end_price: Price per position at the end of the period
+    :param symbols: Optional position labels
+    """
+
+    def __init__(self, shares=(), start_price=(), end_price=(), symbols=None):
+        import numpy as np
+
+        self.shares = np.array(shares, dtype=float)
+        self.start_price = np.array(start_price, dtype=float)
+        self.end_price = np.array(end_price, dtype=float)
+        if not len(self.shares) == len(self.start_price) == len(self.end_price):
+            raise ValueError("Shares, starting prices and ending prices must have the same length.")
+        self.symbols = list(symbols) if symbols is not None else [''] * len(self.shares)
+
+    def __len__(self):
+        return len(self.shares)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Load positions from a .csv, .xlsx or .xls file.
+
+        The file needs Shares, Starting Price and Ending Price columns (start_price
+        and end_price work too); a Symbol or Ticker column is optional. Cells that
+        are not numbers become blank rows.
+        """
+        import pandas as pd
+
+        if path.lower().endswith(('.xlsx', '.xls')):
+            frame = pd.read_excel(path)
+        elif path.lower().endswith('.csv'):
+            frame = pd.read_csv(path)
+        else:
+            raise ValueError("Positions file must be .csv, .xlsx or .xls.")
+
+        frame = frame.rename(columns=lambda name: _COLUMN_ALIASES.get(str(name).strip().lower().replace(' ', '_'),
+                                                                      name))
+        missing = [column for column in ('shares', 'start_price', 'end_price') if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Positions file is missing the column(s): {', '.join(missing)}.")
+
+        values = [pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float)
+                  for column in ('shares', 'start_price', 'end_price')]
+        symbols = frame['symbol'].fillna('').astype(str).tolist() if 'symbol' in frame.columns else None
+        return cls(*values, symbols=symbols)
+
+    def resize(self, size):
+        """Grow with blank rows, or truncate, to exactly size positions."""
+        import numpy as np
+
+        extra = size - len(self)
+        for name in ('shares', 'start_price', 'end_price'):
+            values = getattr(self, name)
+            setattr(self, name, np.concatenate([values, np.full(extra, np.nan)]) if extra > 0 else values[:size])
+        self.symbols = self.symbols[:size] + [''] * max(extra, 0)
+
+    def set_position(self, index, shares, start_price, end_price):
+        """Set one row; pass NaN for a value that is blank or invalid."""
+        self.shares[index] = shares
+        self.start_price[index] = start_price
+        self.end_price[index] = end_price
+
+    def compute(self):
+        """
+        Market values, HPR, HPY, weights and weighted HPY of every position.
+
+        :return: PortfolioResult of arrays (one value per position), plus the
+                 total beginning and ending market values of the valid rows
+        """
+        import numpy as np
+
+        begin_market_value = self.shares * self.start_price
+        end_market_value = self.shares * self.end_price
+        valid = np.isfinite(begin_market_value) & np.isfinite(end_market_value)
+        begin_market_value[~valid] = np.nan
+        end_market_value[~valid] = np.nan
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hpr = np.where(begin_market_value != 0, end_market_value / begin_market_value, 0.0)
+        hpr[~valid] = np.nan
+        hpy = hpr - 1
+
+        total_begin = float(begin_market_value[valid].sum())
+        total_end = float(end_market_value[valid].sum())
+        weight = begin_market_value / total_begin if total_begin != 0 else np.where(valid, 0.0, np.nan)
+        return PortfolioResult(begin_market_value, end_market_value, hpr, hpy, weight, hpy * weight,
+                               total_begin, total_end)
@@ -0,0 +1,417 @@
+"""
+Persistent on-disk cache for price history.
+
+Bars are stored in a SQLite database keyed by ticker, interval and timestamp.
+For every (ticker, interval) pair the store also remembers which date spans
+have already been downloaded, so a request only goes to the market data provider for the gaps it
+has not seen before. Repeat queries are served straight from disk.
+
+Weekly, monthly, quarterly and yearly bars form an aggregation pyramid on top
+of the daily bars: each complete period is aggregated once and stored under
+an interval such as '1d:monthly', and only periods touched by newly stored
+daily bars are rebuilt. Partial periods at either end of a request are
+aggregated on the fly from the daily bars.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+
+from finance_tools.instrumentation import stage
+
+# Columns returned by MarketDataProvider.history, in the order they are stored
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+_SQL_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'dividends', 'stock_splits']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    open REAL, high REAL, low REAL, close REAL,
+    volume REAL, dividends REAL, stock_splits REAL,
+    PRIMARY KEY (ticker, interval, ts)
+);
+CREATE TABLE IF NOT EXISTS spans (
+    ticker TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS spans_key ON spans (ticker, interval);
+"""
+
+_TS_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Frequencies built from daily bars by the aggregation pyramid, with their pandas Period aliases
+AGGREGATE_FREQUENCIES = {'weekly': 'W', 'monthly': 'M', 'quarterly': 'Q', 'yearly': 'Y'}
+
+
+def data_dir():
+    """
+    Directory used for the local data stores.
+
+    Defaults to ~/.finance_tools and can be moved with the FINANCE_TOOLS_HOME
+    environment variable.
+    """
+    return os.environ.get('FINANCE_TOOLS_HOME', os.path.join(os.path.expanduser('~'), '.finance_tools'))
+
+
+def provider_history(ticker, start_date, end_date, interval):
+    """
+    Download price history for one ticker from the active market data provider.
+
+    :param ticker: Stock or index ticker symbol
+    :param start_date: Start date in 'YYYY-MM-DD' format (inclusive)
+    :param end_date: End date in 'YYYY-MM-DD' format (exclusive)
+    :param interval: Data interval, e.g. '1d'
+    :return: DataFrame with the provider's history columns
+    """
+    from finance_tools.providers import get_provider
+
+    with stage('fetch.history', ticker=ticker, interval=interval, start=start_date, end=end_date) as s:
+        data = get_provider().history(ticker, start_date, end_date, interval=interval)
+        s.update(data)
+    return data
+
+
+def _missing_spans(covered, start_date, end_date):
+    """
+    Return the parts of [start_date, end_date) not covered by any span.
+
+    :param covered: List of (start, end) date strings, end exclusive
+    """
+    gaps = []
+    cursor = start_date
+    for span_start, span_end in sorted(covered):
+        if span_end <= cursor:
+            continue
+        if span_start >= end_date:
+            break
+        if span_start > cursor:
+            gaps.append((cursor, span_start))
+        cursor = max(cursor, span_end)
+        if cursor >= end_date:
+            break
+    if cursor < end_date:
+        gaps.append((cursor, end_date))
+    return gaps
+
+
+def _subtract_span(spans, start, end):
+    """Remove [start, end) from a list of (start, end) spans."""
+    remaining = []
+    for span_start, span_end in spans:
+        if span_end <= start or span_start >= end:
+            remaining.append((span_start, span_end))
+            continue
+        if span_start < start:
+            remaining.append((span_start, start))
+        if span_end > end:
+            remaining.append((end, span_end))
+    return remaining
+
+
+def _aggregate_interval(frequency):
+    """Interval key the aggregated bars of a frequency are stored under."""
+    return f'1d:{frequency}'
+
+
+def _period_bounds(frequency, day):
+    """
+    First day of the period containing day, and of the period after it.
+
+    :param day: Date in 'YYYY-MM-DD' format, or a Timestamp
+    :return: (start, end) in 'YYYY-MM-DD' format
+    """
+    import pandas as pd
+
+    period = pd.Timestamp(day).to_period(AGGREGATE_FREQUENCIES[frequency])
+    return period.start_time.strftime('%Y-%m-%d'), (period + 1).start_time.strftime('%Y-%m-%d')
+
+
+def aggregate_bars(daily, frequency):
+    """
+    Aggregate daily bars into bars of a coarser frequency.
+
+    Open is the first open, High the highest high, Low the lowest low, Close
+    the last close, Volume and Dividends are summed and Stock Splits are
+    multiplied (0 meaning no split). Missing values are skipped and periods
+    without any bar are kept, with the same result and labels (the last day
+    of each period) as the matching resample() aggregations.
+
+    :param daily: DataFrame of daily bars with the COLUMNS columns, sorted by date
+    :param frequency: One of AGGREGATE_FREQUENCIES, e.g. 'monthly'
+    :return: DataFrame with the COLUMNS columns, one row per period
+    """
+    import numpy as np
+    import pandas as pd
+
+    if daily.empty:
+        return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name='Date'), dtype=float)
+
+    # One reduceat per column over the runs of equal period ordinals beats seven resample() passes
+    ordinals = daily.index.to_period(AGGREGATE_FREQUENCIES[frequency]).asi8
+    starts = np.flatnonzero(np.r_[True, ordinals[1:] != ordinals[:-1]])
+    ends = np.r_[starts[1:], len(ordinals)]
+    values = daily.reindex(columns=COLUMNS).to_numpy(dtype=float)
+    missing = np.isnan(values)
+    positions = np.arange(len(values))[:, None]
+
+    first = np.minimum.reduceat(np.where(missing, len(values), positions), starts)
+    last = np.maximum.reduceat(np.where(missing, -1, positions), starts)
+    columns = np.arange(len(COLUMNS))
+    with np.errstate(invalid='ignore'):
+        bars = np.column_stack([
+            np.where(first[:, 0] < ends, values[np.minimum(first[:, 0], len(values) - 1), 0], np.nan),
+            np.fmax.reduceat(values[:, 1], starts),
+            np.fmin.reduceat(values[:, 2], starts),
+            np.where(last[:, 3] >= starts, values[np.maximum(last[:, 3], 0), 3], np.nan),
+            np.add.reduceat(np.nan_to_num(values[:, 4]), starts),
+            np.add.reduceat(np.nan_to_num(values[:, 5]), starts),
+            np.multiply.reduceat(np.where(missing[:, 6] | (values[:, 6] == 0), 1.0, values[:, 6]), starts),
+        ])
+    bars[:, 6][bars[:, 6] == 1.0] = 0.0
+
+    # Periods without bars in between get empty rows, as in resample()
+    periods = pd.period_range(pd.Period(ordinal=ordinals[0], freq=AGGREGATE_FREQUENCIES[frequency]),
+                              pd.Period(ordinal=ordinals[-1], freq=AGGREGATE_FREQUENCIES[frequency]))
+    full = np.full((len(periods), len(columns)), np.nan)
+    full[:, 4:7] = (0.0, 0.0, 0.0)
+    full[ordinals[starts] - ordinals[0]] = bars
+    index = periods.to_timestamp(how='end').normalize()
+    return pd.DataFrame(full, columns=COLUMNS, index=pd.DatetimeIndex(index, name='Date'))
+
+
+def _merge_spans(spans):
+    """Merge overlapping or touching (start, end) spans."""
+    merged = []
+    for span_start, span_end in sorted(spans):
+        if merged and span_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], span_end))
+        else:
+            merged.append((span_start, span_end))
+    return merged
+
+
+class PriceStore:
+    """
+    SQLite-backed price history store that only downloads missing date gaps.
+
+    :param path: Database file, defaults to prices.sqlite in data_dir()
+    :param fetcher: Callable (ticker, start_date, end_date, interval) -> DataFrame
+                    used to fill gaps, defaults to provider_history
+    """
+
+    def __init__(self, path=None, fetcher=provider_history):
+        self.path = path or os.path.join(data_dir(), 'prices.sqlite')
+        self.fetcher = fetcher
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def history(self, ticker, start_date, end_date, interval='1d'):
+        """
+        Return price history, downloading only the spans not already on disk.
+
+        :param ticker: Stock or index ticker symbol
+        :param start_date: Start date in 'YYYY-MM-DD' format (inclusive)
+        :param end_date: End date in 'YYYY-MM-DD' format (exclusive, as in yfinance)
+        :param interval: Data interval, e.g. '1d', or one of AGGREGATE_FREQUENCIES
+                         ('weekly', 'monthly', 'quarterly', 'yearly') to get bars
+                         aggregated from the daily history
+        :return: DataFrame indexed by timezone-naive date with the COLUMNS columns
+        """
+        ticker = ticker.upper()
+        with stage('price_cache.history', ticker=ticker, interval=interval) as s:
+            if interval in AGGREGATE_FREQUENCIES:
+                data = self._aggregated(ticker, start_date, end_date, interval)
+            else:
+                self._fetch_missing(ticker, interval, start_date, end_date)
+                data = self._load(ticker, interval, start_date, end_date)
+            s.update(data)
+        return data
+
+    def update(self, ticker, start_date, end_date, interval='1d'):
+        """
+        Download the spans of a range not already on disk, as history() does, without loading the bars.
+
+        :param ticker: Stock or index ticker symbol
+        :param start_date: Start date in 'YYYY-MM-DD' format (inclusive)
+        :param end_date: End date in 'YYYY-MM-DD' format (exclusive)
+        :param interval: Data interval, e.g. '1d'
+        :return: Number of bars added or changed. Today's bar is fetched again on
+                 every call and counts only when it has moved.
+        """
+        ticker = ticker.upper()
+        with stage('price_cache.update', ticker=ticker, interval=interval) as s:
+            changed = self._fetch_missing(ticker, interval, start_date, end_date)
+            s.update(rows=changed)
+        return changed
+
+    def _fetch_missing(self, ticker, interval, start_date, end_date):
+        changed = 0
+        for gap_start, gap_end in self._missing(ticker, interval, start_date, end_date):
+            data = self.fetcher(ticker, gap_start, gap_end, interval)
+            changed += self._store(ticker, interval, gap_start, gap_end, data)
+        return changed
+
+    def _aggregated(self, ticker, start_date, end_date, frequency):
+        import pandas as pd
+
+        self._fetch_missing(ticker, '1d', start_date, end_date)
+
+        # Complete periods inside the request come from the pyramid. A period is only complete
+        # once it has ended, because today's daily bar is still moving
+        first_start, first_end = _period_bounds(frequency, start_date)
+        full_start = start_date if first_start == start_date else first_end
+        full_end = _period_bounds(frequency, min(end_date, date.today().isoformat()))[0]
+        if full_start >= full_end:
+            return aggregate_bars(self._load(ticker, '1d', start_date, end_date), frequency)
+
+        key = _aggregate_interval(frequency)
+        for gap_start, gap_end in self._missing(ticker, key, full_start, full_end):
+            self._store(ticker, key, gap_start, gap_end,
+                        aggregate_bars(self._load(ticker, '1d', gap_start, gap_end), frequency))
+
+        parts = [aggregate_bars(self._load(ticker, '1d', start_date, full_start), frequency),
+                 self._load(ticker, key, full_start, full_end),
+                 aggregate_bars(self._load(ticker, '1d', full_end, end_date), frequency)]
+        # Nothing at all (e.g. an unknown ticker) is the empty frame _load gives back
+        parts = [part for part in parts if not part.empty] or parts[1:2]
+        data = pd.concat(parts)
+        data.index.name = 'Date'
+        return data
+
+    def clear(self, ticker=None, interval=None):
+        """
+        Drop cached bars, e.g. after a split has changed the adjusted history.
+
+        :param ticker: Only clear this ticker (all tickers if None)
+        :param interval: Only clear this interval (all intervals if None)
+        """
+        clauses, params = [], []
+        if ticker is not None:
+            clauses.append('ticker = ?')
+            params.append(ticker.upper())
+        if interval is not None:
+            # Aggregated bars are derived from the daily ones and go with them
+            intervals = [interval]
+            if interval == '1d':
+                intervals += [_aggregate_interval(frequency) for frequency in AGGREGATE_FREQUENCIES]
+            clauses.append(f"interval IN ({', '.join('?' * len(intervals))})")
+            params.extend(intervals)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock, self._connection() as conn:
+            conn.execute(f'DELETE FROM bars{where}', params)
+            conn.execute(f'DELETE FROM spans{where}', params)
+
+    def row_count(self, ticker, interval='1d'):
+        """Number of bars stored for a ticker and interval."""
+        with self._connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM bars WHERE ticker = ? AND interval = ?',
+                                (ticker.upper(), interval)).fetchone()[0]
+
+    def _missing(self, ticker, interval, start_date, end_date):
+        with self._connection() as conn:
+            covered = conn.execute('SELECT start, end FROM spans WHERE ticker = ? AND interval = ?',
+                                   (ticker, interval)).fetchall()
+        return _missing_spans(covered, start_date, end_date)
+
+    def _store(self, ticker, interval, gap_start, gap_end, data):
+        """Save the bars fetched for a gap and mark it covered; return the number of bars added or changed."""
+        import pandas as pd
+
+        rows = []
+        if data is None or data.empty:
+            # A range without bars (a weekend or holiday) is covered like any other, but nothing at
+            # all for the ticker (a bad ticker) is not remembered, so it is retried next time
+            if not self.row_count(ticker, interval):
+                return 0
+        else:
+            # Remove timezone information from datetime index
+            if data.index.tz is not None:
+                data.index = data.index.tz_localize(None)
+
+            frame = data.reindex(columns=COLUMNS)
+            rows = [(ticker, interval, ts) + tuple(None if pd.isna(value) else float(value) for value in values)
+                    for ts, values in zip(frame.index.strftime(_TS_FORMAT), frame.itertuples(index=False))]
+
+        # Today's bar is still moving, so never mark it (or the future) as covered
+        covered_end = min(gap_end, date.today().isoformat())
+
+        with self._lock, self._connection() as conn:
+            if rows:
+                # Only bars that are new or differ from the stored ones are written
+                stamps = [row[2] for row in rows]
+                stored = {row[0]: row[1:] for row in conn.execute(
+                    f"SELECT ts, {', '.join(_SQL_COLUMNS)} FROM bars "
+                    'WHERE ticker = ? AND interval = ? AND ts >= ? AND ts <= ?',
+                    (ticker, interval, min(stamps), max(stamps)))}
+                rows = [row for row in rows if stored.get(row[2]) != row[3:]]
+            conn.executemany(f"INSERT OR REPLACE INTO bars (ticker, interval, ts, {', '.join(_SQL_COLUMNS)}) "
+                             f"VALUES (?, ?, ?{', ?' * len(_SQL_COLUMNS)})", rows)
+            if gap_start < covered_end:
+                spans = conn.execute('SELECT start, end FROM spans WHERE ticker = ? AND interval = ?',
+                                     (ticker, interval)).fetchall()
+                spans = _merge_spans(spans + [(gap_start, covered_end)])
+                conn.execute('DELETE FROM spans WHERE ticker = ? AND interval = ?', (ticker, interval))
+                conn.executemany('INSERT INTO spans (ticker, interval, start, end) VALUES (?, ?, ?, ?)',
+                                 [(ticker, interval, s, e) for s, e in spans])
+            if interval == '1d' and rows:
+                stamps = [row[2] for row in rows]
+                self._invalidate_aggregates(conn, ticker, min(stamps), max(stamps))
+        return len(rows)
+
+    def _invalidate_aggregates(self, conn, ticker, first, last):
+        """Drop aggregated periods that contain any day from first to last, so they are rebuilt."""
+        for frequency in AGGREGATE_FREQUENCIES:
+            key = _aggregate_interval(frequency)
+            cut_start = _period_bounds(frequency, first)[0]
+            cut_end = _period_bounds(frequency, last)[1]
+            spans = conn.execute('SELECT start, end FROM spans WHERE ticker = ? AND interval = ?',
+                                 (ticker, key)).fetchall()
+            remaining = _subtract_span(spans, cut_start, cut_end)
+            if remaining == spans:
+                continue
+            conn.execute('DELETE FROM bars WHERE ticker = ? AND interval = ? AND ts >= ? AND ts < ?',
+                         (ticker, key, cut_start, cut_end))
+            conn.execute('DELETE FROM spans WHERE ticker = ? AND interval = ?', (ticker, key))
+            conn.executemany('INSERT INTO spans (ticker, interval, start, end) VALUES (?, ?, ?, ?)',
+                             [(ticker, key, s, e) for s, e in remaining])
+
+    def _load(self, ticker, interval, start_date, end_date):
+        import pandas as pd
+
+        with self._connection() as conn:
+            rows = conn.execute(f"SELECT ts, {', '.join(_SQL_COLUMNS)} FROM bars "
+                                'WHERE ticker = ? AND interval = ? AND ts >= ? AND ts < ? ORDER BY ts',
+                                (ticker, interval, start_date, end_date)).fetchall()
+        data = pd.DataFrame([row[1:] for row in rows], columns=COLUMNS,
+                            index=pd.to_datetime([row[0] for row in rows], format=_TS_FORMAT))
+        data.index.name = 'Date'
+        return data
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_price_store():
+    """Return the shared PriceStore used by the GUI tools."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = PriceStore()
+        return _default_store
@@ -0,0 +1,68 @@
+"""
+Closing price history and file export used by the closing price scrapper.
+"""
+from finance_tools.exporters import export
+from finance_tools.instrumentation import stage
+from finance_tools.price_cache import get_price_store
+
+# File formats offered by the scrapper; each is also the file extension
+SAVE_FORMATS = ('xlsx', 'csv', 'parquet', 'feather')
+
+
+def fetch_closing_prices(ticker, start_date, end_date, interval='1d', monthly=False):
+    """
+    Fetch closing prices for a given ticker, start date, end date, and interval.
+
+    :param ticker: Stock or index ticker symbol
+    :param start_date: Start date in 'YYYY-MM-DD' format
+    :param end_date: End date in 'YYYY-MM-DD' format
+    :param interval: Data interval ('1d' for daily, '1mo' for monthly, or 'weekly', 'monthly',
+                     'quarterly' or 'yearly' bars aggregated from the daily history)
+    :param monthly: If True, return the last trading day of each month
+    :return: DataFrame containing the closing prices
+    """
+    # Monthly closes of daily data come from the price cache's aggregation pyramid
+    if monthly and interval == '1d':
+        interval, monthly = 'monthly', False
+
+    # Served from the local price cache; only dates not fetched before go to the provider
+    data = get_price_store().history(ticker, start_date, end_date, interval=interval)
+
+    # If monthly, get the last trading day of each month
+    if monthly:
+        with stage('prices.resample', ticker=ticker, rows=len(data)):
+            data = data.resample('M').last()  # Resample to monthly and get the last entry (last trading day)
+
+    return data['Close']
+
+
+def save_prices(ticker, data, interval, file_format='xlsx', compression=None):
+    """
+    Save the closing prices to a file in the chosen format.
+
+    :param ticker: Stock or index ticker symbol
+    :param data: DataFrame containing closing prices
+    :param interval: Data interval ('daily' or 'monthly')
+    :param file_format: 'xlsx', 'csv', 'parquet' or 'feather'
+    :param compression: Optional codec supported by the format (see finance_tools.exporters)
+    :return: Name of the file written
+    """
+    if file_format not in SAVE_FORMATS:
+        raise ValueError(f"Unknown file format '{file_format}'.")
+
+    filename = f'{ticker}_{interval}_closing_prices.{file_format}'
+    export(data, filename, file_format=file_format, compression=compression,
+           sheet_name=f'{interval.capitalize()} Closing Prices')
+    return filename
+
+
+def save_to_excel(ticker, data, interval):
+    """
+    Save the closing prices to an Excel file.
+
+    :param ticker: Stock or index ticker symbol
+    :param data: DataFrame containing closing prices
+    :param interval: Data interval ('daily' or 'monthly')
+    :return: Name of the file written
+    """
+    return save_prices(ticker, data, interval, file_format='xlsx')
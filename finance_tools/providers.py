@@ -0,0 +1,301 @@
+"""
+Pluggable market-data providers.
+
+Every price, dividend, info and EPS lookup in finance_tools goes through the
+active MarketDataProvider. YahooProvider talks to Yahoo Finance via yfinance.
+RecordingProvider wraps another provider and saves everything it returns to a
+directory, and ReplayProvider serves those recordings back without any network
+access, so the tools and benchmarks can run deterministically offline.
+SyntheticProvider generates seeded data for the benchmarks and tests.
+
+The active provider is chosen with set_provider() or the FINANCE_TOOLS_PROVIDER
+environment variable:
+    yahoo            live Yahoo Finance (default)
+    record:<dir>     live Yahoo Finance, recording every response into <dir>
+    replay:<dir>     serve recordings from <dir>, never touching the network
+"""
+import json
+import os
+import threading
+import time
+
+
+class MarketDataProvider:
+    """Interface implemented by every market data source."""
+
+    # Intraday interval -> (longest range of one history request, oldest day served), both in days.
+    # Intervals not listed have no limits.
+    intraday_windows = {}
+
+    def history(self, ticker, start_date, end_date, interval='1d'):
+        """
+        Price history with Open, High, Low, Close, Volume, Dividends and Stock Splits columns.
+
+        :param start_date: Start date in 'YYYY-MM-DD' format (inclusive)
+        :param end_date: End date in 'YYYY-MM-DD' format (exclusive)
+        """
+        raise NotImplementedError
+
+    def dividends(self, ticker):
+        """Full dividend history as a Series indexed by payment date."""
+        raise NotImplementedError
+
+    def info(self, ticker):
+        """Security information dict (longName, currency, trailingEps, ...)."""
+        raise NotImplementedError
+
+    def trailing_eps(self, ticker):
+        """Trailing EPS, or None if the provider has no value."""
+        return self.info(ticker).get('trailingEps', None)
+
+    def reported_eps(self, ticker):
+        """Reported quarterly EPS as a Series indexed by the date and time each result was announced."""
+        raise NotImplementedError
+
+
+class YahooProvider(MarketDataProvider):
+    """
+    Live data from Yahoo Finance through yfinance.
+
+    Requests go through the shared session of a RequestScheduler, which reuses
+    connections, sends identical concurrent requests once and keeps to the
+    request rate limit.
+
+    :param scheduler: RequestScheduler to use, defaults to get_scheduler()
+    """
+
+    # Yahoo's limits on intraday history
+    intraday_windows = {
+        '1m': (7, 30),
+        '2m': (60, 60),
+        '5m': (60, 60),
+        '15m': (60, 60),
+        '30m': (60, 60),
+        '90m': (60, 60),
+        '60m': (730, 730),
+        '1h': (730, 730),
+    }
+
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler
+
+    def _ticker(self, ticker):
+        import yfinance as yf
+
+        from finance_tools.scheduler import get_scheduler
+
+        scheduler = self.scheduler or get_scheduler()
+        return yf.Ticker(ticker, session=scheduler.session)
+
+    def history(self, ticker, start_date, end_date, interval='1d'):
+        return self._ticker(ticker).history(start=start_date, end=end_date, interval=interval)
+
+    def dividends(self, ticker):
+        return self._ticker(ticker).dividends
+
+    def info(self, ticker):
+        return self._ticker(ticker).info
+
+    def reported_eps(self, ticker):
+        import pandas as pd
+
+        dates = self._ticker(ticker).get_earnings_dates(limit=100)  # Yahoo's maximum, about 25 years
+        if dates is None or 'Reported EPS' not in dates:
+            return pd.Series(dtype=float, name='Reported EPS')
+        return dates['Reported EPS'].dropna().sort_index()
+
+
+def _ticker_dir(directory, ticker):
+    return os.path.join(directory, ticker.upper().replace('/', '_'))
+
+
+def _slice_history(data, start_date, end_date):
+    """Rows of data in [start_date, end_date), comparing on timezone-naive dates."""
+    import pandas as pd
+
+    index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    return data[(index >= pd.Timestamp(start_date)) & (index < pd.Timestamp(end_date))]
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves recordings made by RecordingProvider, without network access.
+
+    :param directory: Recording directory
+    :param latency: Seconds to sleep on every call, to simulate a network
+    """
+
+    def __init__(self, directory, latency=0.0):
+        self.directory = directory
+        self.latency = latency
+
+    def _path(self, ticker, name):
+        path = os.path.join(_ticker_dir(self.directory, ticker), name)
+        if not os.path.exists(path):
+            raise LookupError(f"No recorded {name} for {ticker.upper()} in {self.directory}")
+        if self.latency:
+            time.sleep(self.latency)
+        return path
+
+    def history(self, ticker, start_date, end_date, interval='1d'):
+        import pandas as pd
+
+        data = pd.read_pickle(self._path(ticker, f'history_{interval}.pkl'))
+        return _slice_history(data, start_date, end_date)
+
+    def dividends(self, ticker):
+        import pandas as pd
+
+        return pd.read_pickle(self._path(ticker, 'dividends.pkl'))
+
+    def info(self, ticker):
+        with open(self._path(ticker, 'info.json')) as f:
+            return json.load(f)
+
+    def reported_eps(self, ticker):
+        import pandas as pd
+
+        return pd.read_pickle(self._path(ticker, 'reported_eps.pkl'))
+
+
+class RecordingProvider(MarketDataProvider):
+    """
+    Passes calls through to another provider and records the responses.
+
+    Histories are merged per (ticker, interval), so a replay can serve any
+    date range that was covered by one or more recorded requests.
+
+    :param provider: Provider to record, e.g. YahooProvider()
+    :param directory: Recording directory
+    """
+
+    def __init__(self, provider, directory):
+        self.provider = provider
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    @property
+    def intraday_windows(self):
+        return self.provider.intraday_windows
+
+    def _write_path(self, ticker, name):
+        ticker_dir = _ticker_dir(self.directory, ticker)
+        os.makedirs(ticker_dir, exist_ok=True)
+        return os.path.join(ticker_dir, name)
+
+    def history(self, ticker, start_date, end_date, interval='1d'):
+        import pandas as pd
+
+        data = self.provider.history(ticker, start_date, end_date, interval=interval)
+        with self._lock:
+            path = self._write_path(ticker, f'history_{interval}.pkl')
+            recorded = data
+            if os.path.exists(path):
+                recorded = pd.concat([pd.read_pickle(path), data])
+                recorded = recorded[~recorded.index.duplicated(keep='last')].sort_index()
+            recorded.to_pickle(path)
+        return data
+
+    def dividends(self, ticker):
+        data = self.provider.dividends(ticker)
+        with self._lock:
+            data.to_pickle(self._write_path(ticker, 'dividends.pkl'))
+        return data
+
+    def info(self, ticker):
+        info = self.provider.info(ticker)
+        with self._lock:
+            with open(self._write_path(ticker, 'info.json'), 'w') as f:
+                json.dump(info, f, default=str, indent=1, sort_keys=True)
+        return info
+
+    def reported_eps(self, ticker):
+        data = self.provider.reported_eps(ticker)
+        with self._lock:
+            data.to_pickle(self._write_path(ticker, 'reported_eps.pkl'))
+        return data
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Deterministic market data generated from a seed, with no network access.
+
+    Daily bars are a random walk with one bar per calendar day, and dividends
+    are paid quarterly from March 2000.
+
+    :param seed: Seed; each ticker gets its own stream derived from it
+    :param dividends: Number of quarterly dividends
+    """
+
+    def __init__(self, seed=12345, dividends=80):
+        self.seed = seed
+        self.dividend_count = dividends
+
+    def _rng(self, ticker):
+        import numpy as np
+
+        return np.random.default_rng([self.seed, sum(map(ord, ticker))])
+
+    def history(self, ticker, start_date, end_date, interval='1d'):
+        import numpy as np
+        import pandas as pd
+
+        index = pd.date_range(start_date, end_date, freq='D', inclusive='left')
+        rng = self._rng(ticker)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+        return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                             'Volume': rng.integers(100_000, 10_000_000, len(index)).astype(float),
+                             'Dividends': 0.0, 'Stock Splits': 0.0}, index=index)
+
+    def dividends(self, ticker):
+        import pandas as pd
+
+        index = pd.date_range('2000-03-15', periods=self.dividend_count, freq='QS-MAR', tz='America/New_York')
+        return pd.Series(self._rng(ticker).uniform(0.1, 1.0, len(index)), index=index, name='Dividends')
+
+    def info(self, ticker):
+        return {'longName': f'{ticker} Corp', 'currency': 'USD', 'trailingEps': 1.0}
+
+
+def provider_from_spec(spec):
+    """
+    Build a provider from a FINANCE_TOOLS_PROVIDER style string.
+
+    :param spec: 'yahoo', 'record:<dir>' or 'replay:<dir>'
+    """
+    kind, _, directory = spec.partition(':')
+    if kind == 'yahoo':
+        return YahooProvider()
+    if kind == 'record' and directory:
+        return RecordingProvider(YahooProvider(), directory)
+    if kind == 'replay' and directory:
+        return ReplayProvider(directory)
+    raise ValueError(f"Unknown market data provider: {spec}")
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Return the active provider, creating it from FINANCE_TOOLS_PROVIDER on first use."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = provider_from_spec(os.environ.get('FINANCE_TOOLS_PROVIDER', 'yahoo'))
+        return _provider
+
+
+def set_provider(provider):
+    """
+    Make provider the active provider for every tool.
+
+    :param provider: MarketDataProvider instance, or a spec string for provider_from_spec
+    :return: The provider now active
+    """
+    global _provider
+    if isinstance(provider, str):
+        provider = provider_from_spec(provider)
+    with _provider_lock:
+        _provider = provider
+    return provider
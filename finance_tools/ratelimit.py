@@ -0,0 +1,97 @@
+"""
+Request-rate limiting and retry helpers for calls to Yahoo Finance.
+"""
+import random
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread making requests.
+
+    Allows 'rate' calls per second on average with bursts of up to 'burst'
+    calls. acquire() blocks until the caller may go ahead.
+
+    :param rate: Average calls per second
+    :param burst: Bucket size, defaults to one second's worth of calls
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take one token, waiting for it if the bucket is empty.
+
+        :return: Seconds spent waiting
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now (the balance may go negative) so waiters are served in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """
+        Hold back every caller of acquire() for at least 'seconds' from now.
+
+        Used when the server signals throttling, so all threads back off together
+        instead of each one finding out with a request of its own.
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+def backoff_delay(attempt, backoff=1.0, max_backoff=30.0, retry_after=None):
+    """
+    Jittered exponential delay before retry number attempt + 1.
+
+    :param attempt: Number of the attempt that failed, starting at 0
+    :param backoff: Delay after the first attempt in seconds, doubled on each retry
+    :param max_backoff: Upper bound on the delay
+    :param retry_after: Delay the server asked for, if any; honoured up to max_backoff
+    :return: Seconds to wait
+    """
+    delay = min(max_backoff, backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+    if retry_after is not None:
+        delay = min(max_backoff, max(delay, retry_after))
+    return delay
+
+
+def call_with_retries(func, *args, retries=3, backoff=1.0, max_backoff=30.0, limiter=None,
+                      sleep=time.sleep, **kwargs):
+    """
+    Call func, retrying with jittered exponential backoff when it raises.
+
+    :param retries: Number of retries after the first attempt
+    :param backoff: Delay before the first retry in seconds, doubled on each retry
+    :param max_backoff: Upper bound on a single delay
+    :param limiter: Optional RateLimiter; every attempt takes a token
+    :return: Whatever func returns
+    """
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            if attempt == retries:
+                raise
+            sleep(backoff_delay(attempt, backoff, max_backoff))
@@ -0,0 +1,293 @@
+"""
+Headless refresh of a watchlist's local data.
+
+Keeps the daily closes (price cache), dividends and stock info (dividend
+cache) and trailing EPS (EPS cache) of every ticker in a watchlist up to date
+on disk, so the GUIs and reports start from warm local data and do not wait for
+the network. Only what is due is fetched: closes from the day after the last
+stored bar (plus today's moving bar), dividends and EPS once their cached
+values are older than the configured ages. Tickers are refreshed concurrently
+by a bounded thread pool, and every run writes a JSON manifest with the
+tickers updated, rows added or changed, failures and duration.
+
+Run it once from cron, or let it repeat on a schedule:
+    python -m finance_tools.refresh watchlist.txt
+    python -m finance_tools.refresh watchlist.txt --every 30m --eps-age 12h
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from finance_tools.instrumentation import add_arguments, configure, stage
+from finance_tools.price_cache import data_dir, get_price_store
+
+DATASETS = ('closes', 'dividends', 'eps')
+DEFAULT_START = '2000-01-01'
+DEFAULT_WORKERS = 4
+DEFAULT_DIVIDEND_AGE = 24 * 60 * 60  # seconds
+DEFAULT_EPS_AGE = 12 * 60 * 60  # seconds
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_duration(text):
+    """
+    Parse a duration such as '90', '90s', '30m', '6h' or '1d'.
+
+    :return: Seconds
+    :raises ValueError: If the text is not a positive duration
+    """
+    text = str(text).strip().lower()
+    scale = _DURATION_UNITS.get(text[-1:], None)
+    number = text[:-1] if scale is not None else text
+    try:
+        seconds = float(number) * (scale or 1)
+    except ValueError:
+        raise ValueError(f"Invalid duration '{text}'. Use seconds or a number with s, m, h or d.")
+    if seconds <= 0:
+        raise ValueError(f"Invalid duration '{text}'. It must be positive.")
+    return seconds
+
+
+def _trailing_eps(provider, ticker, info):
+    from finance_tools.providers import MarketDataProvider
+
+    # Providers that take EPS from info need no second request when info was just fetched
+    if info is not None and type(provider).trailing_eps is MarketDataProvider.trailing_eps:
+        return info.get('trailingEps', None)
+    return provider.trailing_eps(ticker)
+
+
+def refresh_ticker(ticker, datasets=DATASETS, start_date=DEFAULT_START, store=None,
+                   dividend_cache=None, eps_cache=None, provider=None):
+    """
+    Bring one ticker's local data up to date.
+
+    :param ticker: Ticker symbol
+    :param datasets: Datasets to refresh, a subset of DATASETS
+    :param start_date: Earliest date of the closes kept, 'YYYY-MM-DD'
+    :param store: PriceStore for the closes, defaults to the shared store
+    :param dividend_cache: DividendCache; its TTL is the age at which dividends are refetched
+    :param eps_cache: EPSCache; its TTL is the age at which EPS is refetched
+    :param provider: MarketDataProvider, defaults to the active provider
+    :return: (updated, errors) where updated maps each refreshed dataset to the rows
+             added or changed (None if it was still fresh and skipped), and errors
+             maps each dataset that failed to a message
+    """
+    from finance_tools.dividends import DividendCache
+    from finance_tools.eps import EPSCache
+    from finance_tools.providers import get_provider
+
+    ticker = ticker.upper()
+    provider = provider or get_provider()
+    dividend_cache = dividend_cache or DividendCache(ttl=DEFAULT_DIVIDEND_AGE)
+    eps_cache = eps_cache or EPSCache(ttl=DEFAULT_EPS_AGE)
+    updated, errors = {}, {}
+    info = None
+
+    if 'closes' in datasets:
+        store = store or get_price_store()
+        try:
+            # End is exclusive: include today's bar
+            changed = store.update(ticker, start_date, (date.today() + timedelta(days=1)).isoformat())
+            if not store.row_count(ticker):
+                raise ValueError("No data available for the given ticker.")
+            updated['closes'] = changed
+        except Exception as e:
+            errors['closes'] = str(e)
+
+    if 'dividends' in datasets:
+        try:
+            if dividend_cache.get_dividends(ticker) is None or dividend_cache.get_info(ticker) is None:
+                with stage('fetch.info', ticker=ticker):
+                    info = provider.info(ticker)
+                with stage('fetch.dividends', ticker=ticker) as s:
+                    dividends = provider.dividends(ticker).sort_index()
+                    s.update(dividends)
+                dividend_cache.put_info(ticker, info)
+                updated['dividends'] = dividend_cache.put_dividends(ticker, dividends)
+            else:
+                updated['dividends'] = None
+        except Exception as e:
+            errors['dividends'] = str(e)
+
+    if 'eps' in datasets:
+        try:
+            cached = eps_cache.get(ticker)
+            if cached is None:
+                with stage('fetch.eps', ticker=ticker):
+                    eps = _trailing_eps(provider, ticker, info)
+                # A fetch only counts as a change if the value differs from the last one stored
+                previous = eps_cache.get(ticker, ignore_ttl=True)
+                eps_cache.put(ticker, eps)
+                updated['eps'] = int(previous is None or previous[0] != eps)
+            else:
+                updated['eps'] = None
+        except Exception as e:
+            errors['eps'] = str(e)
+
+    return updated, errors
+
+
+def refresh_watchlist(tickers, datasets=DATASETS, start_date=DEFAULT_START, max_workers=DEFAULT_WORKERS,
+                      dividend_age=DEFAULT_DIVIDEND_AGE, eps_age=DEFAULT_EPS_AGE, store=None,
+                      dividend_cache=None, eps_cache=None, provider=None):
+    """
+    Refresh the local data of every ticker in a watchlist.
+
+    :param tickers: Iterable of ticker symbols
+    :param datasets: Datasets to refresh, a subset of DATASETS
+    :param start_date: Earliest date of the closes kept, 'YYYY-MM-DD'
+    :param max_workers: Maximum number of tickers refreshed at the same time
+    :param dividend_age: Seconds after which a ticker's dividends and info are fetched again
+    :param eps_age: Seconds after which a ticker's trailing EPS is fetched again
+    :param store: PriceStore for the closes, defaults to the shared store
+    :param dividend_cache: DividendCache, defaults to the shared dividend cache file
+    :param eps_cache: EPSCache, defaults to the shared EPS cache file
+    :param provider: MarketDataProvider, defaults to the active provider
+    :return: Run manifest dict: started, finished, duration_seconds, datasets, tickers
+             (per ticker results as returned by refresh_ticker), updated (tickers with
+             rows added or changed), rows_added and skipped per dataset, and failures
+             (ticker -> dataset -> message)
+    """
+    from finance_tools.dividends import DividendCache
+    from finance_tools.eps import EPSCache
+
+    unknown = [name for name in datasets if name not in DATASETS]
+    if unknown:
+        raise ValueError(f"Unknown dataset '{unknown[0]}'. Choose from {', '.join(DATASETS)}.")
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    store = store or get_price_store()
+    dividend_cache = dividend_cache or DividendCache(ttl=dividend_age)
+    eps_cache = eps_cache or EPSCache(ttl=eps_age)
+
+    started = datetime.now()
+    start = time.perf_counter()
+    with stage('refresh', tickers=len(tickers)):
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(lambda ticker: refresh_ticker(ticker, datasets, start_date, store,
+                                                                  dividend_cache, eps_cache, provider),
+                                    tickers))
+
+    manifest = {
+        'started': started.isoformat(timespec='seconds'),
+        'finished': datetime.now().isoformat(timespec='seconds'),
+        'duration_seconds': round(time.perf_counter() - start, 3),
+        'datasets': list(datasets),
+        'tickers': {},
+        'updated': [],
+        'rows_added': {name: 0 for name in datasets},
+        'skipped': {name: 0 for name in datasets},
+        'failures': {},
+    }
+    for ticker, (updated, errors) in zip(tickers, results):
+        manifest['tickers'][ticker] = updated
+        if errors:
+            manifest['failures'][ticker] = errors
+        if any(updated.values()):
+            manifest['updated'].append(ticker)
+        for name, rows in updated.items():
+            if rows is None:
+                manifest['skipped'][name] += 1
+            else:
+                manifest['rows_added'][name] += rows
+    return manifest
+
+
+def write_manifest(manifest, directory=None):
+    """
+    Save a run manifest as refresh-<start time>.json and as latest.json.
+
+    :param directory: Manifest directory, defaults to 'refresh' in data_dir()
+    :return: Path of the timestamped manifest
+    """
+    directory = directory or os.path.join(data_dir(), 'refresh')
+    os.makedirs(directory, exist_ok=True)
+    stamp = manifest['started'].replace(':', '').replace('-', '')
+    path = os.path.join(directory, f'refresh-{stamp}.json')
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+    # Readers of latest.json never see a half-written file
+    temp = os.path.join(directory, 'latest.json.tmp')
+    with open(temp, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temp, os.path.join(directory, 'latest.json'))
+    return path
+
+
+def run_every(job, every, stop=None):
+    """
+    Call job() now and then every 'every' seconds, measured from the start of each run.
+
+    A run that takes longer than the interval is followed straight away by the next.
+
+    :param stop: threading.Event that ends the loop when set
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        start = time.monotonic()
+        job()
+        if stop.wait(max(0.0, every - (time.monotonic() - start))):
+            return
+
+
+def main(argv=None):
+    from finance_tools.batch import read_tickers
+
+    def duration(text):
+        try:
+            return parse_duration(text)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+
+    parser = argparse.ArgumentParser(description="Keep a watchlist's closes, dividends and EPS up to date on disk.")
+    parser.add_argument('watchlist', help="File with ticker symbols (one per line or comma separated)")
+    parser.add_argument('--every', type=duration, metavar='DURATION',
+                        help="Repeat on this schedule (e.g. 30m, 6h, 1d) instead of running once")
+    parser.add_argument('--datasets', default=','.join(DATASETS),
+                        help=f"Comma separated datasets to refresh (default {','.join(DATASETS)})")
+    parser.add_argument('--start', default=DEFAULT_START, help="Earliest date of the closes kept")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Tickers refreshed at the same time")
+    parser.add_argument('--dividend-age', type=duration, default=DEFAULT_DIVIDEND_AGE, metavar='DURATION',
+                        help="Fetch dividends again once they are this old (default 1d)")
+    parser.add_argument('--eps-age', type=duration, default=DEFAULT_EPS_AGE, metavar='DURATION',
+                        help="Fetch trailing EPS again once it is this old (default 12h)")
+    parser.add_argument('--manifest-dir', help="Directory for the run manifests (default <data dir>/refresh)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    configure(args)
+
+    datasets = tuple(name.strip() for name in args.datasets.split(',') if name.strip())
+    if not datasets or any(name not in DATASETS for name in datasets):
+        parser.error(f"--datasets must be a comma separated list of {', '.join(DATASETS)}")
+
+    def run_once():
+        # The watchlist is read on every run, so edits are picked up without a restart
+        tickers = read_tickers(args.watchlist)
+        manifest = refresh_watchlist(tickers, datasets, args.start, args.workers,
+                                     args.dividend_age, args.eps_age)
+        path = write_manifest(manifest, args.manifest_dir)
+        print(f"{manifest['finished']}: refreshed {len(tickers)} tickers in {manifest['duration_seconds']:.1f}s, "
+              f"{len(manifest['updated'])} updated, {len(manifest['failures'])} failed. Manifest: {path}",
+              file=sys.stderr)
+        return manifest
+
+    if args.every is None:
+        manifest = run_once()
+        return 1 if manifest['tickers'] and len(manifest['failures']) == len(manifest['tickers']) else 0
+
+    try:
+        run_every(run_once, args.every)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
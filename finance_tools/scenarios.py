@@ -0,0 +1,208 @@
+"""
+Expected return and dispersion statistics for a discrete set of scenarios.
+
+calculate_statistics and solve_missing_values serve the calculator's hand-entered
+scenarios. scenario_statistics is the vectorized engine for scenario files with
+millions of rows, and for many independent scenario sets at once (one set per
+row of a 2-D array).
+
+Command line usage:
+    python -m finance_tools.scenarios scenarios.csv
+"""
+import argparse
+import math
+import sys
+from collections import namedtuple
+
+ScenarioStatistics = namedtuple('ScenarioStatistics', ['expected_return', 'variance', 'standard_deviation',
+                                                       'cv', 'skew', 'kurtosis'])
+
+
+def calculate_statistics(probabilities, returns, expected_return):
+    """
+    Variance, standard deviation and coefficient of variation of the scenarios.
+
+    :param probabilities: Probability of each scenario
+    :param returns: Return of each scenario
+    :param expected_return: Expected return of the scenarios
+    :return: (variance, standard_deviation, cv)
+    """
+    # Calculate variance
+    variance = sum(p * ((r - expected_return) ** 2) for p, r in zip(probabilities, returns))
+
+    # Calculate standard deviation
+    standard_deviation = math.sqrt(variance)
+
+    # Calculate coefficient of variation (CV)
+    if expected_return == 0:
+        cv = float('inf')  # Avoid division by zero
+    else:
+        cv = standard_deviation / expected_return
+
+    return variance, standard_deviation, cv
+
+
+def solve_missing_values(expected_return, variance, standard_deviation, cv, probabilities, returns):
+    """
+    Fill in whichever of the statistics were not given.
+
+    Missing values are passed as None. If the expected return is missing and
+    cannot be calculated because a probability or return is missing, all four
+    results are None.
+
+    :return: (expected_return, variance, standard_deviation, cv)
+    """
+    # Check if expected return is missing
+    if expected_return is None:
+        if all(p is not None and r is not None for p, r in zip(probabilities, returns)):
+            expected_return = sum(p * r for p, r in zip(probabilities, returns))
+        else:
+            return None, None, None, None
+
+    # Calculate variance if missing
+    if variance is None:
+        if expected_return is not None and all(p is not None and r is not None for p, r in zip(probabilities, returns)):
+            variance, standard_deviation, cv = calculate_statistics(probabilities, returns, expected_return)
+        else:
+            variance, standard_deviation, cv = None, None, None
+
+    # Calculate standard deviation if missing
+    if standard_deviation is None:
+        if variance is not None:
+            standard_deviation = math.sqrt(variance)
+        else:
+            standard_deviation = None
+
+    # Calculate CV if missing
+    if cv is None:
+        if expected_return is not None and standard_deviation is not None:
+            cv = standard_deviation / expected_return
+        else:
+            cv = None
+
+    return expected_return, variance, standard_deviation, cv
+
+
+def scenario_statistics(probabilities, returns):
+    """
+    Moments of one or many scenario distributions in a vectorized pass.
+
+    The mean is taken first (with a correction pass) and the higher moments
+    from deviations around it, which avoids the cancellation of the
+    E[R^2] - E[R]^2 shortcut. Scenarios
+    run along the last axis, so 2-D inputs give one result per row.
+
+    :param probabilities: Scenario probabilities, each set summing to 1, or
+                          None for equally likely scenarios
+    :param returns: Scenario returns, 1-D or 2-D (sets x scenarios)
+    :return: ScenarioStatistics of floats (1-D input) or arrays (2-D input).
+             cv is inf where the expected return is 0, and kurtosis is excess
+             kurtosis (0 for a normal distribution)
+    """
+    import numpy as np
+
+    returns = np.asarray(returns, dtype=float)
+    if probabilities is None:
+        probabilities = np.full(returns.shape, 1.0 / returns.shape[-1])
+    else:
+        probabilities = np.asarray(probabilities, dtype=float)
+    if probabilities.shape != returns.shape:
+        raise ValueError("Probabilities and returns must have the same shape.")
+    if returns.shape[-1] == 0:
+        raise ValueError("At least one scenario is required.")
+    if np.any(probabilities < 0) or np.any(probabilities > 1):
+        raise ValueError("Probability must be between 0 and 1.")
+    if not np.allclose(probabilities.sum(axis=-1), 1.0, atol=1e-6):
+        raise ValueError("Probabilities must sum to 1.")
+
+    expected_return = np.einsum('...i,...i->...', probabilities, returns)
+    deviations = returns - expected_return[..., None]
+
+    # Second-pass correction of the mean for rounding error in the first sum
+    correction = np.einsum('...i,...i->...', probabilities, deviations)
+    expected_return = expected_return + correction
+    deviations -= correction[..., None]
+    squared = deviations * deviations
+    variance = np.einsum('...i,...i->...', probabilities, squared)
+    third = np.einsum('...i,...i,...i->...', probabilities, squared, deviations)
+    fourth = np.einsum('...i,...i,...i->...', probabilities, squared, squared)
+    standard_deviation = np.sqrt(variance)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cv = np.where(expected_return == 0, np.inf, standard_deviation / expected_return)
+        skew = np.where(variance > 0, third / (variance * standard_deviation), np.nan)
+        kurtosis = np.where(variance > 0, fourth / (variance * variance) - 3.0, np.nan)
+
+    values = (expected_return, variance, standard_deviation, cv, skew, kurtosis)
+    if returns.ndim == 1:
+        values = tuple(float(value) for value in values)
+    return ScenarioStatistics(*values)
+
+
+def load_scenarios(path):
+    """
+    Read scenario probabilities and returns from a file.
+
+    .csv   probability and return columns (any case); without those headers the
+           first two columns are used. An optional 'set' column splits the rows
+           into independent scenario sets, padded with zero-probability scenarios
+           to a common length.
+    .npy   array of shape (2, N) or (sets, 2, N): probabilities then returns
+    .npz   arrays named 'probabilities' and 'returns'
+
+    :param path: Scenario file
+    :return: (probabilities, returns) as 1-D arrays, or 2-D (sets x scenarios)
+    """
+    import numpy as np
+
+    lower = path.lower()
+    if lower.endswith('.npy'):
+        data = np.load(path)
+        if data.ndim not in (2, 3) or data.shape[-2] != 2:
+            raise ValueError("Scenario .npy files must have shape (2, N) or (sets, 2, N).")
+        return data[..., 0, :].astype(float), data[..., 1, :].astype(float)
+    if lower.endswith('.npz'):
+        with np.load(path) as data:
+            return data['probabilities'].astype(float), data['returns'].astype(float)
+
+    import pandas as pd
+
+    frame = pd.read_csv(path)
+    columns = {str(column).strip().lower(): column for column in frame.columns}
+    if 'probability' in columns and 'return' in columns:
+        probability_column, return_column = columns['probability'], columns['return']
+    else:
+        frame = pd.read_csv(path, header=None)
+        probability_column, return_column = frame.columns[0], frame.columns[1]
+
+    if 'set' not in columns:
+        return frame[probability_column].to_numpy(dtype=float), frame[return_column].to_numpy(dtype=float)
+
+    # One row per scenario set; shorter sets are padded with p = 0 scenarios, which add nothing
+    position = frame.groupby(columns['set'], sort=False).cumcount()
+    probabilities = frame.pivot_table(index=columns['set'], columns=position, values=probability_column,
+                                      sort=False, aggfunc='first')
+    returns = frame.pivot_table(index=columns['set'], columns=position, values=return_column,
+                                sort=False, aggfunc='first')
+    return probabilities.fillna(0.0).to_numpy(), returns.fillna(0.0).to_numpy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Statistics of a scenario file.")
+    parser.add_argument('path', help="Scenario file (.csv, .npy or .npz)")
+    args = parser.parse_args(argv)
+
+    probabilities, returns = load_scenarios(args.path)
+    stats = scenario_statistics(probabilities, returns)
+    if returns.ndim == 1:
+        for field, value in zip(stats._fields, stats):
+            print(f"{field:<20} {value:.6g}")
+    else:
+        import pandas as pd
+
+        print(pd.DataFrame(stats._asdict()).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
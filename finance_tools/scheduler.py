@@ -0,0 +1,260 @@
+"""
+One shared HTTP session, request de-duplication and rate limiting for Yahoo calls.
+
+YahooProvider hands yfinance the session of the shared RequestScheduler, so
+every request the tools make to Yahoo goes through it:
+
+- one keep-alive session, so connections, cookies and yfinance's crumb are
+  reused instead of set up again for every yf.Ticker;
+- identical GET requests that are already in flight are sent once, and every
+  caller gets the same response;
+- a token bucket (ratelimit.RateLimiter) spaces requests out across threads;
+- throttling responses (HTTP 429 and 503) are retried after a jittered
+  exponential backoff that honours Retry-After. The backoff pauses the whole
+  bucket, so the other threads wait too instead of adding to the throttling.
+
+The scheduler works with any URL, so it can be exercised against a local stub
+server. The request rate comes from FINANCE_TOOLS_RATE (requests per second,
+0 for no limit).
+"""
+import os
+import threading
+import time
+
+from finance_tools.instrumentation import stage
+from finance_tools.ratelimit import RateLimiter, backoff_delay
+
+RATE_ENV = 'FINANCE_TOOLS_RATE'
+DEFAULT_RATE = 10  # requests per second
+DEFAULT_POOL_SIZE = 16  # keep-alive connections per host (requests backend)
+
+# Responses that mean "slow down" rather than "failed"
+THROTTLE_STATUSES = frozenset({429, 503})
+
+# Request arguments that make a request unsafe to share between callers
+_UNSHARED_ARGUMENTS = ('data', 'json', 'files', 'content', 'stream', 'content_callback')
+
+_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+               "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36")
+
+
+class _InFlight:
+    """A request being sent, shared by every caller asking for the same thing."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class RequestScheduler:
+    """
+    Sends HTTP requests through one pooled session with de-duplication, rate limiting and backoff.
+
+    :param rate: Requests per second on average, or None for no limit
+    :param burst: Requests allowed back to back, defaults to one second's worth
+    :param retries: Retries of a throttled request before its response is returned as is
+    :param backoff: Delay after the first throttled attempt in seconds, doubled on each retry
+    :param max_backoff: Upper bound on a single delay, also for Retry-After
+    :param pool_size: Keep-alive connections kept per host by the requests backend
+                      (curl_cffi keeps one connection cache per thread)
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=None, retries=3, backoff=1.0, max_backoff=30.0,
+                 pool_size=DEFAULT_POOL_SIZE, clock=time.monotonic, sleep=time.sleep):
+        self.limiter = RateLimiter(rate, burst, clock=clock, sleep=sleep) if rate else None
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.sleep = sleep
+        self.stats = {'sent': 0, 'shared': 0, 'throttled': 0}
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        The shared session, created on first use.
+
+        A curl_cffi session (what yfinance itself uses) when curl_cffi is
+        installed, otherwise a requests session. Its request() method goes
+        through this scheduler, so it can be handed to yf.Ticker(session=...).
+        """
+        with self._session_lock:
+            if self._session is None:
+                self._session = _new_session(self)
+            return self._session
+
+    def request(self, method, url, params=None, **kwargs):
+        """
+        Send a request through the shared session.
+
+        :param method: HTTP method, e.g. 'GET'
+        :param url: Full URL
+        :param params: Optional query parameters
+        :param kwargs: Further arguments for the session's request(), e.g. timeout
+        :return: The response; a throttled response once the retries are used up
+        """
+        return self.session.request(method, url, params=params, **kwargs)
+
+    def get(self, url, params=None, **kwargs):
+        """Send a GET request; see request()."""
+        return self.request('GET', url, params=params, **kwargs)
+
+    def _dispatch(self, send, method, url, params, kwargs):
+        """Run send() for a request, sharing it with identical requests in flight."""
+        key = _request_key(method, url, params, kwargs)
+        if key is None:
+            return self._send(send, method, url)
+
+        with self._lock:
+            entry = self._in_flight.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._in_flight[key] = _InFlight()
+            else:
+                self.stats['shared'] += 1
+        if not owner:
+            entry.done.wait()
+            if entry.error is not None:
+                raise entry.error
+            return entry.response
+
+        try:
+            entry.response = self._send(send, method, url)
+        except BaseException as e:
+            entry.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            entry.done.set()
+        return entry.response
+
+    def _send(self, send, method, url):
+        """Send one request within the rate limit, backing off while it is throttled."""
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            with stage('http.request', method=method, url=url.split('?', 1)[0], attempt=attempt) as s:
+                response = send()
+                s.update(status=response.status_code)
+            with self._lock:
+                self.stats['sent'] += 1
+            if response.status_code not in THROTTLE_STATUSES or attempt == self.retries:
+                return response
+
+            with self._lock:
+                self.stats['throttled'] += 1
+            delay = backoff_delay(attempt, self.backoff, self.max_backoff,
+                                  retry_after(response.headers.get('Retry-After')))
+            if self.limiter is not None:
+                self.limiter.pause(delay)  # the retry waits for it in acquire(), with everyone else
+            else:
+                self.sleep(delay)
+        return response
+
+
+def retry_after(value):
+    """
+    Parse a Retry-After header.
+
+    :param value: Header value, in seconds or as an HTTP date, or None
+    :return: Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _request_key(method, url, params, kwargs):
+    """Key identifying identical requests, or None if the request must not be shared."""
+    if method.upper() not in ('GET', 'HEAD') or any(kwargs.get(name) for name in _UNSHARED_ARGUMENTS):
+        return None
+    items = params.items() if hasattr(params, 'items') else params or ()
+    headers = kwargs.get('headers') or {}
+    return (method.upper(), url, tuple(sorted((str(k), str(v)) for k, v in items)),
+            tuple(sorted((str(k).lower(), str(v)) for k, v in headers.items())))
+
+
+_session_classes = {}
+
+
+def _session_class(base):
+    """Subclass of a backend's Session whose requests go through its scheduler."""
+    if base not in _session_classes:
+        class ScheduledSession(base):
+            scheduler = None
+
+            def request(self, method, url, *args, params=None, **kwargs):
+                def send():
+                    return base.request(self, method, url, *args, params=params, **kwargs)
+
+                return self.scheduler._dispatch(send, method, url, params, kwargs)
+
+        _session_classes[base] = ScheduledSession
+    return _session_classes[base]
+
+
+def _new_session(scheduler):
+    # Same backend choice as yfinance: curl_cffi for browser impersonation, requests otherwise
+    try:
+        from curl_cffi import requests as curl_requests
+    except ImportError:
+        curl_requests = None
+
+    if curl_requests is not None and not os.environ.get('YF_DISABLE_CURL_CFFI'):
+        session = _session_class(curl_requests.Session)(impersonate='chrome')
+    else:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = _session_class(requests.Session)()
+        session.headers['User-Agent'] = _USER_AGENT
+        adapter = HTTPAdapter(pool_connections=scheduler.pool_size, pool_maxsize=scheduler.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+    session.scheduler = scheduler
+    return session
+
+
+def rate_from_environment():
+    """
+    Request rate from FINANCE_TOOLS_RATE.
+
+    :return: Requests per second, None for no limit, or DEFAULT_RATE if the variable is not set
+    :raises ValueError: If the value is not a number
+    """
+    value = os.environ.get(RATE_ENV)
+    if not value:
+        return DEFAULT_RATE
+    try:
+        rate = float(value)
+    except ValueError:
+        raise ValueError(f"{RATE_ENV} must be a number of requests per second, not '{value}'.")
+    return rate if rate > 0 else None
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Return the shared RequestScheduler used for every Yahoo request."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(rate=rate_from_environment())
+        return _scheduler
@@ -0,0 +1,211 @@
+"""
+Monte Carlo simulation mode for scenario statistics.
+
+Draws are taken either from the discrete scenario distribution itself or from a
+continuous distribution fitted to its moments (normal, or Student-t matched to
+its excess kurtosis). Discrete draws are not generated one by one: a batch of n
+draws only needs how often each scenario came up, which is a single multinomial
+sample, so discrete batches cost the same whatever their size.
+
+The draws are split into batches; each batch gets its own seed spawned from one
+root seed, so results do not depend on how many worker processes ran them.
+Batches only return power sums of the draws, so memory stays flat however many
+draws are requested. Bootstrap confidence intervals come from resampling whole
+batches.
+
+Command line usage:
+    python -m finance_tools.simulation scenarios.csv --draws 100000000 --distribution t
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from finance_tools.scenarios import ScenarioStatistics, load_scenarios, scenario_statistics
+
+DISTRIBUTIONS = ('discrete', 'normal', 't')
+
+DEFAULT_BATCHES = 256        # batches the draws are split into (also the bootstrap blocks)
+DEFAULT_CHUNK = 1_000_000    # most draws held in memory at once per worker
+DEFAULT_BOOTSTRAP = 2000
+INLINE_DRAWS = 2_000_000     # below this the work is not worth starting processes for
+
+SimulationResult = namedtuple('SimulationResult', ['statistics', 'intervals', 'draws', 'seconds',
+                                                   'draws_per_second', 'tallied'])
+
+
+def _batch_sums(distribution, params, shift, size, seed, chunk_size):
+    """
+    Power sums [n, S1, S2, S3, S4] of (draw - shift) for one batch of draws.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    if distribution == 'discrete':
+        # Tallying how often each scenario comes up is equivalent to drawing them one by one
+        probabilities, returns = params
+        counts = rng.multinomial(size, probabilities)
+        deviations = returns - shift
+        squared = deviations * deviations
+        return np.array([size, counts @ deviations, counts @ squared, counts @ (squared * deviations),
+                         counts @ (squared * squared)])
+
+    sums = np.zeros(5)
+    remaining = size
+    while remaining:
+        n = min(remaining, chunk_size)
+        if distribution == 'normal':
+            mean, scale = params
+            deviations = rng.standard_normal(n) * scale + (mean - shift)
+        else:
+            mean, scale, df = params
+            deviations = rng.standard_t(df, n) * scale + (mean - shift)
+        squared = deviations * deviations
+        sums += (n, deviations.sum(), squared.sum(), (squared * deviations).sum(), (squared * squared).sum())
+        remaining -= n
+    return sums
+
+
+def _run_batches(distribution, params, shift, sizes, seeds, chunk_size):
+    """Worker entry point: power sums for several batches, one row per batch."""
+    import numpy as np
+
+    return np.array([_batch_sums(distribution, params, shift, size, seed, chunk_size)
+                     for size, seed in zip(sizes, seeds)])
+
+
+def _statistics_from_sums(sums, shift):
+    """ScenarioStatistics (of arrays) from rows of power sums about shift."""
+    import numpy as np
+
+    sums = np.atleast_2d(sums)
+    n = sums[:, 0]
+    m1, m2, m3, m4 = (sums[:, k] / n for k in range(1, 5))
+    variance = m2 - m1 ** 2
+    third = m3 - 3 * m1 * m2 + 2 * m1 ** 3
+    fourth = m4 - 4 * m1 * m3 + 6 * m1 ** 2 * m2 - 3 * m1 ** 4
+    expected_return = shift + m1
+    standard_deviation = np.sqrt(np.maximum(variance, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cv = np.where(expected_return == 0, np.inf, standard_deviation / expected_return)
+        skew = np.where(variance > 0, third / (variance * standard_deviation), np.nan)
+        kurtosis = np.where(variance > 0, fourth / (variance * variance) - 3.0, np.nan)
+    return ScenarioStatistics(expected_return, variance, standard_deviation, cv, skew, kurtosis)
+
+
+def _distribution_params(distribution, probabilities, returns, exact):
+    import numpy as np
+
+    if distribution == 'discrete':
+        return probabilities, returns
+    if distribution == 'normal':
+        return exact.expected_return, exact.standard_deviation
+    # Student-t with the scenarios' mean and variance; df from excess kurtosis = 6 / (df - 4)
+    kurtosis = exact.kurtosis
+    df = 6.0 / kurtosis + 4.0 if kurtosis > 0 and np.isfinite(kurtosis) else 1e6
+    return exact.expected_return, exact.standard_deviation * math.sqrt((df - 2.0) / df), df
+
+
+def simulate_scenarios(probabilities, returns, draws, distribution='discrete', workers=None, seed=None,
+                       batches=DEFAULT_BATCHES, bootstrap=DEFAULT_BOOTSTRAP, confidence=0.95,
+                       chunk_size=DEFAULT_CHUNK):
+    """
+    Simulate a scenario distribution and estimate its statistics with confidence intervals.
+
+    :param probabilities: Scenario probabilities summing to 1, or None for equally likely
+    :param returns: Scenario returns (1-D)
+    :param draws: Total number of draws
+    :param distribution: 'discrete' (the scenarios themselves), 'normal' or 't' (fitted)
+    :param workers: Worker processes, defaults to the CPU count; 1 runs in this process
+    :param seed: Root seed; the same seed gives the same result for any number of workers
+    :param batches: Number of batches the draws are split into and bootstrapped over
+    :param bootstrap: Bootstrap resamples for the confidence intervals
+    :param confidence: Confidence level of the intervals
+    :param chunk_size: Most draws generated at once by a worker
+    :return: SimulationResult with point estimates (ScenarioStatistics of floats),
+             intervals mapping each statistic to (low, high), the number of
+             draws, wall time in seconds, draws per second and tallied. Discrete
+             draws are tallied with one multinomial sample per batch rather than
+             generated, so for them tallied is True and draws_per_second is the
+             rate of the tally, not of sampling
+    """
+    import numpy as np
+
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Distribution must be one of {', '.join(DISTRIBUTIONS)}.")
+    if draws < 1:
+        raise ValueError("Number of draws must be a positive integer.")
+
+    returns = np.asarray(returns, dtype=float)
+    if probabilities is None:
+        probabilities = np.full(returns.shape, 1.0 / len(returns))
+    probabilities = np.asarray(probabilities, dtype=float)
+    exact = scenario_statistics(probabilities, returns)
+    # Probabilities are renormalised so tiny rounding in the file does not upset multinomial()
+    probabilities = probabilities / probabilities.sum()
+    params = _distribution_params(distribution, probabilities, returns, exact)
+    # Power sums are taken about the exact mean, which keeps them well conditioned
+    shift = exact.expected_return
+
+    start = time.perf_counter()
+    batches = max(1, min(batches, draws))
+    sizes = np.full(batches, draws // batches, dtype=np.int64)
+    sizes[:draws % batches] += 1
+    seeds = np.random.SeedSequence(seed).spawn(batches)
+
+    workers = workers or os.cpu_count() or 1
+    # Discrete batches cost O(scenarios) whatever their size, so only fitted draws use processes
+    if workers == 1 or distribution == 'discrete' or draws < INLINE_DRAWS:
+        sums = _run_batches(distribution, params, shift, sizes, seeds, chunk_size)
+    else:
+        groups = np.array_split(np.arange(batches), min(workers, batches))
+        with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+            futures = [pool.submit(_run_batches, distribution, params, shift, sizes[group],
+                                   [seeds[i] for i in group], chunk_size) for group in groups]
+            sums = np.concatenate([future.result() for future in futures])
+
+    point = ScenarioStatistics(*(float(value[0]) for value in _statistics_from_sums(sums.sum(axis=0), shift)))
+
+    # Bootstrap over batches: each resample is a multinomial reweighting of the batch sums
+    rng = np.random.default_rng(seeds[0].spawn(1)[0])
+    weights = rng.multinomial(batches, np.full(batches, 1.0 / batches), size=bootstrap)
+    resampled = _statistics_from_sums(weights @ sums, shift)
+    tail = (1 - confidence) / 2 * 100
+    intervals = {field: tuple(float(bound) for bound in np.nanpercentile(values, [tail, 100 - tail]))
+                 for field, values in zip(ScenarioStatistics._fields, resampled)}
+
+    seconds = time.perf_counter() - start
+    draws_per_second = draws / seconds if seconds else math.inf
+    return SimulationResult(point, intervals, int(draws), seconds, draws_per_second, distribution == 'discrete')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo statistics of a scenario file.")
+    parser.add_argument('path', help="Scenario file (.csv, .npy or .npz) with one scenario set")
+    parser.add_argument('--draws', type=float, default=1e7, help="Number of draws, e.g. 1e8")
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='discrete')
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--seed', type=int, help="Root seed for reproducible results")
+    parser.add_argument('--confidence', type=float, default=0.95, help="Confidence level")
+    args = parser.parse_args(argv)
+
+    probabilities, returns = load_scenarios(args.path)
+    if returns.ndim != 1:
+        parser.error("The simulation takes a file with a single scenario set.")
+    result = simulate_scenarios(probabilities, returns, int(args.draws), distribution=args.distribution,
+                                workers=args.workers, seed=args.seed, confidence=args.confidence)
+
+    print(f"{'statistic':<20} {'estimate':>12} {'low':>12} {'high':>12}")
+    for field, value in zip(result.statistics._fields, result.statistics):
+        low, high = result.intervals[field]
+        print(f"{field:<20} {value:12.6g} {low:12.6g} {high:12.6g}")
+    kind = 'tallied draws' if result.tallied else 'draws'
+    print(f"{result.draws:,} draws in {result.seconds:.2f}s ({result.draws_per_second:,.0f} {kind}/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
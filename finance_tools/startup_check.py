@@ -0,0 +1,90 @@
+"""
+Measure the cold-start import cost of the finance_tools modules.
+
+Each module is imported in a fresh interpreter, timed, and checked for heavy
+dependencies that should only load when a function actually needs them.
+
+Command line usage:
+    python -m finance_tools.startup_check --budget 0.1
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Dependencies that must not be pulled in just by importing a module
+HEAVY_MODULES = ('pandas', 'numpy', 'yfinance', 'matplotlib', 'tkinter')
+
+MODULES = (
+    'finance_tools',
+    'finance_tools.providers',
+    'finance_tools.price_cache',
+    'finance_tools.exporters',
+    'finance_tools.prices',
+    'finance_tools.batch',
+    'finance_tools.intraday',
+    'finance_tools.scenarios',
+    'finance_tools.simulation',
+    'finance_tools.dividends',
+    'finance_tools.ledger',
+    'finance_tools.eps',
+    'finance_tools.refresh',
+    'finance_tools.ratelimit',
+    'finance_tools.scheduler',
+    'finance_tools.wpvf',
+    'finance_tools.charts',
+    'finance_tools.options',
+    'finance_tools.blackscholes',
+    'finance_tools.portfolio',
+    'finance_tools.performance',
+    'finance_tools.valuation',
+    'finance_tools.workers',
+    'finance_tools.instrumentation',
+)
+
+DEFAULT_BUDGET = 0.1  # seconds per module
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(','.join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def measure_import(module):
+    """
+    Import a module in a fresh interpreter.
+
+    :param module: Dotted module name
+    :return: (seconds, list of HEAVY_MODULES that were loaded)
+    """
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                            cwd=repo_root, capture_output=True, text=True, check=True)
+    elapsed, heavy = result.stdout.splitlines()[-2:]
+    return float(elapsed), [name for name in heavy.split(',') if name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check cold-start import time of finance_tools.")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help="Maximum seconds per module")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in MODULES:
+        elapsed, heavy = measure_import(module)
+        problems = []
+        if elapsed > args.budget:
+            problems.append(f"over {args.budget:.3f}s budget")
+        if heavy:
+            problems.append(f"loads {', '.join(heavy)}")
+        failed = failed or bool(problems)
+        print(f"{module:<32} {elapsed * 1000:8.1f} ms  {'; '.join(problems) or 'ok'}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""
+Trailing P/E and earnings yield over time, for a whole universe at once.
+
+The EPS scrapper shows one current trailing EPS; here every ticker gets a
+point-in-time EPS history instead. Each reported quarter becomes known when it
+is announced (results released after the 16:00 close count from the next
+day), trailing EPS is the sum of the last four reported quarters, and each
+daily close is joined to the trailing EPS known at that close. The join is one
+sorted search over (ticker, date) keys for the whole universe rather than a
+loop over tickers, so thousands of tickers over ten years take seconds.
+
+P/E is close / trailing EPS and is left empty when trailing EPS is not
+positive; earnings yield is trailing EPS / close and keeps losses.
+
+Command line usage:
+    python -m finance_tools.valuation tickers.txt 2015-01-01 2025-01-01 --output valuation.csv
+"""
+import argparse
+import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from finance_tools.batch import DEFAULT_WORKERS, fetch_closing_prices_batch
+from finance_tools.instrumentation import add_arguments, configure, stage
+
+MARKET_CLOSE_HOUR = 16  # results announced at or after this local hour count from the next day
+TRAILING_QUARTERS = 4
+MAX_QUARTER_GAP_DAYS = 140  # longest gap between consecutive reports; a skipped quarter leaves about 180
+DEFAULT_MAX_AGE_DAYS = 200  # trailing EPS older than this is treated as unknown
+_BLOCK_CELLS = 4_000_000  # dates x tickers joined at a time, bounds the temporary arrays
+
+ValuationPanels = namedtuple('ValuationPanels', ['eps', 'pe', 'earnings_yield'])
+
+
+def _naive(dates):
+    """Timezone-naive local timestamps from a Series of dates, which may be timezone-aware."""
+    import pandas as pd
+
+    dates = pd.to_datetime(dates)
+    return dates.dt.tz_localize(None) if dates.dt.tz is not None else dates
+
+
+def trailing_eps(reported, quarters=TRAILING_QUARTERS, max_gap_days=MAX_QUARTER_GAP_DAYS):
+    """
+    Point-in-time trailing EPS from reported quarterly EPS, for many tickers at once.
+
+    :param reported: Long DataFrame with ticker, date (announcement time, local) and eps columns
+    :param quarters: Number of reported quarters summed
+    :param max_gap_days: Most days allowed between consecutive quarters summed; a longer
+                         gap means a quarter is missing and gives no value
+    :return: DataFrame with ticker, available (first day whose close knows the value) and
+             eps columns, sorted by ticker and available
+    """
+    import numpy as np
+    import pandas as pd
+
+    frame = pd.DataFrame({'ticker': reported['ticker'].astype(str).str.upper().to_numpy(),
+                          'date': _naive(reported['date']).to_numpy(),
+                          'eps': pd.to_numeric(reported['eps'], errors='coerce').to_numpy(dtype=float)})
+    frame = frame.dropna().sort_values(['ticker', 'date'], kind='mergesort')
+    frame = frame.drop_duplicates(['ticker', 'date'], keep='last')
+    if len(frame) < quarters:
+        return pd.DataFrame({'ticker': pd.Series(dtype=object), 'available': pd.Series(dtype='datetime64[ns]'),
+                             'eps': pd.Series(dtype=float)})
+
+    tickers = frame['ticker'].to_numpy()
+    dates = frame['date'].to_numpy()
+    eps = frame['eps'].to_numpy()
+
+    # Row i sums rows i - quarters + 1 .. i, which must all belong to the same ticker
+    last = np.arange(quarters - 1, len(frame))
+    first = last - (quarters - 1)
+    sums = np.lib.stride_tricks.sliding_window_view(eps, quarters).sum(axis=1)
+    # Windows spanning a gap longer than a quarter (with slack for late annual reports) are dropped
+    long_gaps = np.concatenate([[0], np.cumsum(np.diff(dates) > np.timedelta64(max_gap_days, 'D'))])
+    valid = (tickers[first] == tickers[last]) & (long_gaps[first] == long_gaps[last])
+
+    # Known from the announcement day, or the next day when announced after the close
+    announced = pd.DatetimeIndex(dates[last][valid])
+    available = (announced + pd.Timedelta(hours=24 - MARKET_CLOSE_HOUR)).normalize()
+    return pd.DataFrame({'ticker': tickers[last][valid], 'available': available, 'eps': sums[valid]})
+
+
+def asof_panel(index, columns, events, max_age_days=DEFAULT_MAX_AGE_DAYS):
+    """
+    Join values known from given dates onto a dates x tickers grid, as of each date.
+
+    Every cell gets the latest event of its ticker available on or before its date
+    and at most max_age_days old. All tickers are joined in one sorted search over
+    (ticker, day) keys.
+
+    :param index: Dates of the grid (DatetimeIndex, timezone-naive)
+    :param columns: Tickers of the grid
+    :param events: DataFrame with ticker, available and eps columns, e.g. from trailing_eps
+    :param max_age_days: Oldest event used, in days before the grid date; None for no limit
+    :return: DataFrame shaped like the grid, NaN where no value is known
+    """
+    import numpy as np
+    import pandas as pd
+
+    columns = pd.Index(columns)
+    result = np.full((len(index), len(columns)), np.nan)
+    codes = columns.get_indexer(events['ticker'])
+    known = codes >= 0
+    if not known.any() or not len(index):
+        return pd.DataFrame(result, index=index, columns=columns)
+
+    grid_days = np.asarray(index.values, dtype='datetime64[D]').astype(np.int64)
+    event_days = np.asarray(events['available'].to_numpy()[known], dtype='datetime64[D]').astype(np.int64)
+    codes = codes[known].astype(np.int64)
+    values = events['eps'].to_numpy(dtype=float)[known]
+
+    # One key per (ticker, day), ordered by ticker then day, so a single searchsorted joins every ticker
+    base = min(grid_days.min(), event_days.min())
+    stride = max(grid_days.max(), event_days.max()) - base + 1
+    event_keys = codes * stride + (event_days - base)
+    order = np.argsort(event_keys, kind='stable')
+    event_keys, codes, event_days, values = event_keys[order], codes[order], event_days[order], values[order]
+
+    block = max(1, _BLOCK_CELLS // max(1, len(index)))
+    for start in range(0, len(columns), block):
+        block_codes = np.arange(start, min(start + block, len(columns)), dtype=np.int64)
+        query = block_codes[None, :] * stride + (grid_days - base)[:, None]
+        position = np.searchsorted(event_keys, query, side='right') - 1
+        found = position >= 0
+        position = np.maximum(position, 0)
+        found &= codes[position] == block_codes[None, :]
+        if max_age_days is not None:
+            found &= grid_days[:, None] - event_days[position] <= max_age_days
+        result[:, block_codes] = np.where(found, values[position], np.nan)
+    return pd.DataFrame(result, index=index, columns=columns)
+
+
+def valuation_panels(closes, reported, max_age_days=DEFAULT_MAX_AGE_DAYS):
+    """
+    Trailing EPS, P/E and earnings yield panels for a universe.
+
+    :param closes: DataFrame of daily closes, dates x tickers
+    :param reported: Long DataFrame of reported quarterly EPS with ticker, date and eps columns
+    :param max_age_days: Oldest trailing EPS used, in days before each close
+    :return: ValuationPanels of DataFrames shaped like closes (eps, pe, earnings_yield)
+    """
+    import numpy as np
+    import pandas as pd
+
+    closes = closes.rename(columns=str.upper)
+    index = pd.DatetimeIndex(closes.index)
+    index = (index.tz_localize(None) if index.tz is not None else index).normalize()
+
+    with stage('valuation.join', tickers=len(closes.columns), rows=len(closes)):
+        eps = asof_panel(index, closes.columns, trailing_eps(reported), max_age_days)
+        prices = closes.to_numpy(dtype=float)
+        eps_values = eps.to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pe = np.where(eps_values > 0, prices / eps_values, np.nan)
+            earnings_yield = np.where(prices > 0, eps_values / prices, np.nan)
+
+    def panel(values):
+        return pd.DataFrame(values, index=closes.index, columns=closes.columns)
+
+    return ValuationPanels(panel(eps_values), panel(pe), panel(earnings_yield))
+
+
+def fetch_reported_eps(tickers, max_workers=DEFAULT_WORKERS):
+    """
+    Fetch reported quarterly EPS histories for many tickers concurrently.
+
+    :param tickers: Iterable of ticker symbols
+    :param max_workers: Maximum number of tickers fetched at the same time
+    :return: (reported, errors) where reported is a long DataFrame with ticker, date
+             and eps columns, and errors maps each failed ticker to a message
+    """
+    import pandas as pd
+
+    from finance_tools.providers import get_provider
+
+    provider = get_provider()
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+
+    def fetch(ticker):
+        with stage('fetch.reported_eps', ticker=ticker) as s:
+            data = provider.reported_eps(ticker)
+            s.update(data)
+        if data.empty:
+            raise ValueError("No reported EPS available for the given ticker.")
+        return pd.DataFrame({'ticker': ticker, 'date': _naive(pd.Series(data.index)).to_numpy(),
+                             'eps': data.to_numpy(dtype=float)})
+
+    frames, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                frames[ticker] = future.result()
+            except Exception as e:
+                errors[ticker] = str(e)
+
+    ordered = [frames[ticker] for ticker in tickers if ticker in frames]
+    if not ordered:
+        return pd.DataFrame(columns=['ticker', 'date', 'eps']), errors
+    return pd.concat(ordered, ignore_index=True), errors
+
+
+def screen_valuation(tickers, start_date, end_date, max_age_days=DEFAULT_MAX_AGE_DAYS,
+                     max_workers=DEFAULT_WORKERS, store=None):
+    """
+    P/E and earnings yield panels for a universe from cached closes and reported EPS.
+
+    :param tickers: Iterable of ticker symbols
+    :param start_date: Start date in 'YYYY-MM-DD' format
+    :param end_date: End date in 'YYYY-MM-DD' format
+    :param max_age_days: Oldest trailing EPS used, in days before each close
+    :param max_workers: Maximum number of tickers fetched at the same time
+    :param store: PriceStore to read through, defaults to the shared store
+    :return: (panels, errors) where panels is a ValuationPanels and errors maps each
+             ticker whose closes or EPS could not be fetched to a message
+    """
+    closes, errors = fetch_closing_prices_batch(tickers, start_date, end_date, max_workers=max_workers,
+                                                store=store)
+    if closes.empty:
+        raise ValueError("No prices available for any ticker in the date range.")
+    reported, eps_errors = fetch_reported_eps(closes.columns, max_workers=max_workers)
+    errors.update(eps_errors)
+    return valuation_panels(closes, reported, max_age_days), errors
+
+
+def valuation_table(panels):
+    """
+    Panels in long form, one row per date and ticker with a known trailing EPS.
+
+    :param panels: ValuationPanels
+    :return: DataFrame with date, ticker, eps, pe and earnings_yield columns
+    """
+    import numpy as np
+    import pandas as pd
+
+    eps = panels.eps.to_numpy()
+    rows, columns = np.nonzero(~np.isnan(eps))
+    return pd.DataFrame({'date': panels.eps.index[rows], 'ticker': panels.eps.columns[columns],
+                         'eps': eps[rows, columns], 'pe': panels.pe.to_numpy()[rows, columns],
+                         'earnings_yield': panels.earnings_yield.to_numpy()[rows, columns]})
+
+
+def latest_valuation(panels):
+    """
+    Last known trailing EPS, P/E and earnings yield of every ticker, highest earnings yield first.
+
+    :param panels: ValuationPanels
+    :return: DataFrame indexed by ticker with date, eps, pe and earnings_yield columns
+    """
+    import numpy as np
+    import pandas as pd
+
+    tickers = pd.Index(panels.eps.columns, name='ticker')
+    known = ~np.isnan(panels.eps.to_numpy())
+    columns = np.flatnonzero(known.any(axis=0))
+    # Last known row of each column that has one
+    rows = len(known) - 1 - np.argmax(known[::-1, columns], axis=0) if len(columns) else columns
+
+    table = pd.DataFrame({'date': panels.eps.index[rows],
+                          'eps': panels.eps.to_numpy()[rows, columns],
+                          'pe': panels.pe.to_numpy()[rows, columns],
+                          'earnings_yield': panels.earnings_yield.to_numpy()[rows, columns]},
+                         index=tickers[columns])
+    return table.reindex(tickers).sort_values('earnings_yield', ascending=False)
+
+
+def main(argv=None):
+    from finance_tools.batch import read_tickers
+
+    parser = argparse.ArgumentParser(description="Trailing P/E and earnings yield for a list of tickers.")
+    parser.add_argument('tickers', help="File with ticker symbols (one per line or comma separated)")
+    parser.add_argument('start_date', help="Start date (YYYY-MM-DD)")
+    parser.add_argument('end_date', help="End date (YYYY-MM-DD)")
+    parser.add_argument('--max-age', type=int, default=DEFAULT_MAX_AGE_DAYS,
+                        help="Ignore trailing EPS older than this many days")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Concurrent downloads")
+    parser.add_argument('--output', help="Write the daily EPS, P/E and earnings yield to this file "
+                                         "(.csv, .parquet, .feather or .xlsx)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    configure(args)
+
+    panels, errors = screen_valuation(read_tickers(args.tickers), args.start_date, args.end_date,
+                                      max_age_days=args.max_age, max_workers=args.workers)
+    for ticker, message in sorted(errors.items()):
+        print(f"{ticker}: {message}", file=sys.stderr)
+
+    if args.output:
+        from finance_tools.exporters import export
+
+        export(valuation_table(panels).set_index('date'), args.output)
+        print(f"Data saved to {args.output}")
+    print(latest_valuation(panels).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
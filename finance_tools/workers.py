@@ -0,0 +1,119 @@
+"""
+Background execution for the Tk tools.
+
+Network calls run on a thread pool instead of the Tk event-loop thread, so the
+window stays responsive and several queued lookups can run at the same time.
+Finished jobs are handed back to the Tk thread by polling a queue with after(),
+because Tk widgets must only be touched from the thread running mainloop().
+"""
+import queue
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from finance_tools.instrumentation import profiled
+
+DEFAULT_WORKERS = 4
+DEFAULT_POLL_MS = 50
+
+
+class Job:
+    """Handle for a submitted call."""
+
+    def __init__(self, future, on_success, on_error):
+        self.future = future
+        self.on_success = on_success
+        self.on_error = on_error
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Cancel the job.
+
+        A job that has not started yet is removed from the queue. A running job
+        cannot be interrupted, but its callbacks will not be called.
+
+        :return: True if the job had not started yet
+        """
+        self.cancelled = True
+        return self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+
+class BackgroundRunner:
+    """
+    Runs functions on a thread pool and calls back on the Tk thread.
+
+    :param widget: Any Tk widget, used for after() scheduling
+    :param max_workers: Maximum number of jobs running at the same time
+    :param poll_interval: Milliseconds between checks for finished jobs
+    """
+
+    def __init__(self, widget, max_workers=DEFAULT_WORKERS, poll_interval=DEFAULT_POLL_MS):
+        self.widget = widget
+        self.poll_interval = poll_interval
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='finance-tools')
+        self._finished = queue.Queue()
+        self._jobs = set()
+        self._polling = False
+
+    @property
+    def pending(self):
+        """Number of jobs submitted whose callbacks have not run yet."""
+        return len(self._jobs)
+
+    def submit(self, func, *args, on_success=None, on_error=None, **kwargs):
+        """
+        Run func(*args, **kwargs) in the background.
+
+        Must be called from the Tk thread. on_success receives the return value
+        and on_error the exception; both run on the Tk thread.
+
+        :return: Job that can be cancelled
+        """
+        # profiled() adds the job to a running cProfile session, which only sees its own thread
+        job = Job(self._pool.submit(profiled, func, *args, **kwargs), on_success, on_error)
+        self._jobs.add(job)
+        # The done callback runs on the worker thread, so it only touches the queue
+        job.future.add_done_callback(lambda future: self._finished.put(job))
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval, self._poll)
+        return job
+
+    def _poll(self):
+        while True:
+            try:
+                job = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            self._jobs.discard(job)
+            self._deliver(job)
+
+        if self._jobs:
+            self.widget.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def _deliver(self, job):
+        if job.cancelled or job.future.cancelled():
+            return
+        error = job.future.exception()
+        if error is None:
+            if job.on_success is not None:
+                job.on_success(job.future.result())
+        elif job.on_error is not None:
+            job.on_error(error)
+        else:
+            print(f"Error: {str(error)}", file=sys.stderr)
+
+    def cancel_all(self):
+        """Cancel every job that has not delivered its result yet."""
+        for job in list(self._jobs):
+            job.cancel()
+
+    def shutdown(self):
+        """Cancel outstanding jobs and stop the worker threads."""
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
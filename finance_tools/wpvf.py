@@ -0,0 +1,262 @@
+"""
+Weighted Price Volume Flow (WPVF) indicator used by the MF rule program.
+
+WPVF = price change * volume / rolling volume sum over the last WPVF_WINDOW bars.
+
+compute_wpvf works on one ticker's DataFrame for the plotter. wpvf_panel and
+rank_by_wpvf compute the indicator for a whole universe at once on 2-D arrays
+(dates x tickers), which is what the morning screen uses. WPVFUpdater and
+WatchlistWPVF take new bars one at a time as they arrive.
+"""
+import math
+from datetime import datetime, timedelta
+
+from finance_tools.instrumentation import stage
+
+WPVF_WINDOW = 20
+
+
+def warmup_start_date(start_date, window=WPVF_WINDOW):
+    """
+    Start date to download from so the rolling window is filled by start_date.
+
+    :param start_date: Start date in 'YYYY-MM-DD' format
+    :param window: WPVF rolling window
+    :return: Date string 'window' days before start_date
+    :raises ValueError: If start_date is not in 'YYYY-MM-DD' format
+    """
+    return (datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=window)).strftime("%Y-%m-%d")
+
+
+def compute_wpvf(stock_data, window=WPVF_WINDOW):
+    """
+    Add 'Previous Close', 'Price Change' and 'WPVF' columns to price history.
+
+    :param stock_data: DataFrame with 'Close' and 'Volume' columns
+    :param window: Number of bars in the rolling volume sum
+    :return: The same DataFrame with the new columns
+    """
+    with stage('wpvf.compute', rows=len(stock_data)):
+        stock_data['Previous Close'] = stock_data['Close'].shift(1)
+        stock_data['Price Change'] = stock_data['Close'] - stock_data['Previous Close']
+
+        # WPVF calculation with rolling sum for Volume
+        stock_data['WPVF'] = stock_data['Price Change'] * stock_data['Volume'] / stock_data['Volume'].rolling(window=window).sum()
+
+        # Fill NaN values (from rolling sum) with 0 to ensure the graph starts at the start date
+        stock_data['WPVF'] = stock_data['WPVF'].fillna(0)
+    return stock_data
+
+
+def wpvf_panel(close, volume, window=WPVF_WINDOW):
+    """
+    WPVF for a panel of tickers in one vectorized pass.
+
+    Rows are dates and columns are tickers. Unlike compute_wpvf, warm-up values
+    are left as NaN: the first row has no previous close, and a rolling volume
+    sum is only defined once the window holds 'window' non-missing volumes.
+    Volumes are share counts, so the cumulative sums used for the rolling window
+    are exact and the result matches pandas' rolling(window).sum().
+
+    :param close: 2-D array or DataFrame of closing prices
+    :param volume: 2-D array or DataFrame of volumes, same shape as close
+    :param window: Number of bars in the rolling volume sum
+    :return: Array of WPVF values, or a DataFrame with close's index and columns
+    """
+    import numpy as np
+
+    if window < 1:
+        raise ValueError("WPVF window must be at least 1.")
+    close_values = np.asarray(close, dtype=float)
+    volume_values = np.asarray(volume, dtype=float)
+    if close_values.shape != volume_values.shape:
+        raise ValueError("Close and volume panels must have the same shape.")
+    one_dimensional = close_values.ndim == 1
+    if one_dimensional:
+        close_values = close_values[:, None]
+        volume_values = volume_values[:, None]
+
+    price_change = np.full(close_values.shape, np.nan)
+    price_change[1:] = close_values[1:] - close_values[:-1]
+
+    # Rolling volume sum from cumulative sums; windows with a missing volume stay NaN
+    rows = close_values.shape[0]
+    present = ~np.isnan(volume_values)
+    cumulative = np.zeros((rows + 1,) + close_values.shape[1:])
+    np.cumsum(np.where(present, volume_values, 0.0), axis=0, out=cumulative[1:])
+    counts = np.zeros(cumulative.shape, dtype=np.int64)
+    np.cumsum(present, axis=0, out=counts[1:])
+
+    rolling_volume = np.full(close_values.shape, np.nan)
+    if rows >= window:
+        full = (counts[window:] - counts[:-window]) == window
+        rolling_volume[window - 1:] = np.where(full, cumulative[window:] - cumulative[:-window], np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wpvf = price_change * volume_values / rolling_volume
+
+    if one_dimensional:
+        wpvf = wpvf[:, 0]
+    if hasattr(close, 'columns'):
+        import pandas as pd
+
+        return pd.DataFrame(wpvf, index=close.index, columns=close.columns)
+    return wpvf
+
+
+def rank_by_wpvf(close, volume, window=WPVF_WINDOW, tickers=None):
+    """
+    Rank a universe by its latest WPVF, highest first.
+
+    The latest value is the last non-NaN WPVF of each ticker, so a ticker that
+    did not trade on the final date is ranked by its previous bar. Tickers with
+    no WPVF at all (too little history) are left out.
+
+    :param close: DataFrame (dates x tickers) of closing prices, or a 2-D array
+    :param volume: Volumes with the same shape as close
+    :param window: Number of bars in the rolling volume sum
+    :param tickers: Column names when close is an array
+    :return: Series of latest WPVF indexed by ticker, sorted descending
+    """
+    import numpy as np
+    import pandas as pd
+
+    if tickers is None:
+        tickers = close.columns if hasattr(close, 'columns') else range(np.shape(close)[1])
+    wpvf = np.asarray(wpvf_panel(close, volume, window=window))
+
+    # Index of the last non-NaN row per column
+    valid = ~np.isnan(wpvf)
+    last_row = wpvf.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+    has_value = valid.any(axis=0)
+    latest = wpvf[last_row, np.arange(wpvf.shape[1])]
+
+    ranking = pd.Series(latest[has_value], index=pd.Index(tickers)[has_value], name='WPVF')
+    return ranking.sort_values(ascending=False, kind='stable')
+
+
+def screen_wpvf(tickers, start_date, end_date, window=WPVF_WINDOW, max_workers=None, store=None):
+    """
+    Fetch a universe through the price cache and rank it by latest WPVF.
+
+    :param tickers: Iterable of ticker symbols
+    :param start_date: Start date in 'YYYY-MM-DD' format
+    :param end_date: End date in 'YYYY-MM-DD' format
+    :param window: Number of bars in the rolling volume sum
+    :param max_workers: Concurrent downloads, defaults to the batch module default
+    :param store: PriceStore to read through, defaults to the shared store
+    :return: (ranking, errors) as returned by rank_by_wpvf and fetch_history_batch
+    """
+    from finance_tools.batch import DEFAULT_WORKERS, fetch_history_batch
+
+    panels, errors = fetch_history_batch(tickers, warmup_start_date(start_date, window), end_date,
+                                         fields=('Close', 'Volume'),
+                                         max_workers=max_workers or DEFAULT_WORKERS, store=store)
+    if panels['Close'].empty:
+        import pandas as pd
+
+        return pd.Series(dtype=float, name='WPVF'), errors
+    return rank_by_wpvf(panels['Close'], panels['Volume'], window=window), errors
+
+
+class WPVFUpdater:
+    """
+    Online WPVF for one ticker, fed one bar at a time.
+
+    Only the previous close and a ring buffer of the last 'window' volumes
+    with their running sum are kept, so each bar costs constant time and
+    memory. The values returned are identical to wpvf_panel over the same
+    bars, including NaN while the window is warming up.
+
+    :param window: Number of bars in the rolling volume sum
+    """
+
+    def __init__(self, window=WPVF_WINDOW):
+        if window < 1:
+            raise ValueError("WPVF window must be at least 1.")
+        self.window = window
+        self.previous_close = math.nan
+        self.value = math.nan
+        self._volumes = [math.nan] * window
+        self._position = 0
+        self._present = 0
+        self._volume_sum = 0.0
+
+    @classmethod
+    def from_history(cls, close, volume, window=WPVF_WINDOW):
+        """
+        Start an updater from existing history.
+
+        The value of the last bar needs its 'window' volumes and the close before
+        them, so only the last window + 1 bars are read.
+
+        :param close: Sequence of closing prices, oldest first
+        :param volume: Sequence of volumes, same length as close
+        :param window: Number of bars in the rolling volume sum
+        """
+        updater = cls(window)
+        for bar_close, bar_volume in zip(list(close)[-(window + 1):], list(volume)[-(window + 1):]):
+            updater.update(bar_close, bar_volume)
+        return updater
+
+    def update(self, close, volume):
+        """
+        Add the next bar and return its WPVF.
+
+        :param close: Closing price of the bar
+        :param volume: Volume of the bar
+        :return: WPVF of the bar, NaN until it is defined
+        """
+        close = float(close)
+        volume = float(volume)
+
+        # Swap the oldest volume in the ring buffer for the new one
+        oldest = self._volumes[self._position]
+        if not math.isnan(oldest):
+            self._volume_sum -= oldest
+            self._present -= 1
+        if not math.isnan(volume):
+            self._volume_sum += volume
+            self._present += 1
+        self._volumes[self._position] = volume
+        self._position = (self._position + 1) % self.window
+
+        flow = (close - self.previous_close) * volume
+        self.previous_close = close
+
+        if self._present < self.window:
+            self.value = math.nan
+        elif self._volume_sum == 0:
+            # Same result NumPy gives for a division by zero
+            self.value = math.nan if flow == 0 or math.isnan(flow) else math.copysign(math.inf, flow)
+        else:
+            self.value = flow / self._volume_sum
+        return self.value
+
+
+class WatchlistWPVF:
+    """
+    Streaming WPVF for a watchlist, one WPVFUpdater per ticker.
+
+    :param window: Number of bars in the rolling volume sum
+    """
+
+    def __init__(self, window=WPVF_WINDOW):
+        self.window = window
+        self.updaters = {}
+
+    def seed(self, ticker, close, volume):
+        """Warm a ticker up from its existing close and volume history."""
+        self.updaters[ticker.upper()] = WPVFUpdater.from_history(close, volume, window=self.window)
+
+    def update(self, ticker, close, volume):
+        """Add the next bar for a ticker and return its WPVF."""
+        ticker = ticker.upper()
+        if ticker not in self.updaters:
+            self.updaters[ticker] = WPVFUpdater(self.window)
+        return self.updaters[ticker].update(close, volume)
+
+    def latest(self):
+        """Latest WPVF of every ticker, highest first."""
+        return sorted(((ticker, updater.value) for ticker, updater in self.updaters.items()
+                       if not math.isnan(updater.value)), key=lambda item: item[1], reverse=True)
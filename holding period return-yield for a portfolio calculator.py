@@ -1,14 +1,36 @@
+import math
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox, filedialog
+from finance_tools.portfolio import Portfolio
+
+PAGE_SIZE = 10  # positions shown at a time
+
+
+def format_input(value):
+    return "" if math.isnan(value) else f"{value:.12g}"
+
+
+def parse_input(entry):
+    try:
+        return float(entry.get())
+    except ValueError:
+        return math.nan
+
 
 class InvestmentCalculator:
     def __init__(self, root):
         # Set the window size to be larger (4 cm wider and longer)
-        root.geometry("700x550")  # Approximate size: (700 pixels wide, 550 pixels tall)
+        root.geometry("700x600")  # Approximate size: (700 pixels wide, 600 pixels tall)
         
         self.root = root
         self.root.title("Investment Calculator")
         
+        # The positions live in arrays; the entry grid shows one page of them
+        self.portfolio = Portfolio()
+        self.portfolio.resize(PAGE_SIZE)
+        self.results = None
+        self.page = 0
+        
         # Create column headers
         headers = ["Shares", "Starting Price", "Beginning Market Value",
                    "Ending Price", "Ending Market Value", "Holding Period Return",
@@ -18,9 +40,9 @@ class InvestmentCalculator:
             label = tk.Label(root, text=header, relief=tk.RAISED)
             label.grid(row=0, column=col, padx=5, pady=5, sticky="nsew")
 
-        # Create entry fields for up to 10 investments
+        # Create entry fields for one page of investments
         self.entries = []
-        self.num_investments = 10
+        self.num_investments = PAGE_SIZE
         
         for i in range(self.num_investments):
             row_entries = []
@@ -30,64 +52,100 @@ class InvestmentCalculator:
                 row_entries.append(entry)
             self.entries.append(row_entries)
         
+        # Paging controls
+        previous_button = tk.Button(root, text="< Previous", command=lambda: self.go_to_page(self.page - 1))
+        previous_button.grid(row=self.num_investments+1, column=0, columnspan=2, pady=5)
+        self.page_label = tk.Label(root, text="")
+        self.page_label.grid(row=self.num_investments+1, column=2, columnspan=5, pady=5)
+        next_button = tk.Button(root, text="Next >", command=lambda: self.go_to_page(self.page + 1))
+        next_button.grid(row=self.num_investments+1, column=7, columnspan=2, pady=5)
+        
         # Button to compute results
         compute_button = tk.Button(root, text="Compute", command=self.compute)
-        compute_button.grid(row=self.num_investments+1, column=0, columnspan=9, pady=10)
+        compute_button.grid(row=self.num_investments+2, column=0, columnspan=5, pady=10)
         
-    def compute(self):
-        total_market_value_beginning = 0
-        total_market_value_ending = 0
+        # Button to load a whole book of positions
+        import_button = tk.Button(root, text="Import CSV/Excel", command=self.import_positions)
+        import_button.grid(row=self.num_investments+2, column=5, columnspan=4, pady=10)
         
-        for i in range(self.num_investments):
-            try:
-                shares = float(self.entries[i][0].get())
-                start_price = float(self.entries[i][1].get())
-                end_price = float(self.entries[i][3].get())
-                
-                begin_market_value = shares * start_price
-                end_market_value = shares * end_price
-                hpr = end_market_value / begin_market_value if begin_market_value != 0 else 0
-                hpy = hpr - 1
-                
-                total_market_value_beginning += begin_market_value
-                total_market_value_ending += end_market_value
-                
-                # Update entry fields with calculated values
-                self.entries[i][2].delete(0, tk.END)
-                self.entries[i][2].insert(0, f"{begin_market_value:.2f}")
-                
-                self.entries[i][4].delete(0, tk.END)
-                self.entries[i][4].insert(0, f"{end_market_value:.2f}")
-                
-                self.entries[i][5].delete(0, tk.END)
-                self.entries[i][5].insert(0, f"{hpr:.2f}")
-                
-                self.entries[i][6].delete(0, tk.END)
-                self.entries[i][6].insert(0, f"{hpy:.2f}")
-                
-            except ValueError:
-                # Clear results if input is invalid
-                self.entries[i][2].delete(0, tk.END)
-                self.entries[i][4].delete(0, tk.END)
-                self.entries[i][5].delete(0, tk.END)
-                self.entries[i][6].delete(0, tk.END)
+        self.totals_label = tk.Label(root, text="")
+        self.totals_label.grid(row=self.num_investments+3, column=0, columnspan=9)
+        
+        self.show_page()
         
+    def read_page(self):
+        # Copy the visible entries back into the portfolio arrays
+        first = self.page * PAGE_SIZE
+        for i in range(self.num_investments):
+            if first + i < len(self.portfolio):
+                self.portfolio.set_position(first + i, parse_input(self.entries[i][0]),
+                                            parse_input(self.entries[i][1]), parse_input(self.entries[i][3]))
+    
+    def show_page(self):
+        first = self.page * PAGE_SIZE
         for i in range(self.num_investments):
-            try:
-                begin_market_value = float(self.entries[i][2].get())
-                percent_weight = (begin_market_value / total_market_value_beginning) if total_market_value_beginning != 0 else 0
-                weighted_hpy = float(self.entries[i][6].get()) * percent_weight
-                
-                self.entries[i][7].delete(0, tk.END)
-                self.entries[i][7].insert(0, f"{percent_weight:.2%}")
-                
-                self.entries[i][8].delete(0, tk.END)
-                self.entries[i][8].insert(0, f"{weighted_hpy:.2%}")
-                
-            except ValueError:
-                # Clear weight and weighted HPY if input is invalid
-                self.entries[i][7].delete(0, tk.END)
-                self.entries[i][8].delete(0, tk.END)
+            index = first + i
+            if index < len(self.portfolio):
+                values = [format_input(self.portfolio.shares[index]), format_input(self.portfolio.start_price[index]),
+                          "", format_input(self.portfolio.end_price[index]), "", "", "", "", ""]
+                if self.results is not None and not math.isnan(self.results.hpr[index]):
+                    values[2] = f"{self.results.begin_market_value[index]:.2f}"
+                    values[4] = f"{self.results.end_market_value[index]:.2f}"
+                    values[5] = f"{self.results.hpr[index]:.2f}"
+                    values[6] = f"{self.results.hpy[index]:.2f}"
+                    values[7] = f"{self.results.weight[index]:.2%}"
+                    values[8] = f"{self.results.weighted_hpy[index]:.2%}"
+            else:
+                values = [""] * len(self.entries[i])
+            
+            for entry, value in zip(self.entries[i], values):
+                entry.delete(0, tk.END)
+                entry.insert(0, value)
+        
+        last = min(first + PAGE_SIZE, len(self.portfolio))
+        self.page_label.config(text=f"Positions {first + 1:,}-{last:,} of {len(self.portfolio):,}")
+    
+    def go_to_page(self, page):
+        if page < 0:
+            return
+        self.read_page()
+        # Paging past the end adds blank positions to fill in
+        if page * PAGE_SIZE >= len(self.portfolio):
+            self.portfolio.resize((page + 1) * PAGE_SIZE)
+            self.results = None
+        self.page = page
+        self.show_page()
+    
+    def import_positions(self):
+        path = filedialog.askopenfilename(title="Import Positions",
+                                          filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx *.xls"),
+                                                     ("All files", "*.*")])
+        if not path:
+            return
+        
+        try:
+            portfolio = Portfolio.from_file(path)
+        except Exception as e:
+            messagebox.showwarning("Error", str(e))
+            return
+        
+        self.portfolio = portfolio
+        self.page = 0
+        self.results = None
+        self.compute()
+        
+    def compute(self):
+        # Every position is computed at once from the arrays; only the visible page is formatted
+        self.read_page()
+        self.results = self.portfolio.compute()
+        self.show_page()
+        
+        # The weighted HPYs sum to the HPY of the whole portfolio
+        total_begin, total_end = self.results.total_begin, self.results.total_end
+        portfolio_hpy = total_end / total_begin - 1 if total_begin != 0 else 0
+        self.totals_label.config(text=f"Beginning Market Value: {total_begin:,.2f}    "
+                                      f"Ending Market Value: {total_end:,.2f}    "
+                                      f"Portfolio HPY: {portfolio_hpy:.2%}")
 
 if __name__ == "__main__":
     root = tk.Tk()
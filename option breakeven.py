@@ -1,65 +1,72 @@
 import tkinter as tk
 from tkinter import messagebox
+from finance_tools.options import break_even_price, strategy_break_evens
 
 def calculate_break_even():
     try:
         strike_price = float(entry_strike_price.get())
         premium = float(entry_premium.get())
 
-        if var_long_call.get():
-            result = strike_price + abs(premium)  # Treat premium as cost for long call
-            message = f"Break-even for Long Call: {result:.2f}"
-        elif var_short_call.get():
-            result = strike_price + abs(premium)  # Treat premium as income for short call
-            message = f"Break-even for Short Call: {result:.2f}"
-        elif var_long_put.get():
-            result = strike_price - abs(premium)  # Treat premium as cost for long put
-            message = f"Break-even for Long Put: {result:.2f}"
-        elif var_short_put.get():
-            result = strike_price - abs(premium)  # Treat premium as income for short put
-            message = f"Break-even for Short Put: {result:.2f}"
-        else:
+        # Every ticked box is a leg with this strike and premium
+        selected = [trade_type for trade_type, var in (('Long Call', var_long_call), ('Short Call', var_short_call),
+                                                       ('Long Put', var_long_put), ('Short Put', var_short_put))
+                    if var.get()]
+        if not selected:
             message = "Please select a trade type (Long/Short, Call/Put)."
+        else:
+            lines = [f"Break-even for {trade_type}: {break_even_price(strike_price, premium, trade_type):.2f}"
+                     for trade_type in selected]
+            if len(selected) > 1:
+                roots = strategy_break_evens([strike_price] * len(selected), [premium] * len(selected), selected)
+                combined = ", ".join(f"{root:.2f}" for root in roots) if len(roots) else "none"
+                lines.append(f"Break-even for the combined position: {combined}")
+            message = "\n".join(lines)
 
         messagebox.showinfo("Break-even Result", message)
     except ValueError:
         messagebox.showerror("Input Error", "Please enter valid numerical values for strike price and premium.")
 
-# Create the main application window
-root = tk.Tk()
-root.title("Options Break-even Calculator")
-root.geometry("400x300")
+def create_gui():
+    global entry_strike_price, entry_premium, var_long_call, var_short_call, var_long_put, var_short_put
+
+    # Create the main application window
+    root = tk.Tk()
+    root.title("Options Break-even Calculator")
+    root.geometry("400x300")
+
+    # Strike Price Entry
+    label_strike_price = tk.Label(root, text="Strike Price:")
+    label_strike_price.pack(pady=5)
+    entry_strike_price = tk.Entry(root)
+    entry_strike_price.pack(pady=5)
 
-# Strike Price Entry
-label_strike_price = tk.Label(root, text="Strike Price:")
-label_strike_price.pack(pady=5)
-entry_strike_price = tk.Entry(root)
-entry_strike_price.pack(pady=5)
+    # Premium Entry
+    label_premium = tk.Label(root, text="Premium (absolute value):")
+    label_premium.pack(pady=5)
+    entry_premium = tk.Entry(root)
+    entry_premium.pack(pady=5)
 
-# Premium Entry
-label_premium = tk.Label(root, text="Premium (absolute value):")
-label_premium.pack(pady=5)
-entry_premium = tk.Entry(root)
-entry_premium.pack(pady=5)
+    # Checkboxes for Trade Type
+    var_long_call = tk.BooleanVar()
+    var_short_call = tk.BooleanVar()
+    var_long_put = tk.BooleanVar()
+    var_short_put = tk.BooleanVar()
 
-# Checkboxes for Trade Type
-var_long_call = tk.BooleanVar()
-var_short_call = tk.BooleanVar()
-var_long_put = tk.BooleanVar()
-var_short_put = tk.BooleanVar()
+    checkbox_long_call = tk.Checkbutton(root, text="Long Call", variable=var_long_call)
+    checkbox_long_call.pack(pady=5)
+    checkbox_short_call = tk.Checkbutton(root, text="Short Call", variable=var_short_call)
+    checkbox_short_call.pack(pady=5)
+    checkbox_long_put = tk.Checkbutton(root, text="Long Put", variable=var_long_put)
+    checkbox_long_put.pack(pady=5)
+    checkbox_short_put = tk.Checkbutton(root, text="Short Put", variable=var_short_put)
+    checkbox_short_put.pack(pady=5)
 
-checkbox_long_call = tk.Checkbutton(root, text="Long Call", variable=var_long_call)
-checkbox_long_call.pack(pady=5)
-checkbox_short_call = tk.Checkbutton(root, text="Short Call", variable=var_short_call)
-checkbox_short_call.pack(pady=5)
-checkbox_long_put = tk.Checkbutton(root, text="Long Put", variable=var_long_put)
-checkbox_long_put.pack(pady=5)
-checkbox_short_put = tk.Checkbutton(root, text="Short Put", variable=var_short_put)
-checkbox_short_put.pack(pady=5)
+    # Calculate Button
+    button_calculate = tk.Button(root, text="Calculate Break-even", command=calculate_break_even)
+    button_calculate.pack(pady=20)
 
-# Calculate Button
-button_calculate = tk.Button(root, text="Calculate Break-even", command=calculate_break_even)
-button_calculate.pack(pady=20)
+    # Run the application
+    root.mainloop()
 
-# Run the application
-root.mainloop()
+if __name__ == "__main__":
+    create_gui()
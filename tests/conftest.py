@@ -0,0 +1,27 @@
+"""
+Shared fixtures: every test runs offline, on a seeded SyntheticProvider, with
+the local data stores in a temporary directory.
+"""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import pytest
+
+from finance_tools.providers import SyntheticProvider
+
+
+@pytest.fixture(autouse=True)
+def provider(tmp_path, monkeypatch):
+    """Point the data stores at tmp_path and make a SyntheticProvider the active provider."""
+    from finance_tools import dividends, price_cache, providers
+
+    monkeypatch.setenv('FINANCE_TOOLS_HOME', str(tmp_path))
+    monkeypatch.setattr(price_cache, '_default_store', None)
+    monkeypatch.setattr(dividends, '_default_store', None)
+    synthetic = SyntheticProvider()
+    monkeypatch.setattr(providers, '_provider', synthetic)
+    return synthetic
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from finance_tools import batch
+from finance_tools.batch import fetch_closing_prices_batch, read_tickers
+from finance_tools.providers import SyntheticProvider, set_provider
+
+
+class PartialProvider(SyntheticProvider):
+    """SyntheticProvider that fails for BAD and has no bars for EMPTY."""
+
+    def history(self, ticker, start_date, end_date, interval='1d'):
+        if ticker == 'BAD':
+            raise ConnectionError("Simulated network failure")
+        data = super().history(ticker, start_date, end_date, interval)
+        return data.iloc[:0] if ticker == 'EMPTY' else data
+
+
+@pytest.fixture
+def tickers_file(tmp_path):
+    path = tmp_path / 'tickers.txt'
+    path.write_text('# watchlist\nmsft, aapl\nBAD\n\nEMPTY  # delisted\nAAPL\n')
+    return str(path)
+
+
+def test_read_tickers(tickers_file):
+    assert read_tickers(tickers_file) == ['MSFT', 'AAPL', 'BAD', 'EMPTY']
+
+
+def test_failures_are_reported_not_raised(tickers_file):
+    set_provider(PartialProvider())
+    closes, errors = fetch_closing_prices_batch(read_tickers(tickers_file), '2020-01-01', '2020-03-01',
+                                                max_workers=3)
+
+    assert list(closes.columns) == ['MSFT', 'AAPL']
+    assert len(closes) == 60 and closes.notna().all().all()
+    assert sorted(errors) == ['BAD', 'EMPTY']
+    assert 'Simulated network failure' in errors['BAD']
+
+
+def test_monthly_closes_are_the_last_of_each_month():
+    daily, _ = fetch_closing_prices_batch(['AAA', 'BBB'], '2020-01-01', '2020-07-01')
+    monthly, _ = fetch_closing_prices_batch(['AAA', 'BBB'], '2020-01-01', '2020-07-01', monthly=True)
+
+    assert len(monthly) == 6
+    expected = daily.groupby(daily.index.to_period('M')).last()
+    assert monthly.to_numpy().tolist() == expected.to_numpy().tolist()
+
+
+def test_main_writes_the_closes(tickers_file, tmp_path, capsys):
+    set_provider(PartialProvider())
+    output = tmp_path / 'closes.csv'
+
+    assert batch.main([tickers_file, '2020-01-01', '2020-02-01', '--output', str(output)]) == 0
+    written = pd.read_csv(output, index_col=0)
+    assert list(written.columns) == ['MSFT', 'AAPL'] and len(written) == 31
+    assert 'BAD:' in capsys.readouterr().err
+
+
+def test_main_rejects_an_unknown_output_format(tickers_file):
+    with pytest.raises(SystemExit):
+        batch.main([tickers_file, '2020-01-01', '2020-02-01', '--output', 'closes.txt'])
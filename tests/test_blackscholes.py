@@ -0,0 +1,77 @@
+import numpy as np
+
+from finance_tools.blackscholes import MAX_VOLATILITY, SurfaceCache, black_scholes, implied_volatility
+
+
+def _chain():
+    strike, volatility, is_call = np.meshgrid(np.linspace(80, 120, 9), [0.1, 0.2, 0.6, 1.5], [True, False])
+    return strike.ravel(), volatility.ravel(), is_call.ravel()
+
+
+def test_round_trip():
+    strike, volatility, is_call = _chain()
+    price = black_scholes(100.0, strike, 0.5, 0.03, volatility, is_call, 0.01)
+
+    solved, report = implied_volatility(price, 100.0, strike, 0.5, 0.03, is_call, 0.01)
+    np.testing.assert_allclose(solved, volatility, rtol=1e-6)
+    assert report.converged == report.contracts == len(price)
+    assert report.out_of_bounds == report.not_converged == 0
+    assert report.newton_steps > 0
+
+
+def test_previous_solution_as_initial_guess():
+    strike, volatility, is_call = _chain()
+    price = black_scholes(100.0, strike, 0.5, 0.03, volatility, is_call)
+    _, cold = implied_volatility(price, 100.0, strike, 0.5, 0.03, is_call)
+    solved, warm = implied_volatility(price, 100.0, strike, 0.5, 0.03, is_call, initial=volatility)
+    np.testing.assert_allclose(solved, volatility, rtol=1e-6)
+    assert warm.iterations <= cold.iterations
+
+
+def test_prices_outside_the_bounds_have_no_volatility():
+    # Below intrinsic value, at the underlying price, zero time, NaN, above the MAX_VOLATILITY price
+    price = [4.0, 100.0, 5.0, np.nan, black_scholes(100, 100, 1, 0, MAX_VOLATILITY) + 1e-9]
+    solved, report = implied_volatility(price, 100.0, [95, 100, 100, 100, 100], [1, 1, 0, 1, 1], 0.0)
+    assert np.isnan(solved).all()
+    assert report.out_of_bounds == 5
+    assert report.converged == 0
+
+
+def test_shape_is_kept():
+    price = black_scholes(100.0, np.array([[90.0, 100.0], [110.0, 120.0]]), 1.0, 0.0, 0.3)
+    solved, _ = implied_volatility(price, 100.0, np.array([[90.0, 100.0], [110.0, 120.0]]), 1.0, 0.0)
+    assert solved.shape == (2, 2)
+    np.testing.assert_allclose(solved, 0.3, rtol=1e-6)
+
+
+def test_stalled_contracts_count_in_the_price_error():
+    strike, volatility, is_call = _chain()
+    price = black_scholes(100.0, strike, 0.5, 0.03, volatility, is_call)
+
+    # With no tolerance every contract ends on a bracket narrower than rounding
+    solved, report = implied_volatility(price, 100.0, strike, 0.5, 0.03, is_call, tolerance=0.0)
+    np.testing.assert_allclose(solved, volatility, rtol=1e-9)
+    assert report.converged == len(price)
+    assert report.bisection_steps > 0
+    assert 0.0 < report.max_price_error < 1e-10
+
+
+def test_surface_cache_reports_cached_outcomes():
+    strike, volatility, is_call = _chain()
+    price = black_scholes(100.0, strike, 0.5, 0.03, volatility, is_call)
+    price[0] = 0.0  # out of bounds
+    cache = SurfaceCache()
+
+    first, report = cache.implied_volatility('aaa', '2025-06-20', price, 100.0, strike, 0.5, 0.03, is_call)
+    assert (report.converged, report.out_of_bounds, report.cached) == (len(price) - 1, 1, 0)
+
+    again, report = cache.implied_volatility('AAA', '2025-06-20', price, 100.0, strike, 0.5, 0.03, is_call)
+    np.testing.assert_array_equal(again, first)
+    assert (report.converged, report.out_of_bounds, report.not_converged) == (len(price) - 1, 1, 0)
+    assert report.cached == len(price) and report.iterations == 0
+
+    price[1:4] *= 1.01
+    _, report = cache.implied_volatility('AAA', '2025-06-20', price, 100.0, strike, 0.5, 0.03, is_call)
+    assert report.cached == len(price) - 3
+    assert report.converged + report.out_of_bounds + report.not_converged == report.contracts == len(price)
+
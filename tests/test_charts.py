@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_tools.charts import chart_filename, downsample, lttb, minmax_decimate, render_chart_pack
+
+
+def test_minmax_keeps_every_extreme():
+    y = np.random.default_rng(3).normal(size=100_000).cumsum()
+    kept = minmax_decimate(y, 1000)
+    assert len(kept) <= 1000
+    assert kept[0] == 0 and kept[-1] == len(y) - 1
+    assert y[kept].min() == y.min() and y[kept].max() == y.max()
+    assert (np.diff(kept) > 0).all()
+
+
+@pytest.mark.parametrize('max_points', [4, 5, 7])
+def test_never_more_than_max_points(max_points):
+    y = np.random.default_rng(4).normal(size=1000)
+    assert len(downsample(np.arange(1000), y, max_points, 'minmax')) <= max_points
+    assert len(downsample(np.arange(1000), y, max_points, 'lttb')) == max_points
+
+
+def test_too_few_points():
+    with pytest.raises(ValueError, match='at least 4'):
+        downsample(np.arange(1000), np.arange(1000), 2, 'minmax')
+    with pytest.raises(ValueError, match='at least 3'):
+        lttb(np.arange(1000), np.arange(1000), 2)
+    with pytest.raises(ValueError, match='Unknown downsampling'):
+        downsample(np.arange(10), np.arange(10), 4, 'every other')
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(10_000)
+    y[5_432] = 10.0
+    kept = lttb(np.arange(len(y)), y, 100)
+    assert 5_432 in kept
+    assert kept[0] == 0 and kept[-1] == len(y) - 1
+
+
+def test_missing_values_are_skipped():
+    y = np.arange(20, dtype=float)
+    y[::3] = np.nan
+    for method in ('minmax', 'lttb'):
+        kept = downsample(np.arange(20), y, 6, method)
+        assert np.isfinite(y[kept]).all()
+        assert kept[0] == 1 and kept[-1] == 19
+
+
+def test_chart_filenames():
+    assert chart_filename('^GSPC') == '^GSPC_wpvf.png'
+    assert chart_filename('BRK/B', 'pdf') == 'BRK_B_wpvf.pdf'
+
+
+def test_chart_pack(tmp_path):
+    output_dir = tmp_path / 'charts'
+    paths, errors = render_chart_pack(['aaa', 'C_D', 'C/D', 'bbb'], '2020-06-01', '2020-09-01',
+                                      str(output_dir), max_workers=1, max_points=100)
+    assert list(paths) == ['AAA', 'C_D', 'BBB']
+    assert errors == {'C/D': 'Chart file C_D_wpvf.png is already used by C_D.'}
+    assert sorted(os.listdir(output_dir)) == ['AAA_wpvf.png', 'BBB_wpvf.png', 'C_D_wpvf.png']
+    with open(paths['AAA'], 'rb') as f:
+        assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+
+    with pytest.raises(ValueError, match='at least 3'):
+        render_chart_pack(['AAA'], '2020-06-01', '2020-09-01', str(output_dir), method='lttb', max_points=2)
+
+
+def test_chart_pack_in_worker_processes(tmp_path):
+    paths, errors = render_chart_pack(['AAA', 'BBB'], '2020-06-01', '2020-09-01', str(tmp_path),
+                                      file_format='pdf', max_workers=2)
+    assert errors == {}
+    assert [os.path.basename(path) for path in paths.values()] == ['AAA_wpvf.pdf', 'BBB_wpvf.pdf']
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_tools.dividends import DividendCache, DividendStore, calculate_total_dividends, get_stock_info
+from finance_tools.providers import SyntheticProvider
+
+
+class CountingProvider(SyntheticProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def dividends(self, ticker):
+        self.calls.append(('dividends', ticker))
+        return super().dividends(ticker)
+
+    def info(self, ticker):
+        self.calls.append(('info', ticker))
+        return super().info(ticker)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _brute_force(dividends, start_date, end_date):
+    dates = dividends.index.tz_localize(None)
+    return float(dividends[(dates >= start_date) & (dates <= end_date)].sum())
+
+
+def test_range_totals_match_a_scan(provider):
+    store = DividendStore(provider=provider)
+    dividends = provider.dividends('AAA')
+    rng = np.random.default_rng(3)
+    starts = pd.Timestamp('1999-01-01') + pd.to_timedelta(rng.integers(0, 8000, 200), unit='D')
+    ends = starts + pd.to_timedelta(rng.integers(0, 3000, 200), unit='D')
+
+    totals = store.totals('aaa', starts.strftime('%Y-%m-%d'), ends.strftime('%Y-%m-%d'), shares=3)
+    expected = [3 * _brute_force(dividends, start, end) for start, end in zip(starts, ends)]
+    np.testing.assert_allclose(totals, expected)
+    # Both ends are inclusive
+    first = dividends.index[0].strftime('%Y-%m-%d')
+    assert store.total('AAA', first, first) == pytest.approx(dividends.iloc[0])
+
+
+def test_symbols_are_fetched_once_per_ttl():
+    provider, clock = CountingProvider(), Clock()
+    store = DividendStore(ttl=60, clock=clock, provider=provider)
+
+    store.total('AAA', '2001-01-01', '2002-01-01')
+    store.total('aaa', '2003-01-01', '2004-01-01')
+    store.info('AAA')
+    assert provider.calls == [('dividends', 'AAA'), ('info', 'AAA')]
+
+    clock.now += 61
+    store.total('AAA', '2001-01-01', '2002-01-01')
+    assert provider.calls[-1] == ('dividends', 'AAA')
+    assert len(provider.calls) == 3
+
+
+def test_store_reads_through_the_disk_cache(tmp_path):
+    cache = DividendCache(str(tmp_path / 'dividends.sqlite'))
+    first = CountingProvider()
+    total = DividendStore(provider=first, cache=cache).total('AAA', '2001-01-01', '2010-01-01')
+    info = DividendStore(provider=first, cache=cache).info('AAA')
+
+    second = CountingProvider()
+    store = DividendStore(provider=second, cache=cache)
+    assert store.total('AAA', '2001-01-01', '2010-01-01') == pytest.approx(total)
+    assert store.info('AAA') == info
+    assert second.calls == []
+
+
+def test_cache_entries_expire(tmp_path):
+    clock = Clock()
+    cache = DividendCache(str(tmp_path / 'dividends.sqlite'), ttl=60, clock=clock)
+    cache.put_info('aaa', {'longName': 'AAA Corp'})
+    assert cache.get_info('AAA') == ({'longName': 'AAA Corp'}, 1000.0)
+    clock.now += 61
+    assert cache.get_info('AAA') is None
+    assert cache.get_dividends('AAA') is None
+
+
+def test_put_dividends_counts_changed_payments(tmp_path):
+    cache = DividendCache(str(tmp_path / 'dividends.sqlite'))
+    dividends = pd.Series([0.5, 0.5, 0.6], index=pd.to_datetime(['2020-03-15', '2020-06-15', '2020-09-15']))
+    assert cache.put_dividends('AAA', dividends) == 3
+    assert cache.put_dividends('AAA', dividends) == 0
+
+    revised = pd.concat([dividends.iloc[1:].replace(0.6, 0.65), pd.Series([0.7], index=[pd.Timestamp('2020-12-15')])])
+    assert cache.put_dividends('AAA', revised) == 2
+    stored, _ = cache.get_dividends('AAA')
+    assert stored.tolist() == [0.5, 0.65, 0.7]
+
+
+def test_module_helpers_use_the_shared_store(provider):
+    assert get_stock_info('AAA') == ('AAA Corp', 'USD')
+    dividends = provider.dividends('AAA')
+    assert calculate_total_dividends('AAA', '2005-01-01', '2006-12-31', 10) == pytest.approx(
+        10 * _brute_force(dividends, '2005-01-01', '2006-12-31'))
@@ -0,0 +1,95 @@
+import pytest
+
+from finance_tools.eps import EPSCache, fetch_eps_bulk, get_latest_eps
+from finance_tools.ratelimit import RateLimiter, backoff_delay, call_with_retries
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _fetcher(calls):
+    def fetch(ticker):
+        calls.append(ticker)
+        if ticker == 'FLAKY' and calls.count('FLAKY') < 3:
+            raise ConnectionError("reset by peer")
+        if ticker == 'DOWN':
+            raise ConnectionError("unreachable")
+        return None if ticker == 'NONE' else float(len(ticker))
+    return fetch
+
+
+def test_bulk_statuses_retries_and_cache(tmp_path):
+    cache = EPSCache(str(tmp_path / 'eps.sqlite'))
+    calls = []
+    tickers = ['aapl', 'FLAKY', 'DOWN', 'NONE', 'AAPL']
+
+    results = fetch_eps_bulk(tickers, rate=1000, retries=2, backoff=0, cache=cache, fetcher=_fetcher(calls))
+    assert results['ticker'].tolist() == ['AAPL', 'FLAKY', 'DOWN', 'NONE']
+    assert results['status'].tolist() == ['ok', 'ok', 'error: unreachable', 'missing']
+    assert results['eps'].tolist()[:2] == [4.0, 5.0]
+    assert calls.count('FLAKY') == 3 and calls.count('DOWN') == 3
+
+    calls.clear()
+    again = fetch_eps_bulk(tickers, rate=1000, retries=0, backoff=0, cache=cache, fetcher=_fetcher(calls))
+    assert again['status'].tolist() == ['cached', 'cached', 'error: unreachable', 'missing']
+    assert calls == ['DOWN']  # failures are never cached
+
+
+def test_cache_expiry(tmp_path):
+    clock = FakeClock()
+    cache = EPSCache(str(tmp_path / 'eps.sqlite'), ttl=60, clock=clock)
+    cache.put('aaa', 2.5)
+    assert cache.get('AAA') == (2.5, 0.0)
+    clock.now = 61
+    assert cache.get('AAA') is None
+    assert cache.get('AAA', ignore_ttl=True) == (2.5, 0.0)
+
+
+def test_latest_eps_from_the_provider(provider):
+    assert get_latest_eps('AAA') == 1.0
+    assert EPSCache().get('AAA')[0] == 1.0
+
+
+def test_rate_limiter_spaces_calls():
+    clock = FakeClock()
+    limiter = RateLimiter(2, burst=2, clock=clock, sleep=clock.sleep)
+    waits = [limiter.acquire() for _ in range(5)]
+    assert waits == [0.0, 0.0, 0.5, 0.5, 0.5]
+    assert clock.now == pytest.approx(1.5)
+
+
+def test_rate_limiter_pause_holds_back_every_caller():
+    clock = FakeClock()
+    limiter = RateLimiter(10, clock=clock, sleep=clock.sleep)
+    limiter.pause(2.0)
+    assert limiter.acquire() == pytest.approx(2.1)
+
+
+def test_backoff_delay_bounds():
+    for attempt in range(6):
+        delay = backoff_delay(attempt, backoff=1.0, max_backoff=10.0)
+        assert min(10.0, 2 ** attempt) * 0.5 <= delay <= min(10.0, 2 ** attempt)
+    assert backoff_delay(0, retry_after=7.0) == 7.0
+    assert backoff_delay(0, max_backoff=5.0, retry_after=60.0) == 5.0
+
+
+def test_call_with_retries_gives_up():
+    clock, attempts = FakeClock(), []
+
+    def fail():
+        attempts.append(clock.now)
+        raise ValueError("still failing")
+
+    with pytest.raises(ValueError):
+        call_with_retries(fail, retries=2, backoff=1.0, sleep=clock.sleep)
+    assert len(attempts) == 3 and len(clock.sleeps) == 2
@@ -0,0 +1,87 @@
+import gzip
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_tools import exporters
+from finance_tools.exporters import CsvExporter, export, get_exporter, register_exporter
+
+PANEL = pd.DataFrame({'AAA': np.arange(10, dtype=float), 'BBB': np.arange(10, 20, dtype=float)},
+                     index=pd.date_range('2020-01-01', periods=10, freq='D', name='Date'))
+
+
+def _windows(frame, rows):
+    for start in range(0, len(frame), rows):
+        yield frame.iloc[start:start + rows]
+
+
+@pytest.mark.parametrize('name, read', [
+    ('panel.csv', lambda path: pd.read_csv(path, index_col=0, parse_dates=True)),
+    ('panel.csv.gz', lambda path: pd.read_csv(path, index_col=0, parse_dates=True)),
+    ('panel.parquet', pd.read_parquet),
+    ('panel.feather', pd.read_feather),
+])
+def test_round_trip_in_chunks(tmp_path, name, read):
+    path = tmp_path / name
+    assert export(_windows(PANEL, 4), path, chunk_rows=3) == 10
+    pd.testing.assert_frame_equal(read(path), PANEL, check_freq=False)
+
+
+def test_compression_from_the_path_and_by_name(tmp_path):
+    export(PANEL, tmp_path / 'panel.csv.gz')
+    with gzip.open(tmp_path / 'panel.csv.gz', 'rt') as f:
+        assert f.readline().strip() == 'Date,AAA,BBB'
+
+    export(PANEL, tmp_path / 'panel.parquet', compression='zstd')
+    import pyarrow.parquet as pq
+    metadata = pq.ParquetFile(tmp_path / 'panel.parquet').metadata
+    assert metadata.num_row_groups == 1
+    assert metadata.row_group(0).column(0).compression == 'ZSTD'
+
+
+def test_xlsx_continues_on_a_new_sheet(tmp_path, monkeypatch):
+    from openpyxl import load_workbook
+
+    monkeypatch.setattr(exporters, 'EXCEL_MAX_ROWS', 5)
+    data = PANEL.copy()
+    data.iloc[0, 0], data.iloc[1, 0] = np.nan, np.inf
+    path = tmp_path / 'panel.xlsx'
+    assert export(data, path, chunk_rows=3, sheet_name='Daily Closing Prices') == 10
+
+    workbook = load_workbook(path)
+    assert workbook.sheetnames == ['Daily Closing Prices', 'Daily Closing Prices (2)', 'Daily Closing Prices (3)']
+    rows = [row for sheet in workbook for row in sheet.iter_rows(min_row=2, values_only=True)]
+    assert all(next(sheet.iter_rows(values_only=True)) == ('Date', 'AAA', 'BBB') for sheet in workbook)
+    assert len(rows) == 10
+    assert rows[0][1] is None and rows[1][1] is None
+    assert rows[2][1:] == (2.0, 12.0)
+
+
+def test_empty_inputs(tmp_path):
+    with pytest.raises(ValueError, match='no tables'):
+        export(iter([]), tmp_path / 'panel.csv')
+    assert export(PANEL.iloc[:0], tmp_path / 'empty.csv') == 0
+    assert (tmp_path / 'empty.csv').read_text().strip() == 'Date,AAA,BBB'
+
+
+def test_format_and_codec_errors(tmp_path):
+    with pytest.raises(ValueError, match='Cannot tell'):
+        get_exporter(tmp_path / 'panel.txt')
+    with pytest.raises(ValueError, match="Unknown export format 'hdf5'"):
+        get_exporter(tmp_path / 'panel.h5', file_format='hdf5')
+    with pytest.raises(ValueError, match='does not support'):
+        get_exporter(tmp_path / 'panel.feather', compression='gzip')
+    with pytest.raises(ValueError, match='chunk_rows'):
+        export(PANEL, tmp_path / 'panel.csv', chunk_rows=0)
+    assert get_exporter(tmp_path / 'panel.CSV.XZ') == (exporters.EXPORTERS['csv'], 'xz')
+    assert get_exporter(tmp_path / 'panel.parquet', compression='none')[1] is None
+
+
+def test_registered_formats(tmp_path, monkeypatch):
+    class TsvExporter(CsvExporter):
+        extensions = ('.tsv',)
+
+    monkeypatch.setattr(exporters, 'EXPORTERS', dict(exporters.EXPORTERS))
+    register_exporter('tsv', TsvExporter())
+    assert isinstance(get_exporter(tmp_path / 'panel.tsv')[0], TsvExporter)
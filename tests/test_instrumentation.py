@@ -0,0 +1,117 @@
+import argparse
+import json
+import pstats
+
+import pandas as pd
+import pytest
+
+from finance_tools import instrumentation
+from finance_tools.instrumentation import (add_arguments, configure, disable, enable, main, parse_profile_spec,
+                                           profiled, stage, start_profile, stop_profile, summarize)
+
+
+@pytest.fixture(autouse=True)
+def switched_off():
+    yield
+    disable()
+    stop_profile()
+
+
+def _records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_stages_are_free_while_off(tmp_path):
+    assert stage('fetch.history', ticker='AAA') is stage('export')
+    with stage('fetch.history') as s:
+        s.update(rows=10)
+    enable(str(tmp_path / 'trace.jsonl'))
+    disable()
+    assert _records(tmp_path / 'trace.jsonl') == []
+
+
+def test_stage_records(tmp_path):
+    path = tmp_path / 'trace.jsonl'
+    enable(str(path))
+    frame = pd.DataFrame({'Close': [1.0, 2.0, 3.0]})
+    with stage('batch', tickers=2):
+        with stage('fetch.history', ticker='AAA') as s:
+            s.update(frame, interval='1d')
+        with pytest.raises(KeyError):
+            with stage('fetch.history', ticker='BBB'):
+                raise KeyError('BBB')
+    disable()
+
+    inner, failed, outer = _records(path)
+    assert inner['stage'] == 'fetch.history' and inner['parent'] == 'batch'
+    assert inner['ticker'] == 'AAA' and inner['interval'] == '1d'
+    assert inner['rows'] == 3 and inner['bytes'] == frame.memory_usage(index=True).sum()
+    assert failed['error'] == "KeyError: 'BBB'"
+    assert outer['tickers'] == 2 and 'parent' not in outer
+    assert outer['seconds'] >= inner['seconds'] + failed['seconds']
+
+
+def test_summary(tmp_path, capsys):
+    path = tmp_path / 'trace.jsonl'
+    path.write_text('\n'.join(json.dumps(record) for record in [
+        {'stage': 'export', 'seconds': 1.0, 'rows': 10, 'bytes': 100, 'peak_memory': 50},
+        {'stage': 'export', 'seconds': 3.0, 'rows': 5, 'peak_memory': 70},
+        {'stage': 'fetch.history', 'seconds': 0.5, 'error': 'HTTPError: 404'},
+    ]) + '\n\n')
+    summary = summarize(str(path))
+    assert summary['export'] == {'count': 2, 'errors': 0, 'seconds': 4.0, 'max_seconds': 3.0, 'rows': 15,
+                                 'bytes': 100, 'peak_memory': 70, 'mean_seconds': 2.0}
+    assert summary['fetch.history']['errors'] == 1
+    assert summary['fetch.history']['peak_memory'] is None
+
+    assert main([str(path)]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines] == ['Stage', 'export', 'fetch.history']
+
+
+def test_profile_specs():
+    assert parse_profile_spec('cprofile:run.prof') == ('cprofile', 'run.prof')
+    for spec in ('cprofile', 'cprofile:', 'yappi:run.prof'):
+        with pytest.raises(ValueError):
+            parse_profile_spec(spec)
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    with pytest.raises(SystemExit):
+        parser.parse_args(['--profile', 'yappi:run.prof'])
+
+
+def _work():
+    return sum(i * i for i in range(10_000))
+
+
+def test_cprofile_dump(tmp_path):
+    path = str(tmp_path / 'run.prof')
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    configure(parser.parse_args(['--profile', f'cprofile:{path}', '--trace', str(tmp_path / 'trace.jsonl')]))
+    assert instrumentation.enabled()
+    with pytest.raises(RuntimeError):
+        start_profile(f'cprofile:{path}')
+    assert profiled(_work) == _work()
+    assert stop_profile() == path
+    assert stop_profile() is None
+
+    functions = {function for _, _, function in pstats.Stats(path).stats}
+    assert '_work' in functions
+
+
+def test_tracemalloc_snapshot(tmp_path):
+    import tracemalloc
+
+    path = str(tmp_path / 'run.snapshot')
+    start_profile(f'tracemalloc:{path}')
+    enable(str(tmp_path / 'trace.jsonl'))
+    with stage('allocate'):
+        data = bytearray(10_000_000)
+    del data
+    disable()
+    assert stop_profile() == path
+    assert not tracemalloc.is_tracing()
+    assert tracemalloc.Snapshot.load(path).traces
+    assert _records(tmp_path / 'trace.jsonl')[0]['peak_memory'] >= 10_000_000
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_tools import intraday
+from finance_tools.intraday import download_intraday, plan_windows, stitch
+from finance_tools.providers import MarketDataProvider, set_provider
+
+
+class MinuteProvider(MarketDataProvider):
+    """One bar a minute over the requested range, or nothing at all when empty is set."""
+
+    intraday_windows = {'1m': (7, None)}
+
+    def __init__(self, empty=False):
+        self.empty = empty
+        self.requests = []
+
+    def history(self, ticker, start_date, end_date, interval='1d'):
+        self.requests.append((start_date, end_date))
+        if self.empty:
+            return pd.DataFrame()
+        # Include the previous window's last bar, as Yahoo does
+        index = pd.date_range(pd.Timestamp(start_date) - pd.Timedelta(minutes=1), end_date, freq='min',
+                              inclusive='left', tz='America/New_York')
+        return pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': np.arange(len(index), dtype=float),
+                             'Volume': 100.0, 'Dividends': 0.0, 'Stock Splits': 0.0}, index=index)
+
+
+def test_plan_windows_respects_provider_limits():
+    assert plan_windows('2025-01-01', '2025-01-20', '1m', {'1m': (7, None)}) == [
+        ('2025-01-01', '2025-01-08'), ('2025-01-08', '2025-01-15'), ('2025-01-15', '2025-01-20')]
+    with pytest.raises(ValueError):
+        plan_windows('2025-01-01', '2025-02-20', '1m', {'1m': (7, 30)}, today=pd.Timestamp('2025-03-01').date())
+
+
+def test_stitch_drops_repeated_boundary_bars():
+    index = pd.date_range('2025-01-01', periods=4, freq='min')
+    first = pd.DataFrame({'Close': [1.0, 2.0, 3.0, 4.0]}, index=index)
+    second = pd.DataFrame({'Close': [4.0, 5.0]}, index=index[-1:].append(index[-1:] + pd.Timedelta(minutes=1)))
+    stitched = pd.concat(list(stitch([first, pd.DataFrame(), second])))
+    assert stitched.index.is_unique and len(stitched) == 5
+
+
+@pytest.mark.parametrize('extension', ['parquet', 'feather', 'csv'])
+def test_download_in_windows(tmp_path, extension):
+    pytest.importorskip('pyarrow')
+    provider = set_provider(MinuteProvider())
+    path = str(tmp_path / f'bars.{extension}')
+
+    rows, windows = download_intraday('aaa', '2025-01-01', '2025-01-20', path, max_workers=2)
+
+    assert (rows, windows) == (19 * 24 * 60, 3)
+    assert len(provider.requests) == 3
+    assert sorted(os.listdir(tmp_path)) == [f'bars.{extension}']
+
+
+@pytest.mark.parametrize('extension', ['parquet', 'feather', 'csv'])
+def test_download_without_data_leaves_no_file(tmp_path, extension):
+    set_provider(MinuteProvider(empty=True))
+    path = str(tmp_path / f'bars.{extension}')
+
+    with pytest.raises(ValueError, match='No data available'):
+        download_intraday('AAA', '2025-01-01', '2025-01-20', path)
+    assert os.listdir(tmp_path) == []
+
+    assert intraday.main(['AAA', '2025-01-01', '2025-01-20', '--output', path]) == 1
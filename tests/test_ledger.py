@@ -0,0 +1,66 @@
+import pytest
+
+from finance_tools.dividends import DividendStore
+from finance_tools.ledger import DividendLedger
+
+
+def _expected_total(provider, symbol, start_date, end_date, shares):
+    dividends = provider.dividends(symbol)
+    dates = dividends.index.tz_localize(None).normalize()
+    return float(dividends[(dates >= start_date) & (dates <= end_date)].sum()) * shares
+
+
+def test_running_totals_per_currency():
+    ledger = DividendLedger()
+    ledger.add('AAA', 'AAA Corp', '2020-01-01', '2021-01-01', 12.5, 'USD', 10)
+    ledger.extend([('BBB', 'BBB plc', '2020-01-01', '2021-01-01', 4.0, 'GBP', 5),
+                   ('CCC', 'CCC Corp', '2020-01-01', '2021-01-01', 2.5, 'USD', 1)])
+    assert len(ledger) == 3
+    assert dict(ledger.currency_totals) == {'USD': 15.0, 'GBP': 4.0}
+    assert ledger.rows(1, 2) == [('BBB', 'BBB plc', '2020-01-01', '2021-01-01', 4.0, 'GBP', 5)]
+    assert ledger.to_frame()['total'].sum() == 19.0
+
+    ledger.clear()
+    assert len(ledger) == 0 and not ledger.currency_totals
+
+
+def test_import_csv_totals_each_lot(tmp_path, provider):
+    path = tmp_path / 'holdings.csv'
+    path.write_text('Symbol,Shares,Start_Date,End_Date\n'
+                    'aaa,10,2005-01-01,2010-12-31\n'
+                    'BBB,2.5,2001-06-01,2003-06-01\n'
+                    ',1,2005-01-01,2006-01-01\n'
+                    'AAA,4,2015-01-01,2016-01-01\n'
+                    'BBB,many,2001-06-01,2003-06-01\n')
+
+    ledger = DividendLedger()
+    errors = ledger.import_csv(str(path), store=DividendStore(provider=provider))
+
+    assert sorted(errors) == [4, 6]
+    rows = ledger.rows()
+    assert [(row[0], row[2], row[6]) for row in rows] == [('AAA', '2005-01-01', 10.0), ('BBB', '2001-06-01', 2.5),
+                                                        ('AAA', '2015-01-01', 4.0)]
+    for symbol, _, start_date, end_date, total, currency, shares in rows:
+        assert total == pytest.approx(_expected_total(provider, symbol, start_date, end_date, shares))
+        assert total > 0 and currency == 'USD'
+    assert ledger.currency_totals['USD'] == pytest.approx(sum(row[4] for row in rows))
+
+
+def test_import_csv_rejects_only_rows_with_bad_dates(tmp_path, provider):
+    path = tmp_path / 'holdings.csv'
+    path.write_text('symbol,shares,start_date,end_date\n'
+                    'AAA,10,2005-01-01,2010-12-31\n'
+                    'AAA,10,01/01/2005,2010-12-31\n'
+                    'AAA,10,2005-01-01,2010-13-01\n'
+                    'AAA,10,20050101,2010-12-31\n'
+                    'AAA,10,2005-W01-1,2010-12-31\n'
+                    'AAA,5,2011-1-1,2012-01-01\n')
+
+    ledger = DividendLedger()
+    errors = ledger.import_csv(str(path), store=DividendStore(provider=provider))
+
+    assert sorted(errors) == [3, 4, 5, 6]
+    assert all('YYYY-MM-DD' in message for message in errors.values())
+    assert [row[6] for row in ledger.rows()] == [10.0, 5.0]
+    assert [row[2] for row in ledger.rows()] == ['2005-01-01', '2011-01-01']
+    assert all(row[4] > 0 for row in ledger.rows())
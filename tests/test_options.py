@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from finance_tools.options import break_even_prices, payoff_grid, strategy_break_evens
+
+
+def test_single_legs_match_break_even_prices():
+    types = ['Long Call', 'Short Call', 'Long Put', 'Short Put']
+    expected = break_even_prices([100] * 4, [5] * 4, types)
+    for trade_type, price in zip(types, expected):
+        assert strategy_break_evens([100], [5], [trade_type]).tolist() == [price]
+
+
+def test_roots_are_zeros_of_the_payoff():
+    strikes, premiums = [90, 95, 105, 110], [1, 3, 3, 1]
+    types = ['Long Put', 'Short Put', 'Short Call', 'Long Call']
+    roots = strategy_break_evens(strikes, premiums, types)
+    assert roots.tolist() == [91.0, 109.0]
+    np.testing.assert_allclose(payoff_grid(strikes, premiums, types, roots), 0.0, atol=1e-12)
+
+
+def test_strategies_from_any_leg_array():
+    # Two strategies given only by their premiums, or only by their quantities
+    by_premiums = strategy_break_evens(100, [[5, 5], [3, 3]], ['Long Call', 'Long Put'])
+    by_quantities = strategy_break_evens([100, 100], [5, 5], ['Long Call', 'Long Put'], quantities=[[1, 1], [2, 1]])
+    assert [roots.tolist() for roots in by_premiums] == [[90.0, 110.0], [94.0, 106.0]]
+    assert [roots.tolist() for roots in by_quantities] == [[90.0, 110.0], [85.0, 107.5]]
+
+
+@pytest.mark.parametrize('strikes, premiums, types', [
+    ([100, 100], [5, 5], ['Long Call', 'Short Call']),  # zero everywhere
+    ([100, 100], [0, 0], ['Long Call', 'Long Put']),    # touches zero at the strike
+    ([95, 105], [0, 0], ['Long Call', 'Short Call']),   # zero, then a profit
+])
+def test_no_break_even_without_a_sign_change(strikes, premiums, types):
+    assert strategy_break_evens(strikes, premiums, types).size == 0
+
+
+def test_zero_range_between_loss_and_profit():
+    roots = strategy_break_evens([95, 105, 110], [0, 0, 0], ['Short Put', 'Long Call', 'Short Call'])
+    assert roots.tolist() == [95.0, 105.0]
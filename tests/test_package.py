@@ -0,0 +1,31 @@
+import importlib
+import pkgutil
+
+import pytest
+
+import finance_tools
+from finance_tools.startup_check import MODULES, measure_import
+
+
+def test_every_export_resolves():
+    for name in finance_tools.__all__:
+        assert getattr(finance_tools, name) is not None, name
+    assert set(finance_tools.__all__) <= set(dir(finance_tools))
+    with pytest.raises(AttributeError):
+        finance_tools.no_such_name
+
+
+def test_exports_come_from_their_modules():
+    for name, module in finance_tools._EXPORTS.items():
+        assert getattr(importlib.import_module(f'finance_tools.{module}'), name) is getattr(finance_tools, name)
+
+
+def test_startup_check_lists_every_module():
+    modules = {f'finance_tools.{info.name}' for info in pkgutil.iter_modules(finance_tools.__path__)}
+    assert modules - {'finance_tools.startup_check'} <= set(MODULES)
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_loads_no_heavy_dependencies(module):
+    _, heavy = measure_import(module)
+    assert heavy == []
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_tools.performance import link_returns, portfolio_performance, portfolio_returns, rolling_returns
+
+DATES = pd.date_range('2020-01-01', periods=4, freq='D')
+PRICES = pd.DataFrame({'A': [100.0, 110.0, 121.0, 121.0], 'B': [50.0, 50.0, 25.0, 50.0]}, index=DATES)
+
+
+def test_drifting_weights():
+    returns = portfolio_returns(PRICES, {'A': 0.5, 'B': 0.5})
+    wealth = 0.5 * PRICES['A'] / 100 + 0.5 * PRICES['B'] / 50
+    assert returns.index.tolist() == DATES[1:].tolist()
+    assert returns['hpr'].tolist() == pytest.approx((wealth / wealth.shift()).iloc[1:].tolist())
+    assert (returns['hpy'] == returns['hpr'] - 1).all()
+
+
+def test_rebalanced_every_day():
+    returns = portfolio_returns(PRICES, {'A': 0.5, 'B': 0.5}, rebalance='always')
+    expected = 0.5 * PRICES['A'] / PRICES['A'].shift() + 0.5 * PRICES['B'] / PRICES['B'].shift()
+    assert returns['hpr'].tolist() == pytest.approx(expected.iloc[1:].tolist())
+
+
+def test_cash_shorts_and_a_schedule():
+    cash = portfolio_returns(PRICES, {'A': 0.5})
+    assert cash['hpr'].iloc[0] == pytest.approx(1.05)
+
+    short = portfolio_returns(PRICES[['A']], {'A': -1.0}, rebalance='always')
+    assert short['hpr'].iloc[0] == pytest.approx(0.9)
+
+    schedule = pd.DataFrame({'A': [1.0, 0.0], 'B': [0.0, 1.0]}, index=[DATES[0], DATES[2]])
+    switched = portfolio_returns(PRICES, schedule)
+    assert switched['hpr'].tolist() == pytest.approx([1.1, 1.1, 2.0])
+
+
+def test_invalid_inputs():
+    with pytest.raises(ValueError, match='Rebalance'):
+        portfolio_returns(PRICES, {'A': 1.0}, rebalance='never')
+    with pytest.raises(ValueError, match='two price dates'):
+        portfolio_returns(PRICES.iloc[:1], {'A': 1.0})
+    with pytest.raises(ValueError, match='No prices for: C'):
+        portfolio_returns(PRICES, {'C': 1.0})
+    with pytest.raises(ValueError, match='Frequency'):
+        link_returns(portfolio_returns(PRICES, {'A': 1.0}), 'hourly')
+    with pytest.raises(ValueError, match='Window'):
+        rolling_returns(portfolio_returns(PRICES, {'A': 1.0}), 0)
+
+
+def test_linking_keeps_the_total():
+    index = pd.date_range('2020-01-02', '2021-12-31', freq='B')
+    hpr = pd.Series(np.random.default_rng(1).normal(1.0, 0.01, len(index)), index=index)
+    for frequency in ('daily', 'weekly', 'monthly', 'quarterly', 'yearly'):
+        linked = link_returns(hpr, frequency)
+        assert linked['hpr'].prod() == pytest.approx(hpr.prod())
+    monthly = link_returns(hpr, 'monthly')
+    assert len(monthly) == 24 and monthly.index[0] == pd.Timestamp('2020-01-31')
+    assert monthly['hpr'].iloc[0] == pytest.approx(hpr['2020-01'].prod())
+
+    rolling = rolling_returns(monthly, 12)
+    assert rolling['hpr'].iloc[:11].isna().all()
+    assert rolling['hpr'].iloc[11] == pytest.approx(hpr['2020'].prod())
+    assert rolling['hpr'].iloc[-1] == pytest.approx(hpr['2021'].prod())
+
+
+def test_performance_from_cached_closes():
+    performance, errors = portfolio_performance({'aaa': 0.6, 'bbb': 0.4}, '2020-01-01', '2020-07-01',
+                                                frequency='monthly', window=3)
+    assert errors == {}
+    assert len(performance) == 6
+    assert list(performance.columns) == ['hpr', 'hpy', 'rolling_hpr', 'rolling_hpy']
+    assert performance['rolling_hpr'].iloc[2] == pytest.approx(performance['hpr'].iloc[:3].prod())
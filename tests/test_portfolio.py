@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from finance_tools.portfolio import Portfolio, holding_period, position_weight
+
+
+def test_matches_single_position_functions():
+    shares, start, end = [10, 5, 20], [100.0, 40.0, 25.0], [110.0, 30.0, 25.0]
+    result = Portfolio(shares, start, end).compute()
+
+    positions = [holding_period(*position) for position in zip(shares, start, end)]
+    total_begin = sum(position[0] for position in positions)
+    assert result.total_begin == total_begin == 1700.0
+    assert result.total_end == sum(position[1] for position in positions)
+    np.testing.assert_allclose(result.hpy, [position[3] for position in positions])
+    np.testing.assert_allclose(result.weight, [position_weight(position[0], total_begin) for position in positions])
+    assert result.weight.sum() == pytest.approx(1.0)
+    assert result.weighted_hpy.sum() == pytest.approx(result.total_end / result.total_begin - 1)
+
+
+def test_blank_rows_are_left_out_of_weights():
+    result = Portfolio([10, np.nan, 30], [10.0, 5.0, 10.0], [12.0, 5.0, 9.0]).compute()
+    assert result.total_begin == 400.0
+    np.testing.assert_allclose(result.weight, [0.25, np.nan, 0.75])
+    assert np.isnan(result.hpr[1])
+
+
+def test_zero_total_gives_zero_weights():
+    result = Portfolio([0, 0], [10.0, 20.0], [11.0, 21.0]).compute()
+    np.testing.assert_array_equal(result.weight, [0.0, 0.0])
+    np.testing.assert_array_equal(result.hpr, [0.0, 0.0])
+
+
+def test_lengths_must_match():
+    with pytest.raises(ValueError):
+        Portfolio([1, 2], [10.0], [11.0, 12.0])
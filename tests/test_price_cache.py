@@ -0,0 +1,114 @@
+import sqlite3
+
+import pandas as pd
+
+from finance_tools.price_cache import PriceStore, aggregate_bars, provider_history
+
+
+def _counting_store(tmp_path, weekdays_only=False, unknown=()):
+    calls = []
+
+    def fetcher(ticker, start_date, end_date, interval):
+        calls.append((start_date, end_date, interval))
+        data = provider_history(ticker, start_date, end_date, interval)
+        if ticker in unknown:
+            return data.iloc[:0]
+        return data[data.index.dayofweek < 5] if weekdays_only else data
+
+    return PriceStore(str(tmp_path / 'prices.sqlite'), fetcher=fetcher), calls
+
+
+def _spans(store, interval='1d'):
+    with sqlite3.connect(store.path) as conn:
+        return conn.execute('SELECT start, end FROM spans WHERE interval = ? ORDER BY start',
+                            (interval,)).fetchall()
+
+
+def test_only_missing_spans_are_fetched(tmp_path):
+    store, calls = _counting_store(tmp_path)
+
+    store.history('aaa', '2020-01-01', '2020-03-01')
+    store.history('AAA', '2020-02-01', '2020-04-01')
+    assert calls == [('2020-01-01', '2020-03-01', '1d'), ('2020-03-01', '2020-04-01', '1d')]
+
+    data = store.history('AAA', '2020-01-01', '2020-04-01')
+    assert len(calls) == 2
+    assert len(data) == 91
+    assert data.index.is_monotonic_increasing and data.index.is_unique
+
+
+def test_adjacent_and_overlapping_spans_merge(tmp_path):
+    store, calls = _counting_store(tmp_path)
+
+    store.history('AAA', '2020-03-01', '2020-04-01')
+    store.history('AAA', '2020-01-01', '2020-02-01')
+    assert _spans(store) == [('2020-01-01', '2020-02-01'), ('2020-03-01', '2020-04-01')]
+
+    store.history('AAA', '2020-01-15', '2020-03-15')
+    assert calls[-1] == ('2020-02-01', '2020-03-01', '1d')
+    assert _spans(store) == [('2020-01-01', '2020-04-01')]
+
+
+def test_aggregates_match_daily_bars(tmp_path):
+    store, _ = _counting_store(tmp_path)
+
+    monthly = store.history('AAA', '2020-01-01', '2021-01-01', interval='monthly')
+    expected = aggregate_bars(store.history('AAA', '2020-01-01', '2021-01-01'), 'monthly')
+    pd.testing.assert_frame_equal(monthly, expected, check_freq=False)
+    assert _spans(store, '1d:monthly') == [('2020-01-01', '2021-01-01')]
+
+
+def test_new_daily_bars_invalidate_their_periods(tmp_path):
+    store, _ = _counting_store(tmp_path)
+    before = store.history('AAA', '2020-01-01', '2021-01-01', interval='monthly')
+
+    # Replace the last daily bar of February, as a re-download after a correction would
+    bar = store.history('AAA', '2020-02-29', '2020-03-01').assign(Close=999.0, High=999.0)
+    store._store('AAA', '1d', '2020-02-29', '2020-03-01', bar)
+
+    after = store.history('AAA', '2020-01-01', '2021-01-01', interval='monthly')
+    february = after.index.month == 2
+    assert after.loc[february, 'Close'].item() == 999.0
+    assert after.loc[february, 'High'].item() == 999.0
+    pd.testing.assert_frame_equal(after[~february], before[~february])
+
+
+def test_gaps_without_bars_are_not_fetched_again(tmp_path):
+    store, calls = _counting_store(tmp_path, weekdays_only=True)
+
+    store.history('AAA', '2020-01-01', '2020-01-04')  # ends on a Saturday
+    store.history('AAA', '2020-01-01', '2020-01-06')
+    store.history('AAA', '2020-01-01', '2020-01-06')
+    assert calls == [('2020-01-01', '2020-01-04', '1d'), ('2020-01-04', '2020-01-06', '1d')]
+    assert _spans(store) == [('2020-01-01', '2020-01-06')]
+
+
+def test_tickers_without_any_data_are_retried(tmp_path):
+    store, calls = _counting_store(tmp_path, unknown=('ZZZ',))
+
+    assert store.history('ZZZ', '2020-01-01', '2020-02-01').empty
+    assert store.history('ZZZ', '2020-01-01', '2020-02-01').empty
+    assert len(calls) == 2
+    assert _spans(store) == []
+
+
+def test_aggregates_of_a_ticker_without_data(tmp_path):
+    store, _ = _counting_store(tmp_path, unknown=('ZZZ',))
+
+    monthly = store.history('ZZZ', '2020-01-01', '2021-03-01', interval='monthly')
+    assert monthly.empty
+    assert list(monthly.columns) == list(store.history('AAA', '2020-01-01', '2020-02-01').columns)
+    assert _spans(store, '1d:monthly') == []
+
+
+def test_partial_periods_at_both_ends(tmp_path):
+    store, _ = _counting_store(tmp_path)
+
+    weekly = store.history('AAA', '2020-01-08', '2020-03-11', interval='weekly')
+    expected = aggregate_bars(store.history('AAA', '2020-01-08', '2020-03-11'), 'weekly')
+    pd.testing.assert_frame_equal(weekly, expected, check_freq=False)
+    assert _spans(store, '1d:weekly') == [('2020-01-13', '2020-03-09')]
+
+    quarterly = store.history('AAA', '2020-02-01', '2020-03-01', interval='quarterly')
+    assert len(quarterly) == 1 and quarterly.index[0] == pd.Timestamp('2020-03-31')
+
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from finance_tools import providers
+from finance_tools.providers import (RecordingProvider, ReplayProvider, SyntheticProvider, YahooProvider,
+                                     provider_from_spec, set_provider)
+
+
+def test_replay_serves_what_was_recorded(tmp_path):
+    source = SyntheticProvider()
+    recorder = RecordingProvider(source, str(tmp_path))
+    recorder.history('br/k', '2020-01-01', '2020-02-01')
+    recorder.history('br/k', '2020-01-15', '2020-03-01')  # overlapping requests are merged
+    recorder.dividends('br/k')
+    recorder.info('br/k')
+
+    replay = ReplayProvider(str(tmp_path))
+    history = replay.history('BR/K', '2020-01-10', '2020-02-20')
+    assert history.index[0] == pd.Timestamp('2020-01-10')
+    assert history.index[-1] == pd.Timestamp('2020-02-19')
+    assert len(replay.history('BR/K', '2020-01-01', '2020-03-01')) == 60
+    pd.testing.assert_series_equal(replay.dividends('BR/K'), source.dividends('br/k'))
+    assert replay.info('BR/K') == source.info('br/k')
+    assert replay.trailing_eps('BR/K') == 1.0
+
+
+def test_replay_without_a_recording(tmp_path):
+    replay = ReplayProvider(str(tmp_path))
+    with pytest.raises(LookupError, match='history_1d.pkl for AAA'):
+        replay.history('aaa', '2020-01-01', '2020-02-01')
+    with pytest.raises(LookupError):
+        replay.reported_eps('AAA')
+
+
+def test_synthetic_provider_is_deterministic():
+    first = SyntheticProvider(seed=1).history('AAA', '2020-01-01', '2020-04-01')
+    pd.testing.assert_frame_equal(first, SyntheticProvider(seed=1).history('AAA', '2020-01-01', '2020-04-01'))
+    assert not first.equals(SyntheticProvider(seed=2).history('AAA', '2020-01-01', '2020-04-01'))
+    assert len(SyntheticProvider(dividends=8).dividends('AAA')) == 8
+
+
+def test_provider_from_spec(tmp_path):
+    assert isinstance(provider_from_spec('yahoo'), YahooProvider)
+    recorder = provider_from_spec(f'record:{tmp_path}')
+    assert isinstance(recorder, RecordingProvider) and recorder.directory == str(tmp_path)
+    assert isinstance(provider_from_spec(f'replay:{tmp_path}'), ReplayProvider)
+    for spec in ('replay', 'record:', 'bloomberg'):
+        with pytest.raises(ValueError):
+            provider_from_spec(spec)
+
+
+def test_provider_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(providers, '_provider', None)
+    monkeypatch.setenv('FINANCE_TOOLS_PROVIDER', f'replay:{tmp_path}')
+    assert isinstance(providers.get_provider(), ReplayProvider)
+    assert set_provider('yahoo') is providers.get_provider()
+    assert isinstance(providers.get_provider(), YahooProvider)
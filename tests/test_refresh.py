@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from finance_tools.price_cache import PriceStore
+from finance_tools.refresh import main, parse_duration, refresh_ticker, refresh_watchlist, run_every, write_manifest
+
+START = (date.today() - timedelta(days=9)).isoformat()
+
+
+def _store(tmp_path, moves):
+    """PriceStore whose bars close at their day of the year plus moves['today'] for today's bar."""
+    def fetcher(ticker, start_date, end_date, interval):
+        index = pd.date_range(start_date, end_date, freq='D', inclusive='left')
+        if ticker == 'ZZZ':
+            index = index[:0]
+        close = index.dayofyear.to_numpy(dtype=float) + (index.date == date.today()) * moves['today']
+        return pd.DataFrame({'Close': close, 'Volume': 1e6}, index=index)
+
+    return PriceStore(str(tmp_path / 'prices.sqlite'), fetcher=fetcher)
+
+
+def test_durations():
+    assert parse_duration('90') == 90
+    assert parse_duration(' 30M ') == 1800
+    assert parse_duration('1.5h') == 5400
+    assert parse_duration('1d') == 86400
+    for text in ('', 'h', '0', '-5m', 'soon'):
+        with pytest.raises(ValueError):
+            parse_duration(text)
+
+
+def test_closes_count_rows_added_or_changed(tmp_path):
+    moves = {'today': 0.0}
+    store = _store(tmp_path, moves)
+
+    assert refresh_ticker('aaa', ['closes'], START, store) == ({'closes': 10}, {})
+    assert refresh_ticker('AAA', ['closes'], START, store) == ({'closes': 0}, {})
+    moves['today'] = 0.5
+    assert refresh_ticker('AAA', ['closes'], START, store) == ({'closes': 1}, {})
+    assert store.row_count('AAA') == 10
+
+    updated, errors = refresh_ticker('ZZZ', ['closes'], START, store)
+    assert updated == {} and errors == {'closes': 'No data available for the given ticker.'}
+
+
+def test_watchlist_manifest(tmp_path):
+    store = _store(tmp_path, {'today': 0.0})
+    tickers = ['aaa', 'BBB', 'AAA', 'ZZZ']
+
+    first = refresh_watchlist(tickers, start_date=START, store=store)
+    assert list(first['tickers']) == ['AAA', 'BBB', 'ZZZ']
+    assert first['updated'] == ['AAA', 'BBB', 'ZZZ']  # ZZZ has no closes but does have dividends and EPS
+    assert first['rows_added'] == {'closes': 20, 'dividends': 3 * 80, 'eps': 3}
+    assert first['skipped'] == {'closes': 0, 'dividends': 0, 'eps': 0}
+    assert first['failures'] == {'ZZZ': {'closes': 'No data available for the given ticker.'}}
+
+    second = refresh_watchlist(tickers, start_date=START, store=store)
+    assert second['updated'] == []
+    assert second['rows_added'] == {'closes': 0, 'dividends': 0, 'eps': 0}
+    assert second['skipped'] == {'closes': 0, 'dividends': 3, 'eps': 3}
+
+    with pytest.raises(ValueError, match="Unknown dataset 'splits'"):
+        refresh_watchlist(tickers, datasets=('closes', 'splits'), store=store)
+
+
+def test_manifest_files(tmp_path):
+    manifest = {'started': '2025-01-02T09:30:00', 'updated': ['AAA']}
+    path = write_manifest(manifest, str(tmp_path / 'runs'))
+    assert os.path.basename(path) == 'refresh-20250102T093000.json'
+    with open(tmp_path / 'runs' / 'latest.json') as f:
+        assert json.load(f) == manifest
+    assert sorted(os.listdir(tmp_path / 'runs')) == ['latest.json', 'refresh-20250102T093000.json']
+
+
+def test_run_every_until_stopped():
+    stop = threading.Event()
+    runs = []
+
+    def job():
+        runs.append(1)
+        if len(runs) == 3:
+            stop.set()
+
+    run_every(job, 0.001, stop)
+    assert len(runs) == 3
+
+
+def test_command_line(tmp_path):
+    watchlist = tmp_path / 'watchlist.txt'
+    watchlist.write_text('AAA, BBB\n# comment\nAAA\n')
+    manifests = tmp_path / 'manifests'
+    assert main([str(watchlist), '--start', START, '--datasets', 'closes,eps', '--manifest-dir', str(manifests)]) == 0
+
+    with open(manifests / 'latest.json') as f:
+        manifest = json.load(f)
+    assert list(manifest['tickers']) == ['AAA', 'BBB']
+    assert manifest['datasets'] == ['closes', 'eps']
+    assert manifest['rows_added'] == {'closes': 20, 'eps': 2}
+
+    with pytest.raises(SystemExit):
+        main([str(watchlist), '--datasets', 'closes,splits'])
@@ -0,0 +1,89 @@
+import math
+
+import numpy as np
+import pytest
+
+from finance_tools.scenarios import (calculate_statistics, load_scenarios, main, scenario_statistics,
+                                     solve_missing_values)
+
+PROBABILITIES = [0.2, 0.5, 0.3]
+RETURNS = [-0.1, 0.05, 0.2]
+
+
+def test_matches_the_calculator():
+    stats = scenario_statistics(PROBABILITIES, RETURNS)
+    expected = sum(p * r for p, r in zip(PROBABILITIES, RETURNS))
+    variance, standard_deviation, cv = calculate_statistics(PROBABILITIES, RETURNS, expected)
+    assert stats.expected_return == pytest.approx(expected)
+    assert stats.variance == pytest.approx(variance)
+    assert stats.standard_deviation == pytest.approx(standard_deviation)
+    assert stats.cv == pytest.approx(cv)
+    assert solve_missing_values(None, None, None, None, PROBABILITIES, RETURNS) == pytest.approx(
+        (expected, variance, standard_deviation, cv))
+
+
+def test_no_cancellation_for_large_offsets():
+    returns = 1e9 + np.array([-1.0, 0.0, 1.0])
+    stats = scenario_statistics(None, returns)
+    assert stats.variance == pytest.approx(2 / 3, rel=1e-9)
+    assert stats.skew == pytest.approx(0.0, abs=1e-9)
+    assert stats.kurtosis == pytest.approx(-1.5)
+
+
+def test_one_result_per_row():
+    returns = np.array([RETURNS, [0.0, 0.0, 0.0]])
+    stats = scenario_statistics(np.array([PROBABILITIES] * 2), returns)
+    assert stats.expected_return.shape == (2,)
+    assert stats.variance[0] == pytest.approx(scenario_statistics(PROBABILITIES, RETURNS).variance)
+    assert stats.cv[1] == math.inf
+    assert np.isnan(stats.skew[1]) and np.isnan(stats.kurtosis[1])
+
+
+@pytest.mark.parametrize('probabilities, returns, message', [
+    ([0.5, 0.5], [0.1], 'same shape'),
+    ([], [], 'At least one'),
+    ([1.5, -0.5], [0.1, 0.2], 'between 0 and 1'),
+    ([0.5, 0.4], [0.1, 0.2], 'sum to 1'),
+])
+def test_invalid_scenarios(probabilities, returns, message):
+    with pytest.raises(ValueError, match=message):
+        scenario_statistics(probabilities, returns)
+
+
+def test_load_scenario_files(tmp_path):
+    headed = tmp_path / 'headed.csv'
+    headed.write_text('Return,Probability\n-0.1,0.2\n0.05,0.5\n0.2,0.3\n')
+    probabilities, returns = load_scenarios(str(headed))
+    assert probabilities.tolist() == PROBABILITIES and returns.tolist() == RETURNS
+
+    bare = tmp_path / 'bare.csv'
+    bare.write_text('0.2,-0.1\n0.5,0.05\n0.3,0.2\n')
+    probabilities, returns = load_scenarios(str(bare))
+    assert probabilities.tolist() == PROBABILITIES and returns.tolist() == RETURNS
+
+    sets = tmp_path / 'sets.csv'
+    sets.write_text('set,probability,return\na,0.5,0.1\na,0.5,0.3\nb,1.0,0.2\n')
+    probabilities, returns = load_scenarios(str(sets))
+    assert probabilities.tolist() == [[0.5, 0.5], [1.0, 0.0]]
+    assert scenario_statistics(probabilities, returns).expected_return.tolist() == pytest.approx([0.2, 0.2])
+
+    array = tmp_path / 'scenarios.npy'
+    np.save(array, np.array([PROBABILITIES, RETURNS]))
+    probabilities, returns = load_scenarios(str(array))
+    assert returns.tolist() == RETURNS
+
+    archive = tmp_path / 'scenarios.npz'
+    np.savez(archive, probabilities=PROBABILITIES, returns=RETURNS)
+    assert load_scenarios(str(archive))[0].tolist() == PROBABILITIES
+
+    np.save(tmp_path / 'flat.npy', np.zeros(3))
+    with pytest.raises(ValueError, match='shape'):
+        load_scenarios(str(tmp_path / 'flat.npy'))
+
+
+def test_command_line(tmp_path, capsys):
+    path = tmp_path / 'scenarios.csv'
+    path.write_text('probability,return\n0.2,-0.1\n0.5,0.05\n0.3,0.2\n')
+    assert main([str(path)]) == 0
+    output = capsys.readouterr().out
+    assert output.splitlines()[0].split() == ['expected_return', '0.065']
@@ -0,0 +1,169 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from finance_tools.scheduler import RequestScheduler, rate_from_environment, retry_after
+
+
+class StubYahoo(BaseHTTPRequestHandler):
+    """Counts requests per path. /held waits for release; /throttled answers 429 until throttle runs out."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _answer(self):
+        server = self.server
+        with server.lock:
+            server.hits.append((self.command, self.path))
+            throttled = self.path.startswith('/throttled') and server.throttle > 0
+            server.throttle -= throttled
+        if self.path.startswith('/held'):
+            server.release.wait(5)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else self.path.encode()
+
+        self.send_response(429 if throttled else 200)
+        if throttled:
+            self.send_header('Retry-After', '2')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv('YF_DISABLE_CURL_CFFI', '1')  # the requests backend, which talks plain HTTP
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubYahoo)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.hits = []
+    server.throttle = 0
+    server.release = threading.Event()
+    server.url = f'http://127.0.0.1:{server.server_port}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def _in_threads(count, call):
+    results = [None] * count
+
+    def run(i):
+        results[i] = call()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_identical_gets_are_sent_once(server):
+    scheduler = RequestScheduler(rate=None)
+    threads, responses = _in_threads(8, lambda: scheduler.get(server.url + '/held', params={'range': '1y'}))
+    _wait_for(lambda: scheduler.stats['shared'] == 7)
+    server.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert server.hits == [('GET', '/held?range=1y')]
+    assert scheduler.stats == {'sent': 1, 'shared': 7, 'throttled': 0}
+    assert all(response is responses[0] for response in responses)
+    assert responses[0].text == '/held?range=1y'
+
+    # Once it has completed, the same request goes out again
+    scheduler.get(server.url + '/held', params={'range': '1y'})
+    assert len(server.hits) == 2
+
+
+def test_posts_are_not_shared(server):
+    scheduler = RequestScheduler(rate=None)
+    threads, responses = _in_threads(3, lambda: scheduler.request('POST', server.url + '/held', data=b'order'))
+    _wait_for(lambda: len(server.hits) == 3)
+    server.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert scheduler.stats['shared'] == 0 and scheduler.stats['sent'] == 3
+    assert [response.content for response in responses] == [b'order'] * 3
+
+
+def test_throttled_requests_back_off_and_retry(server):
+    clock = FakeClock()
+    scheduler = RequestScheduler(rate=None, sleep=clock.sleep)
+    server.throttle = 1
+
+    response = scheduler.get(server.url + '/throttled')
+    assert response.status_code == 200
+    assert clock.sleeps == [2.0]  # Retry-After
+    assert len(server.hits) == 2
+    assert scheduler.stats == {'sent': 2, 'shared': 0, 'throttled': 1}
+
+
+def test_throttling_pauses_the_bucket(server):
+    clock = FakeClock()
+    scheduler = RequestScheduler(rate=100, burst=100, clock=clock, sleep=clock.sleep)
+    server.throttle = 1
+
+    assert scheduler.get(server.url + '/throttled').status_code == 200
+    # The retry waited out Retry-After with an empty bucket, and so does every other caller
+    assert clock.now == pytest.approx(2.0 + 1 / 100)
+    assert scheduler.limiter.acquire() == pytest.approx(1 / 100)
+
+
+def test_retries_run_out(server):
+    scheduler = RequestScheduler(rate=None, retries=2, sleep=lambda seconds: None)
+    server.throttle = 10
+
+    response = scheduler.get(server.url + '/throttled')
+    assert response.status_code == 429
+    assert len(server.hits) == 3
+    assert scheduler.stats['throttled'] == 2
+
+
+def test_retry_after_values():
+    assert retry_after(None) is None
+    assert retry_after('3') == 3.0
+    assert retry_after('-1') == 0.0
+    assert retry_after('soon') is None
+    assert retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+
+def test_rate_from_the_environment(monkeypatch):
+    monkeypatch.delenv('FINANCE_TOOLS_RATE', raising=False)
+    assert rate_from_environment() == 10
+    monkeypatch.setenv('FINANCE_TOOLS_RATE', '2.5')
+    assert rate_from_environment() == 2.5
+    monkeypatch.setenv('FINANCE_TOOLS_RATE', '0')
+    assert rate_from_environment() is None
+    monkeypatch.setenv('FINANCE_TOOLS_RATE', 'fast')
+    with pytest.raises(ValueError):
+        rate_from_environment()
@@ -0,0 +1,40 @@
+import pytest
+
+from finance_tools.scenarios import scenario_statistics
+from finance_tools.simulation import main, simulate_scenarios
+
+PROBABILITIES = [0.3, 0.5, 0.2]
+RETURNS = [0.1, 0.05, -0.1]
+
+
+def test_discrete_draws_are_tallied():
+    result = simulate_scenarios(PROBABILITIES, RETURNS, 1_000_000, seed=1)
+    exact = scenario_statistics(PROBABILITIES, RETURNS)
+
+    assert result.draws == 1_000_000
+    assert result.tallied and result.draws_per_second > 0
+    low, high = result.intervals['expected_return']
+    assert low <= result.statistics.expected_return <= high
+    assert result.statistics.expected_return == pytest.approx(exact.expected_return, abs=1e-3)
+
+
+def test_sampled_draws_report_throughput():
+    result = simulate_scenarios(PROBABILITIES, RETURNS, 100_000, distribution='normal', workers=1, seed=1)
+    assert not result.tallied and result.draws_per_second > 0
+
+
+def test_seed_fixes_the_result():
+    first = simulate_scenarios(PROBABILITIES, RETURNS, 10_000, distribution='t', workers=1, seed=5)
+    second = simulate_scenarios(PROBABILITIES, RETURNS, 10_000, distribution='t', workers=1, seed=5)
+    assert first.statistics == second.statistics
+
+
+def test_command_line(tmp_path, capsys):
+    path = tmp_path / 'scenarios.csv'
+    path.write_text('probability,return\n0.3,0.1\n0.5,0.05\n0.2,-0.1\n')
+
+    assert main([str(path), '--draws', '1e5', '--seed', '1']) == 0
+    assert capsys.readouterr().out.splitlines()[-1].endswith(' tallied draws/s)')
+    assert main([str(path), '--draws', '1e4', '--distribution', 'normal', '--workers', '1']) == 0
+    last = capsys.readouterr().out.splitlines()[-1]
+    assert last.endswith(' draws/s)') and 'tallied' not in last
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_tools.valuation import asof_panel, trailing_eps
+
+
+def _events(tickers, rng):
+    frames = []
+    for ticker in tickers:
+        days = np.sort(rng.choice(np.arange(1500), size=12, replace=False))
+        frames.append(pd.DataFrame({'ticker': ticker,
+                                    'available': pd.Timestamp('2018-01-01') + pd.to_timedelta(days, unit='D'),
+                                    'eps': rng.normal(2, 1, len(days))}))
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=3)
+
+
+@pytest.mark.parametrize('max_age_days', [None, 90])
+def test_matches_merge_asof_per_ticker(max_age_days):
+    rng = np.random.default_rng(7)
+    tickers = ['AAA', 'BBB', 'CCC', 'DDD']
+    events = _events(tickers[:3], rng)  # DDD has no events
+    index = pd.bdate_range('2017-06-01', '2022-06-01')
+
+    panel = asof_panel(index, tickers, events, max_age_days=max_age_days)
+
+    grid = pd.DataFrame({'date': index})
+    tolerance = pd.Timedelta(days=max_age_days) if max_age_days is not None else None
+    for ticker in tickers:
+        known = events[events['ticker'] == ticker].sort_values('available')
+        expected = pd.merge_asof(grid, known, left_on='date', right_on='available', tolerance=tolerance)
+        np.testing.assert_array_equal(panel[ticker].to_numpy(), expected['eps'].to_numpy(dtype=float))
+
+
+def test_unknown_tickers_and_empty_grid():
+    events = pd.DataFrame({'ticker': ['ZZZ'], 'available': [pd.Timestamp('2020-01-01')], 'eps': [1.0]})
+    index = pd.date_range('2020-01-01', periods=3)
+    assert asof_panel(index, ['AAA'], events).isna().all().all()
+    assert asof_panel(index[:0], ['ZZZ'], events).shape == (0, 1)
+
+
+def _reported(ticker, dates, eps=1.0):
+    return pd.DataFrame({'ticker': ticker, 'date': pd.to_datetime(dates), 'eps': eps})
+
+
+def test_trailing_eps_needs_four_consecutive_quarters():
+    # A late annual report is still consecutive; the skipped third quarter of 2020 is not
+    reported = pd.concat([
+        _reported('aaa', ['2019-04-25', '2019-07-25', '2019-10-25', '2020-02-28', '2020-04-24']),
+        _reported('BBB', ['2020-01-28', '2020-04-28', '2020-10-28', '2021-01-28', '2021-04-28',
+                          '2021-07-28', '2021-10-28']),
+    ], ignore_index=True)
+
+    result = trailing_eps(reported)
+    assert result['ticker'].tolist() == ['AAA', 'AAA', 'BBB', 'BBB']
+    assert result['available'].tolist() == [pd.Timestamp('2020-02-28'), pd.Timestamp('2020-04-24'),
+                                            pd.Timestamp('2021-07-28'), pd.Timestamp('2021-10-28')]
+    assert result['eps'].tolist() == [4.0] * 4
+
+
+def test_trailing_eps_after_the_close():
+    announced = ['2020-01-28 08:00', '2020-04-28 15:59', '2020-07-28 16:00', '2020-10-28 17:30']
+    reported = _reported('AAA', announced)
+    reported['date'] = reported['date'].dt.tz_localize('America/New_York')
+
+    assert trailing_eps(reported, quarters=1)['available'].tolist() == [
+        pd.Timestamp('2020-01-28'), pd.Timestamp('2020-04-28'), pd.Timestamp('2020-07-29'),
+        pd.Timestamp('2020-10-29')]
+    assert trailing_eps(reported.iloc[:3]).empty
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from finance_tools.workers import BackgroundRunner
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() callbacks run when the test pumps the event loop."""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, milliseconds, callback):
+        self.scheduled.append(callback)
+
+    def pump(self, runner, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while self.scheduled and time.monotonic() < deadline:
+            self.scheduled.pop(0)()
+            time.sleep(0.001)
+        assert not runner.pending
+
+
+def test_callbacks_run_on_the_calling_thread():
+    widget = FakeWidget()
+    runner = BackgroundRunner(widget, max_workers=2)
+    results, errors, threads = [], [], []
+
+    def work(value):
+        threads.append(threading.current_thread())
+        return value * 2
+
+    def fail():
+        raise ValueError("bad ticker")
+
+    def collect(value):
+        results.append((value, threading.current_thread()))
+
+    runner.submit(work, 21, on_success=collect)
+    runner.submit(fail, on_error=errors.append)
+    widget.pump(runner)
+
+    assert results == [(42, threading.current_thread())]
+    assert threads[0] is not threading.current_thread()
+    assert [str(error) for error in errors] == ['bad ticker']
+    assert widget.scheduled == []  # polling stops once nothing is pending
+    runner.shutdown()
+
+
+def test_cancelled_jobs_do_not_call_back():
+    widget = FakeWidget()
+    runner = BackgroundRunner(widget, max_workers=1)
+    release = threading.Event()
+    delivered = []
+
+    running = runner.submit(release.wait, on_success=delivered.append)
+    queued = runner.submit(lambda: 'queued', on_success=delivered.append)
+    assert queued.cancel()  # still waiting for the only worker
+    running.cancel()
+    release.set()
+    widget.pump(runner)
+
+    assert delivered == []
+    runner.shutdown()
+
+
+def test_unhandled_errors_are_printed(capsys):
+    widget = FakeWidget()
+    runner = BackgroundRunner(widget)
+    runner.submit(lambda: 1 / 0)
+    widget.pump(runner)
+    assert 'Error: division by zero' in capsys.readouterr().err
+    runner.shutdown()
@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_tools.wpvf import WPVFUpdater, compute_wpvf, rank_by_wpvf, wpvf_panel
+
+
+def _bars(rows=300, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    volume = rng.integers(1_000, 1_000_000, rows).astype(float)
+    return close, volume
+
+
+def _same(actual, expected):
+    np.testing.assert_allclose(np.asarray(actual, dtype=float), np.asarray(expected, dtype=float),
+                               rtol=1e-12, atol=0, equal_nan=True)
+
+
+def test_panel_matches_rolling_sum():
+    close, volume = _bars()
+    frame = compute_wpvf(pd.DataFrame({'Close': close, 'Volume': volume}))
+    expected = wpvf_panel(close, volume)
+    _same(frame['WPVF'].to_numpy()[20:], expected[20:])
+    assert np.isnan(expected[:19]).all()
+
+
+@pytest.mark.parametrize('window', [1, 2, 20])
+def test_updater_matches_panel(window):
+    close, volume = _bars()
+    volume[[50, 51, 120]] = np.nan  # missing volumes keep the window undefined until they roll out
+    updater = WPVFUpdater(window)
+    _same([updater.update(c, v) for c, v in zip(close, volume)], wpvf_panel(close, volume, window))
+
+
+@pytest.mark.parametrize('window', [1, 2, 20])
+def test_updater_continues_from_history(window):
+    close, volume = _bars()
+    expected = wpvf_panel(close, volume, window)
+    updater = WPVFUpdater.from_history(close[:200], volume[:200], window)
+    _same([updater.value], expected[199:200])
+    _same([updater.update(c, v) for c, v in zip(close[200:], volume[200:])], expected[200:])
+
+
+def test_zero_volume_window_divides_like_numpy():
+    close = np.array([10.0, 11.0, 12.0, 12.0, 11.0])
+    volume = np.array([0.0, 0.0, 5.0, 0.0, 0.0])
+    updater = WPVFUpdater(2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        _same([updater.update(c, v) for c, v in zip(close, volume)], wpvf_panel(close, volume, 2))
+    assert math.isnan(WPVFUpdater(1).update(10, 0))
+
+
+def test_ranking_uses_last_value_per_ticker():
+    close, volume = _bars(60)
+    closes = pd.DataFrame({'A': close, 'B': close[::-1]})
+    volumes = pd.DataFrame({'A': volume, 'B': volume})
+    closes.iloc[-1, 1] = np.nan
+    ranking = rank_by_wpvf(closes, volumes, window=5)
+    panel = wpvf_panel(closes, volumes, 5)
+    assert ranking['A'] == panel['A'].iloc[-1]
+    assert ranking['B'] == panel['B'].iloc[-2]